@@ -0,0 +1,26 @@
+"""Record why a refresh token was revoked; index expiry for purging
+
+Revision ID: 0013_refresh_token_revoked_reason
+Revises: 0012_site_settings
+Create Date: 2026-10-17 13:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0013_refresh_token_revoked_reason"
+down_revision = "0012_site_settings"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # "rotated", "logout", "logout_all" or "reuse"; only rotated tokens take part in reuse detection
+    op.add_column("refresh_tokens", sa.Column("revoked_reason", sa.String(16), nullable=True))
+    op.create_index("ix_refresh_tokens_expires_at", "refresh_tokens", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_refresh_tokens_expires_at", table_name="refresh_tokens")
+    op.drop_column("refresh_tokens", "revoked_reason")
@@ -0,0 +1,44 @@
+"""Create newsletter_campaigns table
+
+Revision ID: 0015_newsletter_campaigns
+Revises: 0014_email_outbox
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0015_newsletter_campaigns"
+down_revision = "0014_email_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "newsletter_campaigns",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("subject", sa.String(255), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("segment_interest", sa.String(64), nullable=True),
+        sa.Column("segment_role", sa.String(64), nullable=True),
+        sa.Column("status", sa.String(16), nullable=False, server_default="draft"),
+        sa.Column("last_subscriber_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_recipients", sa.Integer(), nullable=True),
+        sa.Column("sent_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("lease_owner", sa.String(32), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("created_by_user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_newsletter_campaigns_status", "newsletter_campaigns", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_newsletter_campaigns_status", table_name="newsletter_campaigns")
+    op.drop_table("newsletter_campaigns")
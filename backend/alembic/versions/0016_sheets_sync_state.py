@@ -0,0 +1,29 @@
+"""Create sheets_sync_state table for the Google Sheets backfill
+
+Revision ID: 0016_sheets_sync_state
+Revises: 0015_newsletter_campaigns
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0016_sheets_sync_state"
+down_revision = "0015_newsletter_campaigns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sheets_sync_state",
+        sa.Column("sheet", sa.String(32), primary_key=True),
+        sa.Column("last_synced_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rows_backfilled", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sheets_sync_state")
@@ -0,0 +1,25 @@
+"""Add (created_at, id) indexes for keyset pagination of admin lists
+
+Revision ID: 0017_list_keyset_indexes
+Revises: 0016_sheets_sync_state
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+
+
+revision = "0017_list_keyset_indexes"
+down_revision = "0016_sheets_sync_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # blog_posts and media_files already index created_at; secondary indexes carry the id
+    op.create_index("ix_contact_messages_created_at_id", "contact_messages", ["created_at", "id"])
+    op.create_index("ix_newsletter_subscriptions_created_at_id", "newsletter_subscriptions", ["created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_newsletter_subscriptions_created_at_id", table_name="newsletter_subscriptions")
+    op.drop_index("ix_contact_messages_created_at_id", table_name="contact_messages")
@@ -0,0 +1,32 @@
+"""Add FULLTEXT indexes for blog search (MySQL)
+
+On SQLite the FTS5 table ``blog_posts_fts`` is built by the app at startup
+(app/services/blog_search.py), since it stores the HTML-stripped text.
+
+Revision ID: 0018_blog_fulltext_search
+Revises: 0017_list_keyset_indexes
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+
+
+revision = "0018_blog_fulltext_search"
+down_revision = "0017_list_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "mysql":
+        return
+    op.create_index("ft_blog_posts_search", "blog_posts", ["title", "excerpt", "content"], mysql_prefix="FULLTEXT")
+    op.create_index("ft_blog_posts_title", "blog_posts", ["title"], mysql_prefix="FULLTEXT")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "mysql":
+        op.execute("DROP TABLE IF EXISTS blog_posts_fts")
+        return
+    op.drop_index("ft_blog_posts_title", table_name="blog_posts")
+    op.drop_index("ft_blog_posts_search", table_name="blog_posts")
@@ -0,0 +1,33 @@
+"""Create search_index table for the admin global search
+
+Populate it once after upgrading: python search_reindex.py
+
+Revision ID: 0019_admin_search_index
+Revises: 0018_blog_fulltext_search
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0019_admin_search_index"
+down_revision = "0018_blog_fulltext_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "search_index",
+        sa.Column("term", sa.String(64), primary_key=True),
+        sa.Column("entity_type", sa.String(16), primary_key=True),
+        sa.Column("entity_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("weight", sa.SmallInteger(), nullable=False),
+    )
+    op.create_index("ix_search_index_entity", "search_index", ["entity_type", "entity_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_search_index_entity", table_name="search_index")
+    op.drop_table("search_index")
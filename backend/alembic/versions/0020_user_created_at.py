@@ -0,0 +1,27 @@
+"""Add users.created_at (the admin dashboard counts new users by it)
+
+Existing accounts keep NULL: their creation date is unknown.
+
+Revision ID: 0020_user_created_at
+Revises: 0019_admin_search_index
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0020_user_created_at"
+down_revision = "0019_admin_search_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("created_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_users_created_at", "users", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_created_at", table_name="users")
+    op.drop_column("users", "created_at")
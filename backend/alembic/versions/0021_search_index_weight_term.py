@@ -0,0 +1,22 @@
+"""Index search_index on (weight, term, entity_id) so admin search reads candidates best first without sorting
+
+Revision ID: 0021_search_index_weight_term
+Revises: 0020_user_created_at
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+
+
+revision = "0021_search_index_weight_term"
+down_revision = "0020_user_created_at"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_search_index_weight_term", "search_index", ["weight", "term", "entity_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_search_index_weight_term", table_name="search_index")
@@ -1,23 +1,27 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func
+from sqlalchemy import select, desc
 from pydantic import BaseModel, EmailStr
 
+from app.db.pagination import paginate
 from app.db.session import get_session
-from app.core.deps import require_role
+from app.core.deps import require_admin
 from app.models.contact_message import ContactMessage
 from app.models.newsletter_subscription import NewsletterSubscription
 from app.models.user import User
 from app.services.account_lockout import unlock_account
+from app.services.exports import export_response
 from app.api.v1.endpoints.admin.blog import router as blog_router
 from app.api.v1.endpoints.admin.homepage import router as homepage_router
 from app.api.v1.endpoints.admin.media import router as media_router
+from app.api.v1.endpoints.admin.newsletter import router as newsletter_router
 from app.api.v1.endpoints.admin.settings import router as settings_router
 from app.api.v1.endpoints.admin.analytics import router as analytics_router
 from app.api.v1.endpoints.admin.users import router as users_router
+from app.api.v1.endpoints.admin.search import router as search_router
 
 
-router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_role("admin"))])
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
 
 # Include blog management routes
 router.include_router(blog_router, prefix="/blog", tags=["blog-admin"])
@@ -28,6 +32,9 @@ router.include_router(homepage_router, prefix="/homepage", tags=["homepage-admin
 # Include media library routes
 router.include_router(media_router, prefix="/media", tags=["media-admin"])
 
+# Include newsletter campaign routes
+router.include_router(newsletter_router, prefix="/newsletter", tags=["newsletter-admin"])
+
 # Include site settings routes
 router.include_router(settings_router, tags=["settings-admin"])
 
@@ -37,27 +44,52 @@ router.include_router(analytics_router, tags=["analytics-admin"])
 # Include user management routes
 router.include_router(users_router, tags=["users-admin"])
 
+# Include global search routes
+router.include_router(search_router, tags=["search-admin"])
 
-@router.get("/contact-messages")
-async def list_contact_messages(
-  db: AsyncSession = Depends(get_session),
-  limit: int = Query(50, ge=1, le=200),
-  offset: int = Query(0, ge=0),
-  q: str | None = Query(None, description="Search by name/email/organization/service"),
-):
-  base = select(ContactMessage)
+
+def contact_message_filters(stmt, q: str | None):
+  """The list filters of /contact-messages, shared with its export."""
   if q:
     like = f"%{q}%"
-    base = base.where(
+    stmt = stmt.where(
       (ContactMessage.name.ilike(like))
       | (ContactMessage.email.ilike(like))
       | (ContactMessage.organization.ilike(like))
       | (ContactMessage.service.ilike(like))
     )
-  total_res = await db.execute(select(func.count()).select_from(base.subquery()))
-  total = total_res.scalar_one()
-  res = await db.execute(base.order_by(desc(ContactMessage.created_at)).limit(limit).offset(offset))
-  items = res.scalars().all()
+  return stmt
+
+
+def newsletter_subscriber_filters(stmt, q: str | None):
+  """The list filters of /newsletter-subscribers, shared with its export."""
+  if q:
+    like = f"%{q}%"
+    stmt = stmt.where(
+      (NewsletterSubscription.email.ilike(like))
+      | (NewsletterSubscription.first_name.ilike(like))
+      | (NewsletterSubscription.last_name.ilike(like))
+      | (NewsletterSubscription.organization.ilike(like))
+      | (NewsletterSubscription.role.ilike(like))
+    )
+  return stmt
+
+
+@router.get("/contact-messages")
+async def list_contact_messages(
+  db: AsyncSession = Depends(get_session),
+  limit: int = Query(50, ge=1, le=200),
+  offset: int = Query(0, ge=0),
+  q: str | None = Query(None, description="Search by name/email/organization/service"),
+  cursor: str | None = Query(None, description="next_cursor of the previous page (replaces offset)"),
+  include_total: bool | None = Query(None, description="Count all matches (default: only without a cursor)"),
+):
+  base = contact_message_filters(select(ContactMessage), q)
+  page = await paginate(
+    db, base, (ContactMessage.created_at, ContactMessage.id),
+    limit=limit, cursor=cursor, offset=offset, include_total=include_total,
+  )
+  items = page.items
   return {
     "items": [
       {
@@ -72,9 +104,11 @@ async def list_contact_messages(
       }
       for i in items
     ],
-    "total": total,
+    "total": page.total,
+    "total_exact": page.total_exact,
     "limit": limit,
     "offset": offset,
+    "next_cursor": page.next_cursor,
   }
 
 
@@ -84,21 +118,15 @@ async def list_newsletter_subscribers(
   limit: int = Query(50, ge=1, le=200),
   offset: int = Query(0, ge=0),
   q: str | None = Query(None, description="Search by email/name/organization/role"),
+  cursor: str | None = Query(None, description="next_cursor of the previous page (replaces offset)"),
+  include_total: bool | None = Query(None, description="Count all matches (default: only without a cursor)"),
 ):
-  base = select(NewsletterSubscription)
-  if q:
-    like = f"%{q}%"
-    base = base.where(
-      (NewsletterSubscription.email.ilike(like))
-      | (NewsletterSubscription.first_name.ilike(like))
-      | (NewsletterSubscription.last_name.ilike(like))
-      | (NewsletterSubscription.organization.ilike(like))
-      | (NewsletterSubscription.role.ilike(like))
-    )
-  total_res = await db.execute(select(func.count()).select_from(base.subquery()))
-  total = total_res.scalar_one()
-  res = await db.execute(base.order_by(desc(NewsletterSubscription.created_at)).limit(limit).offset(offset))
-  items = res.scalars().all()
+  base = newsletter_subscriber_filters(select(NewsletterSubscription), q)
+  page = await paginate(
+    db, base, (NewsletterSubscription.created_at, NewsletterSubscription.id),
+    limit=limit, cursor=cursor, offset=offset, include_total=include_total,
+  )
+  items = page.items
   return {
     "items": [
       {
@@ -113,12 +141,52 @@ async def list_newsletter_subscribers(
       }
       for i in items
     ],
-    "total": total,
+    "total": page.total,
+    "total_exact": page.total_exact,
     "limit": limit,
     "offset": offset,
+    "next_cursor": page.next_cursor,
   }
 
 
+CONTACT_EXPORT_COLUMNS = ("id", "name", "email", "organization", "phone", "service", "message", "created_at")
+NEWSLETTER_EXPORT_COLUMNS = ("id", "email", "first_name", "last_name", "organization", "role", "interests", "created_at")
+
+
+def _split_interests(record: dict) -> dict:
+  record["interests"] = record["interests"].split(",") if record["interests"] else []
+  return record
+
+
+@router.get("/contact-messages/export")
+async def export_contact_messages(
+  fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+  gzip: bool = Query(False, description="Compress the download"),
+  q: str | None = Query(None, description="Search by name/email/organization/service"),
+):
+  """Stream every matching contact message as CSV or NDJSON"""
+  stmt = contact_message_filters(
+    select(*(getattr(ContactMessage, c) for c in CONTACT_EXPORT_COLUMNS)), q
+  ).order_by(desc(ContactMessage.created_at), desc(ContactMessage.id))
+  return export_response(stmt, CONTACT_EXPORT_COLUMNS, filename="contact-messages", fmt=fmt, compress=gzip)
+
+
+@router.get("/newsletter-subscribers/export")
+async def export_newsletter_subscribers(
+  fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+  gzip: bool = Query(False, description="Compress the download"),
+  q: str | None = Query(None, description="Search by email/name/organization/role"),
+):
+  """Stream every matching newsletter subscriber as CSV or NDJSON"""
+  stmt = newsletter_subscriber_filters(
+    select(*(getattr(NewsletterSubscription, c) for c in NEWSLETTER_EXPORT_COLUMNS)), q
+  ).order_by(desc(NewsletterSubscription.created_at), desc(NewsletterSubscription.id))
+  return export_response(
+    stmt, NEWSLETTER_EXPORT_COLUMNS, filename="newsletter-subscribers", fmt=fmt, compress=gzip,
+    ndjson_row=_split_interests,
+  )
+
+
 class UnlockAccountRequest(BaseModel):
     email: EmailStr
 
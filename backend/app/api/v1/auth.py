@@ -6,10 +6,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from jose import JWTError
 
-from app.core.security import create_access_token, decode_token
+from app.core.security import create_access_token, decode_token, verify_password_async
+from app.core.user_cache import user_cache
 from app.core.config import settings
 from app.core.rate_limit import rate_limiter
 from app.core.cookie_session import (
+    create_session_token,
+    end_session,
     set_session_cookie,
     set_refresh_cookie,
     clear_session_cookie,
@@ -18,17 +21,17 @@ from app.core.cookie_session import (
     set_csrf_cookie,
     validate_csrf,
 )
+from app.core.deps import get_current_user
 from app.db.session import get_session
-from app.services.users import authenticate_user
 from app.schemas.token import Token, RefreshRequest, LogoutRequest
 from app.schemas.two_factor import TwoFactorChallengeResponse, TwoFactorVerifyRequest
 from app.services.refresh_tokens import (
     generate_refresh_token_value,
+    add_refresh_token,
     create_refresh_token,
-    get_refresh_token,
-    is_refresh_token_active,
     rotate_refresh_token,
     revoke_refresh_token,
+    revoke_user_refresh_tokens,
 )
 from app.services.users import get_user_by_email
 from app.models.user import User
@@ -53,16 +56,19 @@ from app.schemas.password_reset import (
 )
 from app.core.password_policy import validate_password, PasswordValidationError
 from app.services.account_lockout import (
-    is_account_locked,
-    record_failed_attempt,
-    record_successful_login
+    MAX_FAILED_ATTEMPTS,
+    apply_failed_attempt,
+    apply_successful_login,
+    check_lockout,
+    queue_login_attempt,
+    queue_lockout_email,
 )
 from app.services.two_factor import (
     get_backup_codes_remaining,
     verify_totp_code,
     verify_and_consume_backup_code,
-    update_backup_code_hashes,
-    mark_two_factor_verified,
+    set_backup_code_entries,
+    set_two_factor_verified,
 )
 
 
@@ -76,6 +82,23 @@ INVALID_CREDENTIALS = HTTPException(
 )
 
 
+def _request_access_token(request: Request) -> str | None:
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        return auth[7:]
+    return request.cookies.get(settings.COOKIE_NAME)
+
+
+async def _commit_login(db: AsyncSession, user: User) -> None:
+    """Write everything a login step changed in one commit (skipped when nothing did)."""
+    user_changed = db.is_modified(user)
+    if not (user_changed or db.new):
+        return
+    await db.commit()
+    if user_changed:
+        await user_cache.invalidate(user.id)
+
+
 # Google OAuth models
 class GoogleLoginRequest(BaseModel):
     email: EmailStr
@@ -101,20 +124,22 @@ async def login(
     ip = request.client.host if request.client else "unknown"
     rate_key = f"login:{ip}"
     
-    is_limited, remaining = await rate_limiter.is_rate_limited(
+    limit = await rate_limiter.check(
         rate_key,
         settings.RATE_LIMIT_LOGIN_MAX_ATTEMPTS,
         settings.RATE_LIMIT_LOGIN_WINDOW_SECONDS
     )
     
-    if is_limited:
+    if limit.limited:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=f"Too many login attempts. Please try again later.",
-            headers={"Retry-After": str(settings.RATE_LIMIT_LOGIN_WINDOW_SECONDS)}
+            headers=limit.headers()
         )
+    response.headers.update(limit.headers())
     
-    # First, check if user exists (we need the user object for lockout check)
+    # Resolve the user once; everything the login changes (lockout counters, refresh
+    # token, audit row) is written by a single commit in _commit_login.
     user = await get_user_by_email(db, form_data.username)
     
     # If user doesn't exist, return generic error (prevent email enumeration)
@@ -122,7 +147,7 @@ async def login(
         raise INVALID_CREDENTIALS
     
     # Check if account is locked
-    is_locked, locked_until = await is_account_locked(db, user)
+    is_locked, locked_until = check_lockout(user)
     if is_locked:
         if locked_until:
             raise HTTPException(
@@ -136,13 +161,16 @@ async def login(
                 detail="Account is locked. Please contact support.",
             )
     
+    ua = request.headers.get("user-agent")
+
     # Authenticate user (check password)
-    authenticated_user = await authenticate_user(db, form_data.username, form_data.password)
-    
-    if not authenticated_user:
+    if not await verify_password_async(form_data.password, user.hashed_password):
         # Record failed attempt
-        ua = request.headers.get("user-agent")
-        was_locked = await record_failed_attempt(db, user, ip_address=ip, user_agent=ua)
+        queue_login_attempt(db, user, success=False, ip_address=ip, user_agent=ua)
+        was_locked = apply_failed_attempt(user)
+        if was_locked:
+            queue_lockout_email(db, user)
+        await _commit_login(db, user)
         
         if was_locked:
             raise HTTPException(
@@ -151,7 +179,7 @@ async def login(
             )
         
         # Show remaining attempts
-        remaining_attempts = 5 - user.failed_login_attempts
+        remaining_attempts = MAX_FAILED_ATTEMPTS - user.failed_login_attempts
         if remaining_attempts > 0:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -162,15 +190,15 @@ async def login(
             raise INVALID_CREDENTIALS
     
     # Check if email is verified
-    if not authenticated_user.is_email_verified:
+    if not user.is_email_verified:
+        await _commit_login(db, user)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Email not verified. Please check your email for verification link."
         )
 
-    ua = request.headers.get("user-agent")
-
-    if authenticated_user.two_factor_enabled:
+    if user.two_factor_enabled:
+        await _commit_login(db, user)
         claims = {
             "scope": "two_factor_challenge",
             "challenge_id": str(uuid4()),
@@ -178,29 +206,28 @@ async def login(
             "ua": ua or "",
         }
         challenge_token = create_access_token(
-            subject=authenticated_user.email,
+            subject=user.email,
             expires_minutes=5,
             additional_claims=claims,
         )
         response.status_code = status.HTTP_202_ACCEPTED
         return TwoFactorChallengeResponse(
             challenge_token=challenge_token,
-            backup_codes_remaining=get_backup_codes_remaining(authenticated_user),
+            backup_codes_remaining=get_backup_codes_remaining(user),
             message="Two-factor authentication required to complete login.",
             expires_in_seconds=300,
         )
 
-    # Successful login - record it and clear failed attempts
-    await record_successful_login(db, authenticated_user, ip_address=ip, user_agent=ua)
+    # Successful login - record it, clear failed attempts and issue a refresh token
+    queue_login_attempt(db, user, success=True, ip_address=ip, user_agent=ua)
+    apply_successful_login(user)
+    refresh_raw = generate_refresh_token_value(user.id)
+    await add_refresh_token(db, user, refresh_raw, ua, ip)
+    await _commit_login(db, user)
     await rate_limiter.reset(rate_key)
 
     # Issue access token with user ID as subject for protected endpoints
-    access_token = create_access_token(
-        subject=authenticated_user.id,
-        additional_claims={"scope": "access"},
-    )
-    refresh_raw = generate_refresh_token_value()
-    await create_refresh_token(db, authenticated_user, refresh_raw, ua, ip)
+    access_token = await create_session_token(user.id)
     
     # Optional: Set cookies if cookie session mode is enabled
     if settings.COOKIE_SESSION_ENABLED:
@@ -223,16 +250,18 @@ async def verify_two_factor_login(
     ip = request.client.host if request.client else "unknown"
     tf_rate_key = f"twofactor:{ip}"
 
-    is_limited, _ = await rate_limiter.is_rate_limited(
+    limit = await rate_limiter.check(
         tf_rate_key,
         settings.RATE_LIMIT_LOGIN_MAX_ATTEMPTS,
         settings.RATE_LIMIT_LOGIN_WINDOW_SECONDS,
     )
-    if is_limited:
+    if limit.limited:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Too many verification attempts. Please try again later.",
+            headers=limit.headers(),
         )
+    response.headers.update(limit.headers())
 
     try:
         decoded = decode_token(payload.challenge_token)
@@ -258,9 +287,9 @@ async def verify_two_factor_login(
     verified = False
 
     if method == "backup_code":
-        consumed, remaining_hashes = verify_and_consume_backup_code(user, payload.code)
+        consumed, remaining_entries = await verify_and_consume_backup_code(user, payload.code)
         if consumed:
-            await update_backup_code_hashes(db, user, remaining_hashes)
+            set_backup_code_entries(user, remaining_entries)
             verified = True
     else:
         verified = verify_totp_code(user, payload.code)
@@ -271,18 +300,18 @@ async def verify_two_factor_login(
     ua_claim = decoded.get("ua") or request.headers.get("user-agent")
     final_ip = challenge_ip or ip
 
-    await record_successful_login(db, user, ip_address=final_ip, user_agent=ua_claim)
-    await mark_two_factor_verified(db, user)
+    # Consumed backup code, lockout reset, audit row and refresh token: one commit
+    queue_login_attempt(db, user, success=True, ip_address=final_ip, user_agent=ua_claim)
+    apply_successful_login(user)
+    set_two_factor_verified(user)
+    refresh_raw = generate_refresh_token_value(user.id)
+    await add_refresh_token(db, user, refresh_raw, ua_claim, final_ip)
+    await _commit_login(db, user)
     await rate_limiter.reset(tf_rate_key)
     await rate_limiter.reset(f"login:{final_ip}")
 
     # After successful 2FA, issue access token with user ID as subject
-    access_token = create_access_token(
-        subject=user.id,
-        additional_claims={"scope": "access"},
-    )
-    refresh_raw = generate_refresh_token_value()
-    await create_refresh_token(db, user, refresh_raw, ua_claim, final_ip)
+    access_token = await create_session_token(user.id)
 
     if settings.COOKIE_SESSION_ENABLED:
         set_session_cookie(response, access_token)
@@ -294,31 +323,36 @@ async def verify_two_factor_login(
 
 
 @router.post("/refresh", response_model=Token, dependencies=[Depends(validate_csrf)])
-async def refresh(request: Request, payload: RefreshRequest, db: AsyncSession = Depends(get_session)):
+async def refresh(request: Request, response: Response, payload: RefreshRequest, db: AsyncSession = Depends(get_session)):
     token = payload.token
     # In cookie session mode, allow refresh token to be read from httpOnly cookie
     if settings.COOKIE_SESSION_ENABLED and (not token or token == "cookie"):
         token = request.cookies.get(f"{settings.COOKIE_NAME}_refresh")
-    stored = await get_refresh_token(db, token)
-    if not stored or not is_refresh_token_active(stored):
+    if not token:
         raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
-    # load user
-    user = await get_user_by_email(db, stored.user.email)  # type: ignore
-    if not user:
-        raise HTTPException(status_code=401, detail="User no longer exists")
-    # Refresh flow: new access token uses user ID as subject
-    new_access = create_access_token(
-        subject=user.id,
-        additional_claims={"scope": "access"},
-    )
-    new_refresh_raw, _ = await rotate_refresh_token(
+
+    rotation = await rotate_refresh_token(
         db,
         token,
-        user,
         request.headers.get("user-agent"),
         request.client.host if request.client else None,
     )
-    return Token(access_token=new_access, refresh_token=new_refresh_raw)
+    if rotation.status == "in_flight":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Refresh token was just rotated by another request. Retry with the latest token.",
+        )
+    if rotation.status == "reused":
+        raise HTTPException(status_code=401, detail="Refresh token reuse detected. All sessions have been signed out.")
+    if rotation.status != "rotated":
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    # Refresh flow: new access token uses user ID as subject
+    new_access = await create_session_token(rotation.user_id)
+    if settings.COOKIE_SESSION_ENABLED:
+        set_session_cookie(response, new_access)
+        set_refresh_cookie(response, rotation.raw_token)
+    return Token(access_token=new_access, refresh_token=rotation.raw_token)
 
 
 @router.post("/logout", dependencies=[Depends(validate_csrf)])
@@ -328,6 +362,7 @@ async def logout(request: Request, response: Response, payload: LogoutRequest, d
         token = request.cookies.get(f"{settings.COOKIE_NAME}_refresh")
     if token:
         await revoke_refresh_token(db, token)
+    await end_session(_request_access_token(request))
     
     # Clear cookies if cookie session mode is enabled
     if settings.COOKIE_SESSION_ENABLED:
@@ -337,6 +372,26 @@ async def logout(request: Request, response: Response, payload: LogoutRequest, d
     return {"status": "ok"}
 
 
+@router.post("/logout-all", dependencies=[Depends(validate_csrf)])
+async def logout_all(
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Revoke every refresh token of the current user ("log out everywhere").
+    With the Redis token store, access tokens already issued stop working too; with the
+    SQL store they remain valid until they expire.
+    """
+    revoked = await revoke_user_refresh_tokens(db, current_user.id)
+    
+    if settings.COOKIE_SESSION_ENABLED:
+        clear_session_cookie(response)
+        clear_refresh_cookie(response)
+    
+    return {"status": "ok", "revoked": revoked}
+
+
 @router.post("/google-login", response_model=GoogleLoginResponse)
 async def google_login(
     request: Request,
@@ -382,11 +437,8 @@ async def google_login(
         
         # Create tokens
         # Google login: access token subject should be user ID
-        access_token = create_access_token(
-            subject=user_id,
-            additional_claims={"scope": "access"},
-        )
-        refresh_raw = generate_refresh_token_value()
+        access_token = await create_session_token(user_id)
+        refresh_raw = generate_refresh_token_value(user_id)
         
         # Get user object for refresh token creation
         user_obj = await get_user_by_email(db, user_email)
@@ -477,7 +529,7 @@ async def forgot_password(
     try:
         # Create reset token and send email
         token = await create_reset_token(db, user)
-        await send_reset_email(user, token)
+        await send_reset_email(db, user, token)
     except Exception as e:
         print(f"⚠️ Failed to send reset email: {str(e)}")
         # Don't expose error to user
@@ -1,11 +1,21 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 
-from app.api.deps import get_current_user
-from app.db.session import get_db
+from app.core.count_cache import count_cache
+from app.core.deps import require_admin
+from app.core.rate_limit import rate_limiter
+from app.core.security import password_hashing_stats
+from app.core.user_cache import user_cache
+from app.db.session import get_session
+from app.services.blog_search import blog_search
+from app.services.email import email_transport_stats
+from app.services.email_outbox import email_dispatcher
+from app.services.google_sheets import get_sheets_service
+from app.services.login_attempt_writer import login_attempt_writer
+from app.services.newsletter_campaigns import campaign_sender
 from app.models.user import User
 from app.models.blog_post import BlogPost
 from app.models.contact_message import ContactMessage
@@ -15,17 +25,9 @@ from app.models.media import MediaFile
 router = APIRouter()
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
-    """Dependency to require admin role"""
-    if current_user.role != "admin":
-        from fastapi import HTTPException
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return current_user
-
-
 @router.get("/dashboard")
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin)
 ) -> Dict[str, Any]:
     """
@@ -39,32 +41,32 @@ async def get_dashboard_stats(
     seven_days_ago = now - timedelta(days=7)
     
     # User Statistics
-    total_users = db.query(func.count(User.id)).scalar() or 0
-    users_last_30_days = db.query(func.count(User.id)).filter(
+    total_users = await db.scalar(select(func.count(User.id))) or 0
+    users_last_30_days = await db.scalar(select(func.count(User.id)).where(
         User.created_at >= thirty_days_ago
-    ).scalar() or 0
-    users_last_7_days = db.query(func.count(User.id)).filter(
+    )) or 0
+    users_last_7_days = await db.scalar(select(func.count(User.id)).where(
         User.created_at >= seven_days_ago
-    ).scalar() or 0
-    admin_users = db.query(func.count(User.id)).filter(
+    )) or 0
+    admin_users = await db.scalar(select(func.count(User.id)).where(
         User.role == "admin"
-    ).scalar() or 0
-    verified_users = db.query(func.count(User.id)).filter(
-        User.is_verified == True
-    ).scalar() or 0
+    )) or 0
+    verified_users = await db.scalar(select(func.count(User.id)).where(
+        User.is_email_verified == True
+    )) or 0
     
     # Blog Statistics
-    total_blog_posts = db.query(func.count(BlogPost.id)).scalar() or 0
-    published_posts = db.query(func.count(BlogPost.id)).filter(
+    total_blog_posts = await db.scalar(select(func.count(BlogPost.id))) or 0
+    published_posts = await db.scalar(select(func.count(BlogPost.id)).where(
         BlogPost.published == True
-    ).scalar() or 0
+    )) or 0
     draft_posts = total_blog_posts - published_posts
-    posts_last_30_days = db.query(func.count(BlogPost.id)).filter(
+    posts_last_30_days = await db.scalar(select(func.count(BlogPost.id)).where(
         BlogPost.created_at >= thirty_days_ago
-    ).scalar() or 0
+    )) or 0
     
     # Get recent blog posts
-    recent_posts = db.query(BlogPost).order_by(desc(BlogPost.created_at)).limit(5).all()
+    recent_posts = (await db.execute(select(BlogPost).order_by(desc(BlogPost.created_at)).limit(5))).scalars().all()
     recent_posts_data = [{
         "id": post.id,
         "title": post.title,
@@ -73,18 +75,18 @@ async def get_dashboard_stats(
     } for post in recent_posts]
     
     # Contact Messages Statistics
-    total_messages = db.query(func.count(ContactMessage.id)).scalar() or 0
-    messages_last_30_days = db.query(func.count(ContactMessage.id)).filter(
+    total_messages = await db.scalar(select(func.count(ContactMessage.id))) or 0
+    messages_last_30_days = await db.scalar(select(func.count(ContactMessage.id)).where(
         ContactMessage.created_at >= thirty_days_ago
-    ).scalar() or 0
-    messages_last_7_days = db.query(func.count(ContactMessage.id)).filter(
+    )) or 0
+    messages_last_7_days = await db.scalar(select(func.count(ContactMessage.id)).where(
         ContactMessage.created_at >= seven_days_ago
-    ).scalar() or 0
+    )) or 0
     
     # Get recent messages
-    recent_messages = db.query(ContactMessage).order_by(
-        desc(ContactMessage.created_at)
-    ).limit(5).all()
+    recent_messages = (await db.execute(
+        select(ContactMessage).order_by(desc(ContactMessage.created_at)).limit(5)
+    )).scalars().all()
     recent_messages_data = [{
         "id": msg.id,
         "name": msg.name,
@@ -94,35 +96,37 @@ async def get_dashboard_stats(
     } for msg in recent_messages]
     
     # Newsletter Statistics
-    total_subscribers = db.query(func.count(NewsletterSubscription.id)).scalar() or 0
-    subscribers_last_30_days = db.query(func.count(NewsletterSubscription.id)).filter(
+    total_subscribers = await db.scalar(select(func.count(NewsletterSubscription.id))) or 0
+    subscribers_last_30_days = await db.scalar(select(func.count(NewsletterSubscription.id)).where(
         NewsletterSubscription.created_at >= thirty_days_ago
-    ).scalar() or 0
-    subscribers_last_7_days = db.query(func.count(NewsletterSubscription.id)).filter(
+    )) or 0
+    subscribers_last_7_days = await db.scalar(select(func.count(NewsletterSubscription.id)).where(
         NewsletterSubscription.created_at >= seven_days_ago
-    ).scalar() or 0
+    )) or 0
     
     # Media Library Statistics
-    total_media_files = db.query(func.count(MediaFile.id)).scalar() or 0
-    total_media_size = db.query(func.sum(MediaFile.file_size)).scalar() or 0
-    image_files = db.query(func.count(MediaFile.id)).filter(
+    total_media_files = await db.scalar(select(func.count(MediaFile.id))) or 0
+    total_media_size = await db.scalar(select(func.sum(MediaFile.file_size))) or 0
+    image_files = await db.scalar(select(func.count(MediaFile.id)).where(
         MediaFile.file_type == "image"
-    ).scalar() or 0
-    document_files = db.query(func.count(MediaFile.id)).filter(
+    )) or 0
+    document_files = await db.scalar(select(func.count(MediaFile.id)).where(
         MediaFile.file_type == "document"
-    ).scalar() or 0
+    )) or 0
     
     # Format media size in MB
     total_media_size_mb = round((total_media_size or 0) / (1024 * 1024), 2)
     
     # Popular blog categories
-    category_stats = db.query(
-        BlogPost.category,
-        func.count(BlogPost.id).label('count')
-    ).filter(
-        BlogPost.category.isnot(None),
-        BlogPost.published == True
-    ).group_by(BlogPost.category).all()
+    category_stats = (await db.execute(
+        select(
+            BlogPost.category,
+            func.count(BlogPost.id).label('count')
+        ).where(
+            BlogPost.category.isnot(None),
+            BlogPost.published == True
+        ).group_by(BlogPost.category)
+    )).all()
     
     categories_data = [
         {"category": cat, "count": count}
@@ -130,12 +134,14 @@ async def get_dashboard_stats(
     ]
     
     # Service request breakdown from contact messages
-    service_stats = db.query(
-        ContactMessage.service,
-        func.count(ContactMessage.id).label('count')
-    ).filter(
-        ContactMessage.service.isnot(None)
-    ).group_by(ContactMessage.service).all()
+    service_stats = (await db.execute(
+        select(
+            ContactMessage.service,
+            func.count(ContactMessage.id).label('count')
+        ).where(
+            ContactMessage.service.isnot(None)
+        ).group_by(ContactMessage.service)
+    )).all()
     
     services_data = [
         {"service": srv, "count": count}
@@ -190,7 +196,7 @@ async def get_dashboard_stats(
 
 @router.get("/activity-log")
 async def get_activity_log(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin),
     limit: int = 50
 ) -> List[Dict[str, Any]]:
@@ -202,7 +208,8 @@ async def get_activity_log(
     activities = []
     
     # Recent users
-    recent_users = db.query(User).order_by(desc(User.created_at)).limit(10).all()
+    # Newest accounts by id: created_at is NULL for accounts older than migration 0020
+    recent_users = (await db.execute(select(User).order_by(desc(User.id)).limit(10))).scalars().all()
     for user in recent_users:
         activities.append({
             "type": "user_registered",
@@ -212,7 +219,7 @@ async def get_activity_log(
         })
     
     # Recent blog posts
-    recent_posts = db.query(BlogPost).order_by(desc(BlogPost.created_at)).limit(10).all()
+    recent_posts = (await db.execute(select(BlogPost).order_by(desc(BlogPost.created_at)).limit(10))).scalars().all()
     for post in recent_posts:
         activities.append({
             "type": "blog_post_created",
@@ -222,7 +229,7 @@ async def get_activity_log(
         })
     
     # Recent contact messages
-    recent_messages = db.query(ContactMessage).order_by(desc(ContactMessage.created_at)).limit(10).all()
+    recent_messages = (await db.execute(select(ContactMessage).order_by(desc(ContactMessage.created_at)).limit(10))).scalars().all()
     for msg in recent_messages:
         activities.append({
             "type": "contact_message",
@@ -232,7 +239,7 @@ async def get_activity_log(
         })
     
     # Recent newsletter subscriptions
-    recent_subs = db.query(NewsletterSubscription).order_by(desc(NewsletterSubscription.created_at)).limit(10).all()
+    recent_subs = (await db.execute(select(NewsletterSubscription).order_by(desc(NewsletterSubscription.created_at)).limit(10))).scalars().all()
     for sub in recent_subs:
         name = f"{sub.first_name} {sub.last_name}".strip() or sub.email
         activities.append({
@@ -246,3 +253,25 @@ async def get_activity_log(
     activities.sort(key=lambda x: x['timestamp'] or '', reverse=True)
     
     return activities[:limit]
+
+
+@router.get("/metrics")
+async def get_runtime_metrics(
+    current_user: User = Depends(require_admin)
+) -> Dict[str, Any]:
+    """
+    Get in-process runtime counters for this worker (caches, queues).
+    Requires admin authentication.
+    """
+    return {
+        "user_cache": user_cache.stats(),
+        "count_cache": count_cache.stats(),
+        "password_hashing": password_hashing_stats(),
+        "login_attempts": login_attempt_writer.stats(),
+        "rate_limiter": await rate_limiter.stats(),
+        "email_outbox": email_dispatcher.stats(),
+        "email_transport": email_transport_stats(),
+        "newsletter_campaigns": campaign_sender.stats(),
+        "google_sheets": get_sheets_service().stats(),
+        "blog_search": blog_search.stats(),
+    }
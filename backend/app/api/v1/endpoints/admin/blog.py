@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import Optional
 
-from app.db.session import get_db
+from app.db.pagination import paginate
+from app.db.projection import Projection
+from app.db.session import get_session
 from app.models.blog_post import BlogPost
 from app.models.user import User
 from app.schemas.blog_post import (
@@ -13,37 +16,70 @@ from app.schemas.blog_post import (
     BlogPostsListResponse,
     BlogPostPublic,
 )
-from app.api.deps import get_current_user
+from app.core.deps import get_current_user
+from app.services.blog_search import blog_search
 
 
 router = APIRouter()
 
-
-def generate_unique_slug(db: Session, base_slug: str, post_id: Optional[int] = None) -> str:
+# Columns behind BlogPostResponse, for the list (fields= picks a subset)
+POST_LIST_PROJECTION = Projection({
+    "id": BlogPost.id,
+    "title": BlogPost.title,
+    "slug": BlogPost.slug,
+    "content": BlogPost.content,
+    "excerpt": BlogPost.excerpt,
+    "category": BlogPost.category,
+    "featured_image": BlogPost.featured_image,
+    "published": BlogPost.published,
+    "seo_title": BlogPost.seo_title,
+    "seo_description": BlogPost.seo_description,
+    "author_id": BlogPost.author_id,
+    "author": {"id": User.id, "email": User.email, "full_name": User.full_name},
+    "created_at": BlogPost.created_at,
+    "updated_at": BlogPost.updated_at,
+})
+
+
+async def generate_unique_slug(db: AsyncSession, base_slug: str, post_id: Optional[int] = None) -> str:
     """Generate a unique slug by appending numbers if necessary"""
     slug = base_slug
     counter = 1
     
     while True:
-        query = db.query(BlogPost).filter(BlogPost.slug == slug)
+        query = select(BlogPost.id).where(BlogPost.slug == slug)
         if post_id:
-            query = query.filter(BlogPost.id != post_id)
+            query = query.where(BlogPost.id != post_id)
         
-        if not query.first():
+        if (await db.execute(query.limit(1))).first() is None:
             return slug
         
         slug = f"{base_slug}-{counter}"
         counter += 1
 
 
-@router.get("/posts", response_model=BlogPostsListResponse)
+async def get_post_with_author(db: AsyncSession, post_id: int) -> Optional[BlogPost]:
+    """Load a blog post with its author eagerly (lazy loads are not allowed on AsyncSession)"""
+    res = await db.execute(
+        select(BlogPost)
+        .options(selectinload(BlogPost.author))
+        .where(BlogPost.id == post_id)
+        .execution_options(populate_existing=True)
+    )
+    return res.scalars().first()
+
+
+@router.get("/posts", response_model=BlogPostsListResponse, response_model_exclude_unset=True)
 async def list_blog_posts(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     search: Optional[str] = None,
     category: Optional[str] = None,
     published: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces page)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: only without a cursor)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,published (default: all)"),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
     """List all blog posts (admin only)"""
@@ -53,51 +89,46 @@ async def list_blog_posts(
             detail="Not authorized to access blog posts"
         )
 
-    # Build query
-    query = db.query(BlogPost)
+    # Build query: only the requested columns, author joined in
+    names = POST_LIST_PROJECTION.fields(fields)
+    order_by = (BlogPost.created_at, BlogPost.id)
+    query = POST_LIST_PROJECTION.select(names, order_by)
+    if "author" in names:
+        query = query.outerjoin(User, User.id == BlogPost.author_id)
 
     # Apply filters
     if search:
-        query = query.filter(
-            or_(
-                BlogPost.title.ilike(f"%{search}%"),
-                BlogPost.content.ilike(f"%{search}%"),
-                BlogPost.excerpt.ilike(f"%{search}%"),
-            )
-        )
+        query = query.where(blog_search.match_condition(search))
     
     if category:
-        query = query.filter(BlogPost.category == category)
+        query = query.where(BlogPost.category == category)
     
     if published is not None:
-        query = query.filter(BlogPost.published == published)
-
-    # Get total count
-    total = query.count()
+        query = query.where(BlogPost.published == published)
 
     # Apply pagination
-    posts = (
-        query.order_by(BlogPost.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    result = await paginate(
+        db, query, order_by,
+        limit=page_size, cursor=cursor, offset=(page - 1) * page_size, include_total=include_total,
     )
+    total = result.total
+    total_pages = (total + page_size - 1) // page_size if total is not None else None
 
-    total_pages = (total + page_size - 1) // page_size
-
-    return BlogPostsListResponse(
-        posts=posts,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages,
-    )
+    return {
+        "posts": [POST_LIST_PROJECTION.item(row, names) for row in result.items],
+        "total": total,
+        "total_exact": result.total_exact,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "next_cursor": result.next_cursor,
+    }
 
 
 @router.post("/posts", response_model=BlogPostResponse, status_code=status.HTTP_201_CREATED)
 async def create_blog_post(
     post_data: BlogPostCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
     """Create a new blog post (admin only)"""
@@ -108,7 +139,7 @@ async def create_blog_post(
         )
 
     # Ensure slug is unique
-    unique_slug = generate_unique_slug(db, post_data.slug)
+    unique_slug = await generate_unique_slug(db, post_data.slug)
 
     # Create blog post
     new_post = BlogPost(
@@ -125,16 +156,15 @@ async def create_blog_post(
     )
 
     db.add(new_post)
-    db.commit()
-    db.refresh(new_post)
+    await db.commit()
 
-    return new_post
+    return await get_post_with_author(db, new_post.id)
 
 
 @router.get("/posts/{post_id}", response_model=BlogPostResponse)
 async def get_blog_post(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
     """Get a specific blog post by ID (admin only)"""
@@ -144,7 +174,7 @@ async def get_blog_post(
             detail="Not authorized to access blog posts"
         )
 
-    post = db.query(BlogPost).filter(BlogPost.id == post_id).first()
+    post = await get_post_with_author(db, post_id)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -158,7 +188,7 @@ async def get_blog_post(
 async def update_blog_post(
     post_id: int,
     post_data: BlogPostUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
     """Update a blog post (admin only)"""
@@ -168,7 +198,7 @@ async def update_blog_post(
             detail="Not authorized to update blog posts"
         )
 
-    post = db.query(BlogPost).filter(BlogPost.id == post_id).first()
+    post = await db.get(BlogPost, post_id)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -180,21 +210,20 @@ async def update_blog_post(
     
     # If slug is being updated, ensure it's unique
     if "slug" in update_data:
-        update_data["slug"] = generate_unique_slug(db, update_data["slug"], post_id)
+        update_data["slug"] = await generate_unique_slug(db, update_data["slug"], post_id)
 
     for field, value in update_data.items():
         setattr(post, field, value)
 
-    db.commit()
-    db.refresh(post)
+    await db.commit()
 
-    return post
+    return await get_post_with_author(db, post_id)
 
 
 @router.delete("/posts/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_blog_post(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
     """Delete a blog post (admin only)"""
@@ -204,28 +233,29 @@ async def delete_blog_post(
             detail="Not authorized to delete blog posts"
         )
 
-    post = db.query(BlogPost).filter(BlogPost.id == post_id).first()
+    post = await db.get(BlogPost, post_id)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Blog post not found"
         )
 
-    db.delete(post)
-    db.commit()
+    await db.delete(post)
+    await db.commit()
 
     return None
 
 
 @router.get("/categories", response_model=list[str])
 async def list_categories(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
 ):
     """Get list of all unique categories"""
     categories = (
-        db.query(BlogPost.category)
-        .filter(BlogPost.category.isnot(None))
-        .distinct()
-        .all()
-    )
+        await db.execute(
+            select(BlogPost.category)
+            .where(BlogPost.category.isnot(None))
+            .distinct()
+        )
+    ).all()
     return [cat[0] for cat in categories if cat[0]]
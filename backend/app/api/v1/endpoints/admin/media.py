@@ -1,47 +1,54 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from app.db.session import get_db
+from app.db.pagination import paginate
+from app.db.projection import Projection
+from app.db.session import get_session
 from app.models.media import MediaFile, MediaFolder
 from app.models.user import User
 from app.schemas.media import (
     FolderCreate, FolderUpdate, FolderResponse, FoldersListResponse,
     FileUpdate, FileResponse, FilesListResponse
 )
-from app.api.deps import get_current_user
+from app.core.deps import get_current_user
 from app.core.file_storage import save_upload_file, delete_file, get_folder_path
 
 
 router = APIRouter()
 
+# Columns behind FileResponse, for the list (fields= picks a subset)
+FILE_LIST_PROJECTION = Projection({
+    name: getattr(MediaFile, name) for name in FileResponse.model_fields
+})
+
 
 # ===== FOLDER ENDPOINTS =====
 @router.get("/folders", response_model=FoldersListResponse)
 async def list_folders(
     parent_folder_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """List all folders or subfolders (admin only)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     
-    query = db.query(MediaFolder)
+    query = select(MediaFolder)
     
     if parent_folder_id:
-        query = query.filter(MediaFolder.parent_folder_id == parent_folder_id)
+        query = query.where(MediaFolder.parent_folder_id == parent_folder_id)
     else:
-        query = query.filter(MediaFolder.parent_folder_id.is_(None))
+        query = query.where(MediaFolder.parent_folder_id.is_(None))
     
-    folders = query.order_by(MediaFolder.name).all()
+    folders = (await db.execute(query.order_by(MediaFolder.name))).scalars().all()
     
     # Add file and subfolder counts
     folders_with_counts = []
     for folder in folders:
-        file_count = db.query(func.count(MediaFile.id)).filter(MediaFile.folder_id == folder.id).scalar()
-        subfolder_count = db.query(func.count(MediaFolder.id)).filter(MediaFolder.parent_folder_id == folder.id).scalar()
+        file_count = await db.scalar(select(func.count(MediaFile.id)).where(MediaFile.folder_id == folder.id))
+        subfolder_count = await db.scalar(select(func.count(MediaFolder.id)).where(MediaFolder.parent_folder_id == folder.id))
         
         folder_dict = {
             "id": folder.id,
@@ -60,7 +67,7 @@ async def list_folders(
 @router.post("/folders", response_model=FolderResponse, status_code=status.HTTP_201_CREATED)
 async def create_folder(
     data: FolderCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new folder (admin only)"""
@@ -69,7 +76,7 @@ async def create_folder(
     
     # Check if parent folder exists
     if data.parent_folder_id:
-        parent = db.query(MediaFolder).filter(MediaFolder.id == data.parent_folder_id).first()
+        parent = await db.get(MediaFolder, data.parent_folder_id)
         if not parent:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Parent folder not found")
     
@@ -80,8 +87,8 @@ async def create_folder(
         created_by_user_id=current_user.id
     )
     db.add(folder)
-    db.commit()
-    db.refresh(folder)
+    await db.commit()
+    await db.refresh(folder)
     
     return FolderResponse(
         id=folder.id,
@@ -98,14 +105,14 @@ async def create_folder(
 async def update_folder(
     folder_id: int,
     data: FolderUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Update a folder (admin only)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     
-    folder = db.query(MediaFolder).filter(MediaFolder.id == folder_id).first()
+    folder = await db.get(MediaFolder, folder_id)
     if not folder:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Folder not found")
     
@@ -118,11 +125,11 @@ async def update_folder(
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot set folder as its own parent")
         folder.parent_folder_id = data.parent_folder_id
     
-    db.commit()
-    db.refresh(folder)
+    await db.commit()
+    await db.refresh(folder)
     
-    file_count = db.query(func.count(MediaFile.id)).filter(MediaFile.folder_id == folder.id).scalar()
-    subfolder_count = db.query(func.count(MediaFolder.id)).filter(MediaFolder.parent_folder_id == folder.id).scalar()
+    file_count = await db.scalar(select(func.count(MediaFile.id)).where(MediaFile.folder_id == folder.id))
+    subfolder_count = await db.scalar(select(func.count(MediaFolder.id)).where(MediaFolder.parent_folder_id == folder.id))
     
     return FolderResponse(
         id=folder.id,
@@ -138,20 +145,20 @@ async def update_folder(
 @router.delete("/folders/{folder_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_folder(
     folder_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a folder (admin only)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     
-    folder = db.query(MediaFolder).filter(MediaFolder.id == folder_id).first()
+    folder = await db.get(MediaFolder, folder_id)
     if not folder:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Folder not found")
     
     # Check if folder has files or subfolders
-    file_count = db.query(func.count(MediaFile.id)).filter(MediaFile.folder_id == folder.id).scalar()
-    subfolder_count = db.query(func.count(MediaFolder.id)).filter(MediaFolder.parent_folder_id == folder.id).scalar()
+    file_count = await db.scalar(select(func.count(MediaFile.id)).where(MediaFile.folder_id == folder.id))
+    subfolder_count = await db.scalar(select(func.count(MediaFolder.id)).where(MediaFolder.parent_folder_id == folder.id))
     
     if file_count > 0 or subfolder_count > 0:
         raise HTTPException(
@@ -159,8 +166,8 @@ async def delete_folder(
             detail="Cannot delete folder with files or subfolders. Delete contents first."
         )
     
-    db.delete(folder)
-    db.commit()
+    await db.delete(folder)
+    await db.commit()
     return None
 
 
@@ -172,7 +179,7 @@ async def upload_file(
     alt_text: Optional[str] = None,
     title: Optional[str] = None,
     description: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Upload a file (admin only)"""
@@ -180,7 +187,7 @@ async def upload_file(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     
     # Get folder path if folder_id provided
-    folder_path = get_folder_path(folder_id, db) if folder_id else None
+    folder_path = await get_folder_path(folder_id, db) if folder_id else None
     
     # Save file to disk
     try:
@@ -212,73 +219,80 @@ async def upload_file(
     )
     
     db.add(media_file)
-    db.commit()
-    db.refresh(media_file)
+    await db.commit()
+    await db.refresh(media_file)
     
     return media_file
 
 
-@router.get("/files", response_model=FilesListResponse)
+@router.get("/files", response_model=FilesListResponse, response_model_exclude_unset=True)
 async def list_files(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     folder_id: Optional[int] = None,
     file_type: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces page)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: only without a cursor)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,file_url,title (default: all)"),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """List all files with pagination and filters (admin only)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     
-    query = db.query(MediaFile)
+    names = FILE_LIST_PROJECTION.fields(fields)
+    order_by = (MediaFile.created_at, MediaFile.id)
+    query = FILE_LIST_PROJECTION.select(names, order_by)
     
     # Apply filters
     if folder_id is not None:
         if folder_id == 0:  # Root folder (no folder)
-            query = query.filter(MediaFile.folder_id.is_(None))
+            query = query.where(MediaFile.folder_id.is_(None))
         else:
-            query = query.filter(MediaFile.folder_id == folder_id)
+            query = query.where(MediaFile.folder_id == folder_id)
     
     if file_type:
-        query = query.filter(MediaFile.file_type == file_type)
+        query = query.where(MediaFile.file_type == file_type)
     
     if search:
-        query = query.filter(
+        query = query.where(
             (MediaFile.original_filename.ilike(f"%{search}%")) |
             (MediaFile.title.ilike(f"%{search}%")) |
             (MediaFile.description.ilike(f"%{search}%"))
         )
     
-    # Get total count
-    total = query.count()
-    
     # Apply pagination
-    files = query.order_by(MediaFile.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
-    
-    total_pages = (total + page_size - 1) // page_size
-    
-    return FilesListResponse(
-        items=files,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
+    result = await paginate(
+        db, query, order_by,
+        limit=page_size, cursor=cursor, offset=(page - 1) * page_size, include_total=include_total,
     )
+    total = result.total
+    total_pages = (total + page_size - 1) // page_size if total is not None else None
+    
+    return {
+        "items": [FILE_LIST_PROJECTION.item(row, names) for row in result.items],
+        "total": total,
+        "total_exact": result.total_exact,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "next_cursor": result.next_cursor,
+    }
 
 
 @router.get("/files/{file_id}", response_model=FileResponse)
 async def get_file(
     file_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Get file details (admin only)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     
-    file = db.query(MediaFile).filter(MediaFile.id == file_id).first()
+    file = await db.get(MediaFile, file_id)
     if not file:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
     
@@ -289,14 +303,14 @@ async def get_file(
 async def update_file(
     file_id: int,
     data: FileUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Update file metadata (admin only)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     
-    file = db.query(MediaFile).filter(MediaFile.id == file_id).first()
+    file = await db.get(MediaFile, file_id)
     if not file:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
     
@@ -305,8 +319,8 @@ async def update_file(
     for field, value in update_data.items():
         setattr(file, field, value)
     
-    db.commit()
-    db.refresh(file)
+    await db.commit()
+    await db.refresh(file)
     
     return file
 
@@ -314,14 +328,14 @@ async def update_file(
 @router.delete("/files/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_file_endpoint(
     file_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a file (admin only)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     
-    file = db.query(MediaFile).filter(MediaFile.id == file_id).first()
+    file = await db.get(MediaFile, file_id)
     if not file:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
     
@@ -329,7 +343,7 @@ async def delete_file_endpoint(
     delete_file(file.file_path)
     
     # Delete database record
-    db.delete(file)
-    db.commit()
+    await db.delete(file)
+    await db.commit()
     
     return None
@@ -0,0 +1,115 @@
+import csv
+import json
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import require_admin
+from app.db.session import SessionLocal, get_session
+from app.models.newsletter_campaign import NewsletterCampaign
+from app.models.user import User
+from app.schemas.newsletter_campaign import CampaignCreate, CampaignProgress, CampaignsListResponse
+from app.services.newsletter_campaigns import CampaignTemplate, campaign_progress, campaign_sender
+from app.services.newsletter_import import SubscriberCsvImport
+
+router = APIRouter()
+
+
+async def _get_campaign(db: AsyncSession, campaign_id: int) -> NewsletterCampaign:
+    campaign = await db.get(NewsletterCampaign, campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Campaign not found")
+    return campaign
+
+
+@router.post("/campaigns", response_model=CampaignProgress, status_code=status.HTTP_201_CREATED)
+async def create_campaign(
+    payload: CampaignCreate,
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(require_admin),
+):
+    """Create a draft campaign; nothing is sent until it is started"""
+    try:
+        CampaignTemplate(payload.subject, payload.body)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    campaign = NewsletterCampaign(
+        subject=payload.subject,
+        body=payload.body,
+        segment_interest=payload.segment_interest or None,
+        segment_role=payload.segment_role or None,
+        status="draft",
+        last_subscriber_id=0,
+        sent_count=0,
+        failed_count=0,
+        created_by_user_id=current_user.id,
+    )
+    db.add(campaign)
+    await db.commit()
+    await db.refresh(campaign)
+    return campaign_progress(campaign)
+
+
+@router.get("/campaigns", response_model=CampaignsListResponse)
+async def list_campaigns(db: AsyncSession = Depends(get_session)):
+    res = await db.execute(select(NewsletterCampaign).order_by(desc(NewsletterCampaign.id)).limit(100))
+    items = [campaign_progress(c) for c in res.scalars().all()]
+    total = await db.scalar(select(func.count(NewsletterCampaign.id)))
+    return {"items": items, "total": total}
+
+
+@router.get("/campaigns/{campaign_id}", response_model=CampaignProgress)
+async def get_campaign_progress(campaign_id: int, db: AsyncSession = Depends(get_session)):
+    """Progress of a campaign: counts, percent complete, send rate and ETA"""
+    return campaign_progress(await _get_campaign(db, campaign_id))
+
+
+@router.post("/campaigns/{campaign_id}/start", response_model=CampaignProgress)
+async def start_campaign(campaign_id: int, db: AsyncSession = Depends(get_session)):
+    """Queue a draft or paused campaign; a paused one resumes from its checkpoint"""
+    campaign = await _get_campaign(db, campaign_id)
+    if campaign.status not in ("draft", "paused"):
+        raise HTTPException(status_code=409, detail=f"Campaign is {campaign.status}")
+    campaign.status = "queued"
+    campaign.last_error = None
+    await db.commit()
+    campaign_sender.wake()
+    return campaign_progress(campaign)
+
+
+@router.post("/campaigns/{campaign_id}/pause", response_model=CampaignProgress)
+async def pause_campaign(campaign_id: int, db: AsyncSession = Depends(get_session)):
+    """Stop sending after the batch in flight; start again to resume"""
+    campaign = await _get_campaign(db, campaign_id)
+    if campaign.status not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Campaign is {campaign.status}")
+    campaign.status = "paused"
+    await db.commit()
+    return campaign_progress(campaign)
+
+
+@router.post("/import")
+async def import_subscribers(file: UploadFile = File(...)):
+    """
+    Bulk-import subscribers from a CSV with an ``email`` column (optional: first_name,
+    last_name, organization, role, interests). Existing emails are updated; blank cells
+    keep the stored value. The response streams one JSON progress line per batch.
+    """
+    csv_import = SubscriberCsvImport(file.file)
+    try:
+        csv_import.read_header()
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
+
+    async def progress_lines():
+        async with SessionLocal() as db:
+            try:
+                async for progress in csv_import.run(db):
+                    yield json.dumps(progress) + "\n"
+            except (ValueError, UnicodeDecodeError, csv.Error) as e:
+                await db.rollback()
+                yield json.dumps({**csv_import.progress, "error": f"Invalid CSV: {e}"}) + "\n"
+
+    return StreamingResponse(progress_lines(), media_type="application/x-ndjson")
@@ -0,0 +1,23 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_session
+from app.schemas.search import AdminSearchResponse, SearchEntityType
+from app.services import admin_search
+
+
+router = APIRouter()
+
+
+@router.get("/search", response_model=AdminSearchResponse)
+async def search_admin(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[List[SearchEntityType]] = Query(None, description="Restrict to these result types"),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_session),
+):
+    """Search users, contact messages, subscribers, media and posts at once (type-ahead: every word matches as a prefix)"""
+    items = await admin_search.search(db, q, types=types, limit=limit)
+    return {"items": items, "query": q}
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.api.deps import get_current_user
-from app.db.session import get_db
+from app.core.deps import require_admin
+from app.db.session import get_session
 from app.models.user import User
 from app.models.site_settings import SiteSetting
 from app.schemas.site_settings import (
@@ -15,23 +16,16 @@ from app.schemas.site_settings import (
 router = APIRouter()
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
-    """Dependency to require admin role"""
-    if current_user.role != "admin":
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return current_user
-
-
 @router.get("/settings", response_model=SettingsGroupResponse)
 async def get_all_settings(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin)
 ):
     """
     Get all site settings grouped by category.
     Requires admin authentication.
     """
-    settings = db.query(SiteSetting).all()
+    settings = (await db.execute(select(SiteSetting))).scalars().all()
     
     # Group settings by category
     grouped_settings = {
@@ -60,7 +54,7 @@ async def get_all_settings(
 @router.put("/settings")
 async def update_settings(
     settings_update: SettingsUpdateRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin)
 ):
     """
@@ -85,9 +79,10 @@ async def update_settings(
                 setting_key = f"{category}.{key}"
                 
                 # Find and update the setting
-                setting = db.query(SiteSetting).filter(
-                    SiteSetting.setting_key == setting_key
-                ).first()
+                res = await db.execute(
+                    select(SiteSetting).where(SiteSetting.setting_key == setting_key)
+                )
+                setting = res.scalars().first()
                 
                 if setting:
                     setting.setting_value = value
@@ -104,7 +99,7 @@ async def update_settings(
                     db.add(new_setting)
                     updated_count += 1
     
-    db.commit()
+    await db.commit()
     
     return {
         "message": f"Successfully updated {updated_count} settings",
@@ -114,12 +109,12 @@ async def update_settings(
 
 @router.get("/settings/raw", response_model=List[SiteSettingResponse])
 async def get_all_settings_raw(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin)
 ):
     """
     Get all site settings as raw list (for debugging).
     Requires admin authentication.
     """
-    settings = db.query(SiteSetting).all()
-    return settings
+    res = await db.execute(select(SiteSetting))
+    return res.scalars().all()
@@ -1,24 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, or_
+from sqlalchemy import desc, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 
-from app.api.deps import get_current_user
-from app.db.session import get_db
+from app.core.deps import require_admin
+from app.db.pagination import paginate
+from app.db.projection import Projection, partial_model
+from app.db.session import get_session
 from app.models.user import User
-from app.core.security import hash_password
+from app.core.security import hash_password_async
+from app.core.user_cache import user_cache
+from app.services.exports import export_response
+from app.services.refresh_tokens import revoke_user_refresh_tokens
 
 router = APIRouter()
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
-    """Dependency to require admin role"""
-    if current_user.role != "admin":
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return current_user
-
-
 class UserResponse(BaseModel):
     id: int
     email: str
@@ -27,18 +26,24 @@ class UserResponse(BaseModel):
     is_verified: bool
     is_locked: bool
     two_factor_enabled: bool
-    created_at: Optional[str] = ""  # Optional since User model doesn't have this field
+    created_at: Optional[str] = ""  # ISO timestamp; empty for accounts older than migration 0020 (NULL)
     
     class Config:
         from_attributes = True
 
 
+# List item: UserResponse, or the subset picked with fields=
+UserListItem = partial_model(UserResponse, "UserListItem")
+
+
 class UsersListResponse(BaseModel):
-    items: List[UserResponse]
-    total: int
+    items: List[UserListItem]
+    total: Optional[int] = None
+    total_exact: Optional[bool] = None  # False when estimated from table statistics
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class UserCreateRequest(BaseModel):
@@ -59,26 +64,35 @@ class UserUpdateRequest(BaseModel):
     password: Optional[str] = None
 
 
-@router.get("/users", response_model=UsersListResponse)
-async def list_users(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
-    search: Optional[str] = None,
-    role: Optional[str] = None,
-    is_verified: Optional[bool] = None
-):
-    """
-    List all users with pagination and filtering.
-    Requires admin authentication.
-    """
-    query = db.query(User)
-    
-    # Apply filters
+# Columns behind UserResponse, for the list (fields= picks a subset)
+USER_LIST_PROJECTION = Projection({
+    "id": User.id,
+    "email": User.email,
+    "full_name": User.full_name,
+    "role": User.role,
+    "is_verified": User.is_email_verified,
+    "is_locked": User.is_locked,
+    "two_factor_enabled": User.two_factor_enabled,
+    "created_at": User.created_at,
+})
+
+
+def format_created_at(created_at: Optional[datetime]) -> str:
+    return created_at.isoformat() if created_at else ""
+
+
+def user_list_item(row, names: List[str]) -> dict:
+    item = USER_LIST_PROJECTION.item(row, names)
+    if "created_at" in item:
+        item["created_at"] = format_created_at(item["created_at"])
+    return item
+
+
+def user_filters(query, search: Optional[str], role: Optional[str], is_verified: Optional[bool]):
+    """Apply the /users list filters (shared with the export)."""
     if search:
         search_pattern = f"%{search}%"
-        query = query.filter(
+        query = query.where(
             or_(
                 User.email.ilike(search_pattern),
                 User.full_name.ilike(search_pattern)
@@ -86,56 +100,97 @@ async def list_users(
         )
     
     if role:
-        query = query.filter(User.role == role)
+        query = query.where(User.role == role)
     
     if is_verified is not None:
-        query = query.filter(User.is_verified == is_verified)
-    
-    # Get total count
-    total = query.count()
+        query = query.where(User.is_email_verified == is_verified)
     
-    # Calculate pagination
-    total_pages = (total + page_size - 1) // page_size
-    offset = (page - 1) * page_size
-    
-    # Get paginated results
-    users = query.order_by(desc(User.id)).offset(offset).limit(page_size).all()
-    
-    # Convert to response format
-    user_responses = [
-        UserResponse(
-            id=user.id,
-            email=user.email,
-            full_name=user.full_name,
-            role=user.role,
-            is_verified=user.is_email_verified,
-            is_locked=user.is_locked,
-            two_factor_enabled=user.two_factor_enabled,
-            created_at=user.created_at.isoformat() if hasattr(user, 'created_at') and user.created_at else ""
-        )
-        for user in users
-    ]
+    return query
+
+
+@router.get("/users", response_model=UsersListResponse, response_model_exclude_unset=True)
+async def list_users(
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(require_admin),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    search: Optional[str] = None,
+    role: Optional[str] = None,
+    is_verified: Optional[bool] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces page)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: only without a cursor)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,email,role (default: all)"),
+):
+    """
+    List all users with pagination and filtering.
+    Requires admin authentication.
+    """
+    names = USER_LIST_PROJECTION.fields(fields)
+    # created_at is NULL for older accounts: newest first is id order
+    order_by = (User.id,)
+    query = user_filters(USER_LIST_PROJECTION.select(names, order_by), search, role, is_verified)
     
-    return UsersListResponse(
-        items=user_responses,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
+    result = await paginate(
+        db, query, order_by,
+        limit=page_size, cursor=cursor, offset=(page - 1) * page_size, include_total=include_total,
     )
+    total = result.total
+    total_pages = (total + page_size - 1) // page_size if total is not None else None
+    
+    return {
+        "items": [user_list_item(row, names) for row in result.items],
+        "total": total,
+        "total_exact": result.total_exact,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "next_cursor": result.next_cursor,
+    }
+
+
+USER_EXPORT_COLUMNS = ("id", "email", "full_name", "role", "is_verified", "is_locked", "two_factor_enabled")
+
+
+@router.get("/users/export")
+async def export_users(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    gzip: bool = Query(False, description="Compress the download"),
+    search: Optional[str] = None,
+    role: Optional[str] = None,
+    is_verified: Optional[bool] = None
+):
+    """
+    Stream every matching user as CSV or NDJSON (no credentials or secrets).
+    Takes the same filters as the list endpoint.
+    """
+    stmt = user_filters(
+        select(
+            User.id,
+            User.email,
+            User.full_name,
+            User.role,
+            User.is_email_verified,
+            User.is_locked,
+            User.two_factor_enabled,
+        ),
+        search,
+        role,
+        is_verified,
+    ).order_by(desc(User.id))
+    return export_response(stmt, USER_EXPORT_COLUMNS, filename="users", fmt=fmt, compress=gzip)
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin)
 ):
     """
     Get a single user by ID.
     Requires admin authentication.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -147,14 +202,14 @@ async def get_user(
         is_verified=user.is_email_verified,
         is_locked=user.is_locked,
         two_factor_enabled=user.two_factor_enabled,
-        created_at=user.created_at.isoformat() if hasattr(user, 'created_at') and user.created_at else ""
+        created_at=format_created_at(user.created_at)
     )
 
 
 @router.post("/users", response_model=UserResponse)
 async def create_user(
     user_data: UserCreateRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin)
 ):
     """
@@ -162,12 +217,13 @@ async def create_user(
     Requires admin authentication.
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    res = await db.execute(select(User).where(User.email == user_data.email))
+    existing_user = res.scalars().first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     new_user = User(
         email=user_data.email,
         full_name=user_data.full_name,
@@ -178,8 +234,8 @@ async def create_user(
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return UserResponse(
         id=new_user.id,
@@ -189,7 +245,7 @@ async def create_user(
         is_verified=new_user.is_email_verified,
         is_locked=new_user.is_locked,
         two_factor_enabled=new_user.two_factor_enabled,
-        created_at=new_user.created_at.isoformat() if hasattr(new_user, 'created_at') and new_user.created_at else ""
+        created_at=format_created_at(new_user.created_at)
     )
 
 
@@ -197,14 +253,14 @@ async def create_user(
 async def update_user(
     user_id: int,
     user_data: UserUpdateRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin)
 ):
     """
     Update a user.
     Requires admin authentication.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -215,10 +271,13 @@ async def update_user(
     # Update fields
     if user_data.email:
         # Check if email is already taken by another user
-        existing = db.query(User).filter(
-            User.email == user_data.email,
-            User.id != user_id
-        ).first()
+        res = await db.execute(
+            select(User).where(
+                User.email == user_data.email,
+                User.id != user_id
+            )
+        )
+        existing = res.scalars().first()
         if existing:
             raise HTTPException(status_code=400, detail="Email already taken")
         user.email = user_data.email
@@ -236,10 +295,11 @@ async def update_user(
         user.is_locked = user_data.is_locked
     
     if user_data.password:
-        user.hashed_password = hash_password(user_data.password)
+        user.hashed_password = await hash_password_async(user_data.password)
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    await user_cache.invalidate(user.id)
     
     return UserResponse(
         id=user.id,
@@ -249,21 +309,21 @@ async def update_user(
         is_verified=user.is_email_verified,
         is_locked=user.is_locked,
         two_factor_enabled=user.two_factor_enabled,
-        created_at=user.created_at.isoformat() if hasattr(user, 'created_at') and user.created_at else ""
+        created_at=format_created_at(user.created_at)
     )
 
 
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_admin)
 ):
     """
     Delete a user.
     Requires admin authentication.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -271,7 +331,10 @@ async def delete_user(
     if user.id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
     
-    db.delete(user)
-    db.commit()
+    # Tokens held in Redis are not covered by the refresh_tokens cascade
+    await revoke_user_refresh_tokens(db, user_id)
+    await db.delete(user)
+    await db.commit()
+    await user_cache.invalidate(user_id)
     
     return {"message": "User deleted successfully", "user_id": user_id}
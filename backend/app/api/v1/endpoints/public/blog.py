@@ -1,65 +1,123 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.db.session import get_db
+from app.core.http_cache import collection_validators, conditional_response, row_validators
+from app.db.pagination import paginate
+from app.db.session import get_session
 from app.models.blog_post import BlogPost
-from app.schemas.blog_post import BlogPostPublic
+from app.models.user import User
+from app.schemas.blog_post import BlogPostPublic, BlogSearchResponse
+from app.services.blog_search import blog_search
 
 
 router = APIRouter()
 
+# Columns of BlogPostPublic: one joined query per page instead of loading posts and authors
+PUBLIC_LIST_COLUMNS = (
+    BlogPost.id,
+    BlogPost.title,
+    BlogPost.slug,
+    BlogPost.excerpt,
+    BlogPost.category,
+    BlogPost.featured_image,
+    User.full_name.label("author_name"),
+    BlogPost.created_at,
+    BlogPost.updated_at,
+)
+
+# The author shown on posts lives in users, which has no updated_at: conditional GETs
+# fold the author data itself into the ETag so a rename is never answered with a 304
+POST_AUTHORS = select(User.id, User.full_name).where(User.id.in_(select(BlogPost.author_id))).order_by(User.id)
+POST_AUTHOR_COLUMNS = (
+    select(User.full_name).where(User.id == BlogPost.author_id).scalar_subquery(),
+    select(User.email).where(User.id == BlogPost.author_id).scalar_subquery(),
+)
+
 
 @router.get("/posts", response_model=list[BlogPostPublic])
 async def list_public_blog_posts(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     category: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page (replaces page)"),
+    db: AsyncSession = Depends(get_session),
 ):
-    """List published blog posts (public endpoint)"""
-    query = db.query(BlogPost).filter(BlogPost.published == True)
+    """
+    List published blog posts (public endpoint).
+    The body stays a plain list; the cursor of the next page is sent as X-Next-Cursor.
+    """
+    validators = await collection_validators(request, db, BlogPost, related=POST_AUTHORS)
+    not_modified = conditional_response(request, response, validators)
+    if not_modified:
+        return not_modified
+
+    # Only the columns BlogPostPublic serialises (never content), author name joined in
+    query = (
+        select(*PUBLIC_LIST_COLUMNS)
+        .outerjoin(User, User.id == BlogPost.author_id)
+        .where(BlogPost.published == True)
+    )
 
     if category:
-        query = query.filter(BlogPost.category == category)
+        query = query.where(BlogPost.category == category)
 
-    posts = (
-        query.order_by(BlogPost.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    result = await paginate(
+        db, query, (BlogPost.created_at, BlogPost.id),
+        limit=page_size, cursor=cursor, offset=(page - 1) * page_size, include_total=False,
     )
+    if result.next_cursor:
+        response.headers["X-Next-Cursor"] = result.next_cursor
 
-    # Transform to public schema
-    public_posts = []
-    for post in posts:
-        public_posts.append(
-            BlogPostPublic(
-                id=post.id,
-                title=post.title,
-                slug=post.slug,
-                excerpt=post.excerpt,
-                category=post.category,
-                featured_image=post.featured_image,
-                author_name=post.author.full_name if post.author else None,
-                created_at=post.created_at,
-                updated_at=post.updated_at,
-            )
-        )
+    return [BlogPostPublic(**row._mapping) for row in result.items]
 
-    return public_posts
+
+@router.get("/search", response_model=BlogSearchResponse)
+async def search_public_blog_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    category: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_session),
+):
+    """Full-text search over published posts, best matches first, with highlighted snippets"""
+    items, total = await blog_search.search(db, q, category=category, limit=limit, offset=offset)
+    return {"items": items, "total": total, "query": q}
 
 
 @router.get("/posts/{slug}")
 async def get_public_blog_post(
     slug: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_session),
 ):
     """Get a published blog post by slug (public endpoint)"""
-    post = db.query(BlogPost).filter(
-        BlogPost.slug == slug,
-        BlogPost.published == True
-    ).first()
+    validators = await row_validators(
+        request, db, BlogPost, BlogPost.slug == slug, BlogPost.published == True, related=POST_AUTHOR_COLUMNS
+    )
+    not_modified = conditional_response(request, response, validators)
+    if not_modified:
+        return not_modified
+
+    res = await db.execute(
+        select(
+            *PUBLIC_LIST_COLUMNS,
+            BlogPost.content,
+            BlogPost.seo_title,
+            BlogPost.seo_description,
+            User.email.label("author_email"),
+        )
+        .outerjoin(User, User.id == BlogPost.author_id)
+        .where(
+            BlogPost.slug == slug,
+            BlogPost.published == True
+        )
+    )
+    post = res.first()
 
     if not post:
         raise HTTPException(
@@ -67,18 +125,4 @@ async def get_public_blog_post(
             detail="Blog post not found"
         )
 
-    return {
-        "id": post.id,
-        "title": post.title,
-        "slug": post.slug,
-        "content": post.content,
-        "excerpt": post.excerpt,
-        "category": post.category,
-        "featured_image": post.featured_image,
-        "author_name": post.author.full_name if post.author else None,
-        "author_email": post.author.email if post.author else None,
-        "seo_title": post.seo_title,
-        "seo_description": post.seo_description,
-        "created_at": post.created_at,
-        "updated_at": post.updated_at,
-    }
+    return post._asdict()
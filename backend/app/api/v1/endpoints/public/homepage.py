@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.db.session import get_db
+from app.core.http_cache import collection_validators, conditional_response
+from app.db.session import get_session
 from app.models.homepage import (
     HomepageStatistic,
     HomepageTestimonial,
@@ -23,47 +25,66 @@ router = APIRouter()
 
 
 @router.get("/statistics", response_model=List[StatisticResponse])
-async def get_active_statistics(db: Session = Depends(get_db)):
+async def get_active_statistics(request: Request, response: Response, db: AsyncSession = Depends(get_session)):
     """Get all active statistics for homepage"""
-    stats = db.query(HomepageStatistic)\
-        .filter(HomepageStatistic.is_active == True)\
-        .order_by(HomepageStatistic.order_index)\
-        .all()
-    return stats
+    not_modified = conditional_response(request, response, await collection_validators(request, db, HomepageStatistic))
+    if not_modified:
+        return not_modified
+    res = await db.execute(
+        select(HomepageStatistic)
+        .where(HomepageStatistic.is_active == True)
+        .order_by(HomepageStatistic.order_index)
+    )
+    return res.scalars().all()
 
 
 @router.get("/testimonials", response_model=List[TestimonialResponse])
-async def get_active_testimonials(db: Session = Depends(get_db)):
+async def get_active_testimonials(request: Request, response: Response, db: AsyncSession = Depends(get_session)):
     """Get all active testimonials for homepage"""
-    testimonials = db.query(HomepageTestimonial)\
-        .filter(HomepageTestimonial.is_active == True)\
-        .order_by(HomepageTestimonial.order_index)\
-        .all()
-    return testimonials
+    not_modified = conditional_response(request, response, await collection_validators(request, db, HomepageTestimonial))
+    if not_modified:
+        return not_modified
+    res = await db.execute(
+        select(HomepageTestimonial)
+        .where(HomepageTestimonial.is_active == True)
+        .order_by(HomepageTestimonial.order_index)
+    )
+    return res.scalars().all()
 
 
 @router.get("/featured-products", response_model=List[FeaturedProductResponse])
-async def get_active_featured_products(db: Session = Depends(get_db)):
+async def get_active_featured_products(request: Request, response: Response, db: AsyncSession = Depends(get_session)):
     """Get all active featured products for homepage"""
-    products = db.query(HomepageFeaturedProduct)\
-        .filter(HomepageFeaturedProduct.is_active == True)\
-        .order_by(HomepageFeaturedProduct.order_index)\
-        .all()
-    return products
+    not_modified = conditional_response(request, response, await collection_validators(request, db, HomepageFeaturedProduct))
+    if not_modified:
+        return not_modified
+    res = await db.execute(
+        select(HomepageFeaturedProduct)
+        .where(HomepageFeaturedProduct.is_active == True)
+        .order_by(HomepageFeaturedProduct.order_index)
+    )
+    return res.scalars().all()
 
 
 @router.get("/hero-slides", response_model=List[HeroSlideResponse])
-async def get_active_hero_slides(db: Session = Depends(get_db)):
+async def get_active_hero_slides(request: Request, response: Response, db: AsyncSession = Depends(get_session)):
     """Get all active hero slides for homepage"""
-    slides = db.query(HomepageHeroSlide)\
-        .filter(HomepageHeroSlide.is_active == True)\
-        .order_by(HomepageHeroSlide.order_index)\
-        .all()
-    return slides
+    not_modified = conditional_response(request, response, await collection_validators(request, db, HomepageHeroSlide))
+    if not_modified:
+        return not_modified
+    res = await db.execute(
+        select(HomepageHeroSlide)
+        .where(HomepageHeroSlide.is_active == True)
+        .order_by(HomepageHeroSlide.order_index)
+    )
+    return res.scalars().all()
 
 
 @router.get("/mission-vision", response_model=List[MissionVisionResponse])
-async def get_mission_vision(db: Session = Depends(get_db)):
+async def get_mission_vision(request: Request, response: Response, db: AsyncSession = Depends(get_session)):
     """Get mission, vision, and identity sections for homepage"""
-    sections = db.query(HomepageMissionVision).all()
-    return sections
+    not_modified = conditional_response(request, response, await collection_validators(request, db, HomepageMissionVision))
+    if not_modified:
+        return not_modified
+    res = await db.execute(select(HomepageMissionVision))
+    return res.scalars().all()
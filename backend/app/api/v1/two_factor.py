@@ -3,8 +3,8 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.deps import get_current_user
-from app.core.security import verify_password
+from app.core.deps import get_current_user, get_current_user_with_secrets
+from app.core.security import verify_password_async
 from app.db.session import get_session
 from app.models.user import User
 from app.schemas.two_factor import (
@@ -18,6 +18,7 @@ from app.services.two_factor import (
     disable_two_factor,
     enable_two_factor,
     get_backup_codes_remaining,
+    has_legacy_backup_codes,
     regenerate_backup_codes,
     start_two_factor_setup,
     update_backup_code_hashes,
@@ -29,10 +30,11 @@ router = APIRouter(prefix="/auth/2fa", tags=["two-factor"])
 
 
 @router.get("/status", response_model=TwoFactorStatusResponse)
-async def get_status(current_user: User = Depends(get_current_user)):
+async def get_status(current_user: User = Depends(get_current_user_with_secrets)):
     return TwoFactorStatusResponse(
         enabled=bool(current_user.two_factor_enabled),
         backup_codes_remaining=get_backup_codes_remaining(current_user),
+        backup_codes_legacy=has_legacy_backup_codes(current_user),
         confirmed_at=current_user.two_factor_confirmed_at,
         last_verified_at=current_user.two_factor_last_verified_at,
     )
@@ -53,7 +55,7 @@ async def setup_two_factor(
 @router.post("/enable", response_model=TwoFactorStatusResponse)
 async def enable_two_factor_endpoint(
     payload: TwoFactorEnableRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_with_secrets),
     db: AsyncSession = Depends(get_session),
 ):
     if not current_user.two_factor_secret:
@@ -74,17 +76,17 @@ async def enable_two_factor_endpoint(
 @router.post("/disable", response_model=TwoFactorStatusResponse)
 async def disable_two_factor_endpoint(
     payload: TwoFactorDisableRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_with_secrets),
     db: AsyncSession = Depends(get_session),
 ):
     if not current_user.two_factor_enabled:
         raise HTTPException(status_code=400, detail="Two-factor authentication is already disabled.")
 
-    if not verify_password(payload.password, current_user.hashed_password):
+    if not await verify_password_async(payload.password, current_user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect password")
 
     if payload.method == "backup_code":
-        consumed, remaining = verify_and_consume_backup_code(current_user, payload.code)
+        consumed, remaining = await verify_and_consume_backup_code(current_user, payload.code)
         if not consumed:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid backup code")
         # Persist removal so the consumed code cannot be reused during disable flow race conditions
@@ -106,7 +108,7 @@ async def disable_two_factor_endpoint(
 @router.post("/backup-codes/regenerate", response_model=TwoFactorRegenerateResponse)
 async def regenerate_codes(
     payload: TwoFactorEnableRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_with_secrets),
     db: AsyncSession = Depends(get_session),
 ):
     if not current_user.two_factor_enabled:
@@ -5,9 +5,10 @@ from app.db.session import get_session
 from app.schemas.user import UserCreate, UserRead, UserUpdate
 from app.services.users import create_user, get_user_by_email
 from app.core.deps import get_current_user
+from app.core.user_cache import user_cache
 from app.models.user import User
 from app.core.password_policy import validate_password, PasswordValidationError
-from app.core.security import hash_password
+from app.core.security import hash_password_async
 from app.services.email_verification import create_verification_token, send_verification_email
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -27,10 +28,10 @@ async def create_user_endpoint(payload: UserCreate, db: AsyncSession = Depends(g
     role = payload.role or "student"
     user = await create_user(db, payload.email, payload.password, payload.full_name, role)
     
-    # Create and send verification email
+    # Create and queue verification email
     try:
         token = await create_verification_token(db, user)
-        await send_verification_email(user, token)
+        await send_verification_email(db, user, token)
     except Exception as e:
         print(f"⚠️ Failed to send verification email: {str(e)}")
         # Don't block registration if email fails
@@ -66,8 +67,9 @@ async def update_me(
             validate_password(payload.password)
         except PasswordValidationError as e:
             raise HTTPException(status_code=422, detail=str(e))
-        current_user.hashed_password = hash_password(payload.password)
+        current_user.hashed_password = await hash_password_async(payload.password)
     
     await db.commit()
     await db.refresh(current_user)
+    await user_cache.invalidate(current_user.id)
     return current_user
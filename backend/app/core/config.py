@@ -14,6 +14,13 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     ALGORITHM: str = "HS256"
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # A rotated refresh token presented again within this window is treated as a parallel
+    # refresh (409, retry with the new token); later reuse revokes all of the user's sessions.
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS: int = 10
+    # Refresh-token/session store: "sql" or "redis" (needs REDIS_URL; SQL stays the fallback)
+    REFRESH_TOKEN_STORE: str = "sql"
+    REFRESH_TOKEN_SQL_AUDIT: bool = True  # with the Redis store, also write rows to refresh_tokens
+    REFRESH_TOKEN_RETENTION_DAYS: int = 30  # purge refresh_tokens rows this long after expiry
 
     # Password policy
     PASSWORD_MIN_LENGTH: int = 8
@@ -22,10 +29,28 @@ class Settings(BaseSettings):
     PASSWORD_REQUIRE_DIGIT: bool = True
     PASSWORD_REQUIRE_SPECIAL: bool = True
 
+    # Password hashing executor (bcrypt runs off the event loop)
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" or "process"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # queued + running jobs before returning 503
+
+    # Login attempt audit rows are buffered and written in batches
+    LOGIN_ATTEMPT_BATCH_SIZE: int = 100  # flush once this many rows are buffered
+    LOGIN_ATTEMPT_FLUSH_MS: int = 250  # ...or after this long, whichever comes first
+    LOGIN_ATTEMPT_MAX_BUFFER: int = 10000  # rows kept while the database is unavailable
+
     # Rate limiting
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_LOGIN_MAX_ATTEMPTS: int = 5
     RATE_LIMIT_LOGIN_WINDOW_SECONDS: int = 300  # 5 minutes
+    RATE_LIMIT_ALGORITHM: str = "sliding_window"  # "sliding_window" or "gcra" (token bucket)
+    # Store: "auto" (Redis if REDIS_URL, else memory), "redis", "memory", or "sqlite"
+    # (one file shared by all workers on the host, for multi-worker deployments without Redis)
+    RATE_LIMIT_BACKEND: str = "auto"
+    RATE_LIMIT_SQLITE_PATH: str | None = None  # default: <tmpdir>/stemed_rate_limit.db
+    # In-memory fallback (no Redis): LRU-bounded, swept in the background
+    RATE_LIMIT_MEMORY_MAX_KEYS: int = 10000
+    RATE_LIMIT_SWEEP_INTERVAL_SECONDS: int = 60
 
     # Cookie sessions (optional mode alongside JWT)
     COOKIE_SESSION_ENABLED: bool = True
@@ -41,6 +66,21 @@ class Settings(BaseSettings):
 
     REDIS_URL: str | None = None
 
+    # Authenticated-user cache (in-process LRU, shared through Redis when REDIS_URL is set)
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_MAX_ENTRIES: int = 1024
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    # List totals (cached per table and filter; invalidated on commit)
+    COUNT_CACHE_ENABLED: bool = True
+    COUNT_CACHE_TTL_SECONDS: int = 30
+    COUNT_CACHE_MAX_ENTRIES: int = 512
+    COUNT_ESTIMATE_MIN_ROWS: int = 100000  # unfiltered totals above this come from table statistics; 0 = always exact
+
+    # HTTP caching of public content (ETag / Last-Modified, 304 on revalidation)
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 60
+    HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS: int = 300  # CDN may serve stale this long while it revalidates
+
     STORAGE_PROVIDER: str | None = None
     AWS_ACCESS_KEY_ID: str | None = None
     AWS_SECRET_ACCESS_KEY: str | None = None
@@ -55,11 +95,39 @@ class Settings(BaseSettings):
     SMTP_FROM: str | None = None
     SMTP_TO: str | None = None
     SMTP_TLS: bool = True
+    SMTP_POOL_SIZE: int = 2  # persistent connections reused across messages
+    SMTP_CONNECT_TIMEOUT_SECONDS: float = 10
+    SMTP_SEND_TIMEOUT_SECONDS: float = 30
+    SMTP_IDLE_CHECK_SECONDS: float = 30  # NOOP-check a pooled connection idle this long before reuse
+
+    # Email outbox: handlers enqueue rows in email_outbox, a background dispatcher sends them
+    EMAIL_OUTBOX_DISPATCHER: bool = True  # false when email_worker.py runs the dispatcher instead
+    EMAIL_OUTBOX_POLL_SECONDS: float = 2.0
+    EMAIL_OUTBOX_BATCH_SIZE: int = 20
+    EMAIL_OUTBOX_MAX_PER_MINUTE: int = 60  # send budget per dispatcher process (0 = unlimited)
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 6  # then the row is dead-lettered (status "dead")
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS: int = 30  # doubled after every failed attempt
+    EMAIL_OUTBOX_RETRY_MAX_SECONDS: int = 3600
+    EMAIL_OUTBOX_SEND_TIMEOUT_SECONDS: int = 60  # lease on a claimed email, renewed while the send is in flight; a stuck row is retried after this
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 30  # sent rows older than this are purged
+
+    # Newsletter campaigns (sent by a background task; one process holds each campaign's lease)
+    NEWSLETTER_CAMPAIGN_SENDER: bool = True  # false when email_worker.py sends campaigns instead
+    NEWSLETTER_BATCH_SIZE: int = 500  # subscribers per keyset page / checkpoint
+    NEWSLETTER_SEND_CONCURRENCY: int = 8  # messages in flight (also capped by SMTP_POOL_SIZE)
+    NEWSLETTER_SEND_RATE_PER_SECOND: float = 50  # 0 = unlimited
+    NEWSLETTER_LEASE_SECONDS: int = 120  # renewed every third of this mid-batch; a stalled sender's campaign is resumed elsewhere after this
+    NEWSLETTER_IMPORT_BATCH_SIZE: int = 1000  # CSV rows per upsert statement in admin imports
 
     # Google Sheets Integration (optional - for saving contact messages & newsletter)
     GOOGLE_SHEETS_CREDENTIALS_FILE: str | None = None
     GOOGLE_SHEETS_CONTACT_SHEET_ID: str | None = None
     GOOGLE_SHEETS_NEWSLETTER_SHEET_ID: str | None = None
+    GOOGLE_SHEETS_FLUSH_SECONDS: float = 5  # queued rows are appended in one call per sheet
+    GOOGLE_SHEETS_MAX_BUFFER: int = 5000  # per sheet, while Google is unreachable
+    GOOGLE_SHEETS_MAX_RETRIES: int = 5  # for 429 / 5xx responses, with exponential backoff
+    GOOGLE_SHEETS_BACKFILL_CHUNK: int = 5000  # rows per keyset page and append call in sheets_backfill.py
+    GOOGLE_SHEETS_BACKFILL_SETTLE_SECONDS: int = 300  # rows newer than this may still be queued by the live sync; left for the next run
 
     # Cloudflare R2 Storage Configuration
     R2_ACCOUNT_ID: str | None = None
@@ -14,8 +14,49 @@ CSRF Protection Notes:
 - See: https://cheatsheetseries.owasp.org/cheatsheets/Cross-Site_Request_Forgery_Prevention_Cheat_Sheet.html
 """
 
+import secrets
+
 from fastapi import Response
+from jose import JWTError
+
 from app.core.config import settings
+from app.core.security import create_access_token, decode_token
+from app.core.token_store import token_store
+
+
+async def create_session_token(user_id: int) -> str:
+    """
+    Create the access token returned by login/refresh (and stored in the session cookie).
+    
+    With the Redis token store (REFRESH_TOKEN_STORE=redis) the token carries a ``sid``
+    claim backed by a server-side session with the same lifetime, so logout and
+    "log out everywhere" revoke it immediately instead of waiting for it to expire.
+    """
+    claims = {"scope": "access"}
+    if token_store.enabled:
+        sid = secrets.token_urlsafe(16)
+        try:
+            await token_store.add_session(sid, user_id, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+            claims["sid"] = sid
+        except Exception as e:
+            print(f"Warning: Redis error: {e}. Issuing access token without a server-side session.")
+    return create_access_token(subject=user_id, additional_claims=claims)
+
+
+async def end_session(token: str | None) -> None:
+    """Revoke the server-side session behind an access token, if it has one."""
+    if not token or not token_store.enabled:
+        return
+    try:
+        payload = decode_token(token)
+    except JWTError:
+        return
+    sid = payload.get("sid")
+    if sid:
+        try:
+            await token_store.end_session(sid, int(payload["sub"]))
+        except Exception as e:
+            print(f"Warning: Redis error: {e}. Session not revoked.")
 
 
 def set_session_cookie(response: Response, token: str, max_age: int | None = None):
@@ -88,8 +129,6 @@ def clear_refresh_cookie(response: Response):
 
 
 # CSRF Token Generation (simple example - enhance for production)
-import secrets
-
 def generate_csrf_token() -> str:
     """Generate a random CSRF token."""
     return secrets.token_urlsafe(32)
@@ -0,0 +1,186 @@
+"""
+Row-count cache for paginated lists
+
+Admin lists show a total that used to cost a full ``COUNT(*)`` on every page request.
+``count_cache.total`` answers from an in-process cache keyed by (table, filter), where
+the filter is the statement's compiled WHERE clause and its parameters, so two requests
+with the same search share one count. Entries expire after COUNT_CACHE_TTL_SECONDS.
+
+Invalidation: session events record which tables a transaction wrote (ORM flushes as
+well as insert/update/delete statements run through a session) and bump those tables'
+generation on commit; entries from an older generation are ignored. Like the user cache,
+this only reaches the current worker; other workers catch up within the TTL.
+
+Unfiltered counts of tables above COUNT_ESTIMATE_MIN_ROWS come from the database's table
+statistics (``information_schema.TABLES.TABLE_ROWS`` on MySQL, ``sqlite_stat1`` after
+ANALYZE on SQLite) instead of a scan, and are flagged as estimates.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from sqlalchemy import Select, event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+_TOUCHED_KEY = "count_cache_tables"
+
+
+@dataclass
+class CountResult:
+    value: int
+    exact: bool
+
+
+def _table_of(stmt: Select) -> str:
+    entity = stmt.column_descriptions[0]["entity"]
+    return entity.__table__.name
+
+
+def _filter_key(stmt: Select) -> Optional[tuple]:
+    """The WHERE clause as (sql, params); None when the statement is unfiltered."""
+    if stmt.whereclause is None:
+        return None
+    compiled = stmt.whereclause.compile()
+    return compiled.string, tuple(sorted((k, repr(v)) for k, v in compiled.params.items()))
+
+
+async def _estimate(db: AsyncSession, table: str) -> Optional[int]:
+    """Row count from table statistics, or None when the database has none."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        return await db.scalar(
+            text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+            ),
+            {"table": table},
+        )
+    if dialect == "sqlite":
+        has_stats = await db.scalar(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+        )
+        if not has_stats:
+            return None
+        stat = await db.scalar(text("SELECT stat FROM sqlite_stat1 WHERE tbl = :table LIMIT 1"), {"table": table})
+        return int(stat.split()[0]) if stat else None
+    return None
+
+
+class CountCache:
+    """TTL cache of list totals, invalidated per table on commit."""
+
+    def __init__(self):
+        self.enabled = settings.COUNT_CACHE_ENABLED
+        self.ttl_seconds = settings.COUNT_CACHE_TTL_SECONDS
+        self.max_entries = settings.COUNT_CACHE_MAX_ENTRIES
+        self.estimate_min_rows = settings.COUNT_ESTIMATE_MIN_ROWS
+        # {(table, filter_key): (expires_at, generation, result)}
+        self._entries: OrderedDict[tuple, tuple[float, int, CountResult]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.estimates = 0
+        self.invalidations = 0
+
+    def invalidate(self, table: str) -> None:
+        self._generations[table] = self._generations.get(table, 0) + 1
+        self.invalidations += 1
+
+    def _get(self, key: tuple, generation: int) -> Optional[CountResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, entry_generation, result = entry
+        if expires_at < time.monotonic() or entry_generation != generation:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _put(self, key: tuple, generation: int, result: CountResult) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, generation, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def total(self, db: AsyncSession, stmt: Select) -> CountResult:
+        """Number of rows ``stmt`` (an entity select) matches, cached."""
+        table = _table_of(stmt)
+        filter_key = _filter_key(stmt)
+        key = (table, filter_key)
+        # Read before counting: a commit landing mid-count makes this result stale at once
+        generation = self._generations.get(table, 0)
+        if self.enabled:
+            cached = self._get(key, generation)
+            if cached is not None:
+                self.hits += 1
+                return cached
+        self.misses += 1
+
+        result = None
+        if filter_key is None and self.estimate_min_rows > 0:
+            estimate = await _estimate(db, table)
+            if estimate is not None and estimate >= self.estimate_min_rows:
+                result = CountResult(value=int(estimate), exact=False)
+                self.estimates += 1
+        if result is None:
+            value = (await db.execute(select(func.count()).select_from(stmt.order_by(None).subquery()))).scalar_one()
+            result = CountResult(value=value, exact=True)
+        if self.enabled:
+            self._put(key, generation, result)
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "estimates": self.estimates,
+            "invalidations": self.invalidations,
+        }
+
+
+# Global count cache instance
+count_cache = CountCache()
+
+
+def _touch(session: Session, tables) -> None:
+    session.info.setdefault(_TOUCHED_KEY, set()).update(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_tables(session: Session, flush_context) -> None:
+    _touch(
+        session,
+        {
+            table.name
+            for obj in (*session.new, *session.dirty, *session.deleted)
+            for table in obj.__mapper__.tables
+        },
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_dml_tables(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _touch(orm_execute_state.session, {table.name})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tables(session: Session) -> None:
+    for table in session.info.pop(_TOUCHED_KEY, ()):
+        count_cache.invalidate(table)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_tables(session: Session) -> None:
+    session.info.pop(_TOUCHED_KEY, None)
@@ -3,6 +3,8 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import decode_token
+from app.core.token_store import token_store
+from app.core.user_cache import user_cache
 from app.db.session import get_session
 from app.models.user import User
 from app.services.users import get_user_by_email
@@ -16,6 +18,16 @@ async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_session)
 ) -> User:
+    """Resolve the authenticated user once per request.
+
+    The token is decoded and the user loaded a single time; the result is cached on
+    ``request.state.user`` so the role guard and the handlers share the same principal
+    (and the same DB session) instead of each resolving it again.
+    """
+    cached: User | None = getattr(request.state, "user", None)
+    if cached is not None:
+        return cached
+
     try:
         # Support cookie session: if no bearer token provided, try cookie
         if not token and request.cookies:
@@ -32,21 +44,46 @@ async def get_current_user(
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+    # Tokens issued with the Redis token store are backed by a revocable session
+    sid = payload.get("sid")
+    if sid and token_store.enabled:
+        try:
+            active = await token_store.session_active(sid, int(sub))
+        except Exception as e:
+            print(f"Warning: Redis error: {e}. Skipping session check.")
+            active = True
+        if not active:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session has ended")
+
     # Accept either user ID (int) or email in sub
     user: User | None = None
     try:
         user_id = int(sub)  # type: ignore[arg-type]
-        user = await db.get(User, user_id)
+        user = await user_cache.get_user(db, user_id)
     except (TypeError, ValueError):
         user = await get_user_by_email(db, str(sub))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    request.state.user = user
     return user
 
 
+async def get_current_user_with_secrets(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+) -> User:
+    """The current user with its password hash and 2FA secrets loaded (cached users lack them)."""
+    return await user_cache.load_secrets(db, user)
+
+
 def require_role(*allowed: str):
     async def checker(user: User = Depends(get_current_user)) -> User:
         if user.role not in allowed:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
         return user
     return checker
+
+
+# Shared admin guard: the /admin router and its nested endpoints depend on this same
+# callable, so FastAPI evaluates it (and the user lookup beneath it) once per request.
+require_admin = require_role("admin")
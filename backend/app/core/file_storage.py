@@ -236,13 +236,13 @@ def delete_file(file_path: str) -> bool:
         return False
 
 
-def get_folder_path(folder_id: Optional[int], db) -> Optional[str]:
+async def get_folder_path(folder_id: Optional[int], db) -> Optional[str]:
     """Get folder path for organizing uploads"""
     if not folder_id:
         return None
     
     from app.models.media import MediaFolder
-    folder = db.query(MediaFolder).filter(MediaFolder.id == folder_id).first()
+    folder = await db.get(MediaFolder, folder_id)
     
     if not folder:
         return None
@@ -252,9 +252,7 @@ def get_folder_path(folder_id: Optional[int], db) -> Optional[str]:
     current_folder = folder
     
     while current_folder.parent_folder_id:
-        current_folder = db.query(MediaFolder).filter(
-            MediaFolder.id == current_folder.parent_folder_id
-        ).first()
+        current_folder = await db.get(MediaFolder, current_folder.parent_folder_id)
         if current_folder:
             path_parts.insert(0, current_folder.name)
         else:
@@ -0,0 +1,126 @@
+"""
+Conditional GET for public content
+
+Public blog and homepage responses carry an ``ETag`` and ``Last-Modified`` derived from a
+watermark of the table behind them: ``max(updated_at)`` plus the row count (so deletes
+change it too), read with one aggregate query. A request whose ``If-None-Match`` (or,
+without one, ``If-Modified-Since``) matches gets an empty 304 before any rows are loaded
+or serialised.
+
+The watermark covers the whole table, drafts and inactive rows included: any edit
+changes every ETag of that collection, which can only cause a needless refetch, never a
+stale 304. The request path and query string are part of the ETag, so two URLs never
+share a tag. Responses that also show data from a table without ``updated_at`` (the
+author's name on a post) fold that data itself into the ETag and send no
+``Last-Modified``, which could not reflect it. ``Cache-Control`` lets browsers and the
+CDN reuse a response for HTTP_CACHE_MAX_AGE_SECONDS and serve it stale while
+revalidating.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+@dataclass
+class Validators:
+    etag: str
+    last_modified: Optional[datetime]
+
+
+def _validators(request: Request, last_modified: Optional[datetime], *parts: Any) -> Validators:
+    key = (request.url.path, sorted(request.query_params.multi_items()))
+    digest = hashlib.sha256(repr((key, last_modified, *parts)).encode()).hexdigest()[:20]
+    if last_modified is not None:
+        # Stored as naive UTC; HTTP dates have whole seconds
+        last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    return Validators(etag=f'"{digest}"', last_modified=last_modified)
+
+
+async def collection_validators(
+    request: Request, db: AsyncSession, model: Any, related: Optional[Select] = None
+) -> Validators:
+    """
+    Validators for a listing of ``model`` (any row added, changed or removed changes them).
+    ``related`` selects the data from other tables the listing shows; its rows are part
+    of the ETag.
+    """
+    last_modified, count = (
+        await db.execute(select(func.max(model.updated_at), func.count()).select_from(model))
+    ).one()
+    if related is None:
+        return _validators(request, last_modified, count)
+    rows = [tuple(row) for row in await db.execute(related)]
+    validators = _validators(request, last_modified, count, rows)
+    validators.last_modified = None
+    return validators
+
+
+async def row_validators(
+    request: Request, db: AsyncSession, model: Any, *criteria, related: tuple = ()
+) -> Optional[Validators]:
+    """
+    Validators for the single row matching ``criteria``; None if there is none.
+    ``related`` are extra columns (e.g. scalar subqueries on another table) the response
+    shows; their values are part of the ETag.
+    """
+    row = (await db.execute(select(model.id, model.updated_at, *related).where(*criteria))).first()
+    if row is None:
+        return None
+    validators = _validators(request, row.updated_at, *row)
+    if related:
+        validators.last_modified = None
+    return validators
+
+
+def _not_modified(request: Request, validators: Validators) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison (RFC 9110): a CDN may have weakened the tag after compressing
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or validators.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and validators.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return validators.last_modified <= since
+    return False
+
+
+def _cache_headers(validators: Validators) -> dict[str, str]:
+    headers = {
+        "ETag": validators.etag,
+        "Cache-Control": (
+            f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}, "
+            f"stale-while-revalidate={settings.HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS}"
+        ),
+    }
+    if validators.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(validators.last_modified, usegmt=True)
+    return headers
+
+
+def conditional_response(request: Request, response: Response, validators: Optional[Validators]) -> Optional[Response]:
+    """
+    A 304 to return as-is when the client's copy is current; otherwise None, with the
+    caching headers set on ``response`` for the full answer.
+    """
+    if validators is None:
+        return None
+    headers = _cache_headers(validators)
+    if _not_modified(request, validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,5 +1,14 @@
+import asyncio
+import math
+import os
+import secrets
+import sqlite3
+import sys
+import tempfile
 import time
-from collections import defaultdict
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Optional
 
 from app.core.config import settings
@@ -11,15 +20,249 @@ except ImportError:
     REDIS_AVAILABLE = False
 
 
+# A shared-store check holds the write lock for well under a millisecond; waiting longer
+# than this means the file is wedged, and the check fails closed instead of queueing.
+SQLITE_BUSY_TIMEOUT_SECONDS = 0.05
+# Retry-After sent while the shared store is failing
+FAIL_CLOSED_RETRY_SECONDS = 1.0
+
+
+# Sliding window log. One atomic step: drop expired members, count, and record this attempt
+# if it is allowed. Members carry a random suffix so attempts within the same millisecond
+# are all counted.
+# KEYS[1]: key. ARGV: now_ms, window_ms, limit, member
+# Returns {limited, remaining, retry_after_ms, reset_after_ms}
+_SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count >= limit then
+  local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+  local retry = tonumber(oldest[2]) + window - now
+  return {1, 0, retry, retry}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], window)
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {0, limit - count - 1, 0, tonumber(oldest[2]) + window - now}
+"""
+
+# GCRA (generic cell rate algorithm, equivalent to a token bucket of size `limit` that
+# refills one token every window/limit). Stores a single "theoretical arrival time".
+# KEYS[1]: key. ARGV: now_ms, window_ms, emission_interval_ms
+# Returns {limited, remaining, retry_after_ms, reset_after_ms}
+_GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local interval = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+  tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - window
+if now < allow_at then
+  return {1, 0, allow_at - now, tat - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {0, math.floor((now - allow_at) / interval), 0, new_tat - now}
+"""
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate-limit check."""
+
+    limited: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0  # seconds until the next attempt is allowed (when limited)
+    reset_after: float = 0.0  # seconds until the full quota is available again
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if self.limited:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class _MemoryEntry:
+    """In-memory state for one key: a ring buffer of recent attempts or a GCRA time."""
+
+    __slots__ = ("expires_at", "attempts", "tat")
+
+    def __init__(self, max_attempts: int = 0):
+        self.expires_at = 0.0  # when the entry no longer limits anything
+        self.attempts: deque[float] | None = deque(maxlen=max_attempts) if max_attempts else None
+        self.tat = 0.0
+
+
+class SQLiteRateLimitStore:
+    """Rate-limit state shared by every worker process on one host.
+
+    Used when RATE_LIMIT_BACKEND=sqlite (no Redis). State lives in a small WAL-mode SQLite
+    file; each check is one short BEGIN IMMEDIATE transaction, so checks from all workers
+    are serialized and the limit stays exact no matter how many workers run. Durability is
+    not needed (synchronous=OFF), which keeps a check well under a millisecond.
+
+    The methods block, so async callers go through ``run``, which executes them on one
+    dedicated thread per process: the event loop never waits on the file lock, and the
+    connection is only ever used by that thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+
+    async def run(self, method, *args):
+        """Run one of the store's methods off the event loop."""
+        # Threads do not survive a fork; start a fresh one in each worker
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rate-limit-sqlite")
+            self._executor_pid = os.getpid()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, method, *args)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per process; never share a connection across a fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS rate_limit_events (
+                    key TEXT NOT NULL,
+                    ts REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_rate_limit_events_key_ts ON rate_limit_events (key, ts);
+                CREATE INDEX IF NOT EXISTS ix_rate_limit_events_expires ON rate_limit_events (expires_at);
+                CREATE TABLE IF NOT EXISTS rate_limit_gcra (
+                    key TEXT PRIMARY KEY,
+                    tat REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_rate_limit_gcra_tat ON rate_limit_gcra (tat);
+                """
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def sliding_window(self, key: str, max_attempts: int, window_seconds: int) -> RateLimitResult:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM rate_limit_events WHERE key = ? AND ts <= ?", (key, now - window_seconds))
+            count, oldest = conn.execute(
+                "SELECT COUNT(*), MIN(ts) FROM rate_limit_events WHERE key = ?", (key,)
+            ).fetchone()
+            if count >= max_attempts:
+                conn.execute("COMMIT")
+                retry_after = oldest + window_seconds - now
+                return RateLimitResult(True, max_attempts, 0, retry_after, retry_after)
+            conn.execute(
+                "INSERT INTO rate_limit_events (key, ts, expires_at) VALUES (?, ?, ?)",
+                (key, now, now + window_seconds),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        oldest = now if oldest is None else oldest
+        return RateLimitResult(False, max_attempts, max_attempts - count - 1, 0.0, oldest + window_seconds - now)
+
+    def gcra(self, key: str, max_attempts: int, window_seconds: int) -> RateLimitResult:
+        conn = self._connection()
+        now = time.time()
+        interval = window_seconds / max_attempts
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limit_gcra WHERE key = ?", (key,)).fetchone()
+            tat = max(row[0] if row else now, now)
+            new_tat = tat + interval
+            allow_at = new_tat - window_seconds
+            if now < allow_at:
+                conn.execute("COMMIT")
+                return RateLimitResult(True, max_attempts, 0, allow_at - now, tat - now)
+            conn.execute(
+                "INSERT INTO rate_limit_gcra (key, tat) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                (key, new_tat),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return RateLimitResult(False, max_attempts, int((now - allow_at) // interval), 0.0, new_tat - now)
+
+    def reset(self, key: str) -> None:
+        conn = self._connection()
+        conn.execute("DELETE FROM rate_limit_events WHERE key = ?", (key,))
+        conn.execute("DELETE FROM rate_limit_gcra WHERE key = ?", (key,))
+
+    def cleanup(self) -> int:
+        conn = self._connection()
+        now = time.time()
+        removed = conn.execute("DELETE FROM rate_limit_events WHERE expires_at <= ?", (now,)).rowcount
+        removed += conn.execute("DELETE FROM rate_limit_gcra WHERE tat <= ?", (now,)).rowcount
+        return removed
+
+    def stats(self) -> dict:
+        conn = self._connection()
+        keys = conn.execute("SELECT COUNT(DISTINCT key) FROM rate_limit_events").fetchone()[0]
+        keys += conn.execute("SELECT COUNT(*) FROM rate_limit_gcra").fetchone()[0]
+        size = 0
+        for suffix in ("", "-wal"):
+            try:
+                size += os.path.getsize(self.path + suffix)
+            except OSError:
+                pass
+        return {"path": self.path, "keys": keys, "file_bytes": size}
+
+
 class RateLimiter:
-    """Rate limiter with Redis backend (if available) or in-memory fallback."""
+    """Rate limiter with Redis backend (if available) or in-memory fallback.
+
+    RATE_LIMIT_ALGORITHM selects "sliding_window" (exact count of attempts in the last
+    window) or "gcra" (smooth token bucket: `max_attempts` burst, refilled evenly over the
+    window). With Redis each check is a single atomic script call.
+
+    RATE_LIMIT_BACKEND selects the store: "auto" (Redis when REDIS_URL is set, otherwise
+    per-process memory), "redis", "memory", or "sqlite" (a file shared by all workers on
+    the host, so `--workers N` does not multiply the limit).
+    """
     
     def __init__(self):
         self.redis_client: Optional[redis.Redis] = None
-        self.memory_store: dict = defaultdict(list)  # {key: [(timestamp, count), ...]}
+        self.algorithm = settings.RATE_LIMIT_ALGORITHM
+        # In-memory fallback: LRU of at most RATE_LIMIT_MEMORY_MAX_KEYS entries. A sliding
+        # window only ever needs the last `max_attempts` timestamps, so each key holds a
+        # fixed-size ring buffer; GCRA needs a single float.
+        self.memory_max_keys = max(1, settings.RATE_LIMIT_MEMORY_MAX_KEYS)
+        self.memory_store: OrderedDict[str, _MemoryEntry] = OrderedDict()
+        self.evictions = 0
+        self.swept = 0
+        
+        backend = settings.RATE_LIMIT_BACKEND
+        self.shared_store: Optional[SQLiteRateLimitStore] = None
+        if backend == "sqlite":
+            path = settings.RATE_LIMIT_SQLITE_PATH or os.path.join(tempfile.gettempdir(), "stemed_rate_limit.db")
+            self.shared_store = SQLiteRateLimitStore(path)
         
         # Try to connect to Redis if URL is provided
-        if REDIS_AVAILABLE and settings.REDIS_URL:
+        if backend in ("auto", "redis") and REDIS_AVAILABLE and settings.REDIS_URL:
             try:
                 self.redis_client = redis.from_url(
                     settings.REDIS_URL,
@@ -32,12 +275,48 @@ class RateLimiter:
                 self.redis_client = None
         
         self.use_redis = self.redis_client is not None
+        self._register_scripts()
         print(
-            "Rate limiter initialized: {}".format(
-                "Redis" if self.use_redis else "In-Memory"
+            "Rate limiter initialized: {} ({})".format(
+                "Redis" if self.use_redis else "Shared SQLite" if self.shared_store else "In-Memory",
+                self.algorithm,
             )
         )
+
+    def _register_scripts(self) -> None:
+        if self.redis_client is None:
+            return
+        self._sliding_window = self.redis_client.register_script(_SLIDING_WINDOW_SCRIPT)
+        self._gcra = self.redis_client.register_script(_GCRA_SCRIPT)
+
+    @staticmethod
+    def _gcra_key(key: str) -> str:
+        # GCRA keeps a string where the sliding window keeps a sorted set
+        return f"{key}:gcra"
     
+    async def check(self, key: str, max_attempts: int, window_seconds: int) -> RateLimitResult:
+        """Count an attempt against ``key`` and report whether it is over the limit."""
+        if not settings.RATE_LIMIT_ENABLED:
+            return RateLimitResult(False, max_attempts, max_attempts)
+        
+        if self.use_redis:
+            return await self._check_redis(key, max_attempts, window_seconds)
+        if self.shared_store is not None:
+            store = self.shared_store
+            try:
+                return await store.run(
+                    store.gcra if self.algorithm == "gcra" else store.sliding_window, key, max_attempts, window_seconds
+                )
+            except sqlite3.Error as e:
+                # Falling back to per-worker memory would silently multiply the limit; refuse instead
+                print(f"Warning: Shared rate-limit store error: {e}. Rejecting attempt for {key}.")
+                return RateLimitResult(
+                    True, max_attempts, 0, FAIL_CLOSED_RETRY_SECONDS, FAIL_CLOSED_RETRY_SECONDS
+                )
+        if self.algorithm == "gcra":
+            return self._check_memory_gcra(key, max_attempts, window_seconds)
+        return self._check_memory(key, max_attempts, window_seconds)
+
     async def is_rate_limited(self, key: str, max_attempts: int, window_seconds: int) -> tuple[bool, int]:
         """
         Check if a key is rate limited.
@@ -45,96 +324,140 @@ class RateLimiter:
         Returns:
             (is_limited, remaining_attempts)
         """
-        if not settings.RATE_LIMIT_ENABLED:
-            return False, max_attempts
-        
-        if self.use_redis:
-            return await self._check_redis(key, max_attempts, window_seconds)
-        else:
-            return await self._check_memory(key, max_attempts, window_seconds)
+        result = await self.check(key, max_attempts, window_seconds)
+        return result.limited, result.remaining
     
-    async def _check_redis(self, key: str, max_attempts: int, window_seconds: int) -> tuple[bool, int]:
-        """Check rate limit using Redis."""
+    async def _check_redis(self, key: str, max_attempts: int, window_seconds: int) -> RateLimitResult:
+        """Check rate limit using Redis (one round trip)."""
         try:
-            current_time = int(time.time())
-            window_start = current_time - window_seconds
-            
-            # Remove old entries
-            await self.redis_client.zremrangebyscore(key, 0, window_start)
-            
-            # Count attempts in current window
-            attempt_count = await self.redis_client.zcard(key)
-            
-            if attempt_count >= max_attempts:
-                remaining = 0
-                return True, remaining
-            
-            # Add current attempt
-            await self.redis_client.zadd(key, {str(current_time): current_time})
-            
-            # Set expiry on key
-            await self.redis_client.expire(key, window_seconds)
-            
-            remaining = max_attempts - attempt_count - 1
-            return False, remaining
+            now_ms = int(time.time() * 1000)
+            window_ms = window_seconds * 1000
+            if self.algorithm == "gcra":
+                interval_ms = max(1, window_ms // max_attempts)
+                values = await self._gcra(keys=[self._gcra_key(key)], args=[now_ms, window_ms, interval_ms])
+            else:
+                member = f"{now_ms}-{secrets.token_hex(4)}"
+                values = await self._sliding_window(keys=[key], args=[now_ms, window_ms, max_attempts, member])
+            limited, remaining, retry_ms, reset_ms = (int(v) for v in values)
+            return RateLimitResult(bool(limited), max_attempts, remaining, retry_ms / 1000, reset_ms / 1000)
         
         except Exception as e:
             print(f"Warning: Redis error: {e}. Allowing request.")
-            return False, max_attempts
+            return RateLimitResult(False, max_attempts, max_attempts)
     
-    async def _check_memory(self, key: str, max_attempts: int, window_seconds: int) -> tuple[bool, int]:
+    def _memory_entry(self, key: str, max_attempts: int) -> _MemoryEntry:
+        entry = self.memory_store.get(key)
+        if entry is None:
+            entry = _MemoryEntry(max_attempts if self.algorithm != "gcra" else 0)
+            self.memory_store[key] = entry
+            while len(self.memory_store) > self.memory_max_keys:
+                self.memory_store.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.memory_store.move_to_end(key)
+            if entry.attempts is not None and entry.attempts.maxlen != max_attempts:
+                entry.attempts = deque(entry.attempts, maxlen=max_attempts)
+        return entry
+
+    def _check_memory(self, key: str, max_attempts: int, window_seconds: int) -> RateLimitResult:
         """Check rate limit using in-memory store."""
         current_time = time.time()
         window_start = current_time - window_seconds
+        entry = self._memory_entry(key, max_attempts)
+        attempts = entry.attempts
         
         # Clean up old attempts
-        self.memory_store[key] = [
-            timestamp for timestamp in self.memory_store[key]
-            if timestamp > window_start
-        ]
-        
-        attempt_count = len(self.memory_store[key])
+        while attempts and attempts[0] <= window_start:
+            attempts.popleft()
+        attempt_count = len(attempts)
         
         if attempt_count >= max_attempts:
-            remaining = 0
-            return True, remaining
+            retry_after = attempts[0] + window_seconds - current_time
+            return RateLimitResult(True, max_attempts, 0, retry_after, retry_after)
         
         # Record this attempt
-        self.memory_store[key].append(current_time)
+        attempts.append(current_time)
+        entry.expires_at = current_time + window_seconds
         
         remaining = max_attempts - attempt_count - 1
-        return False, remaining
+        return RateLimitResult(False, max_attempts, remaining, 0.0, attempts[0] + window_seconds - current_time)
+
+    def _check_memory_gcra(self, key: str, max_attempts: int, window_seconds: int) -> RateLimitResult:
+        """GCRA using in-memory store (same arithmetic as the Redis script)."""
+        now = time.time()
+        interval = window_seconds / max_attempts
+        entry = self._memory_entry(key, max_attempts)
+        tat = max(entry.tat, now)
+        new_tat = tat + interval
+        allow_at = new_tat - window_seconds
+        if now < allow_at:
+            return RateLimitResult(True, max_attempts, 0, allow_at - now, tat - now)
+        entry.tat = entry.expires_at = new_tat
+        return RateLimitResult(False, max_attempts, int((now - allow_at) // interval), 0.0, new_tat - now)
     
     async def reset(self, key: str):
         """Reset rate limit for a key (useful for testing or after successful auth)."""
         if self.use_redis and self.redis_client:
             try:
-                await self.redis_client.delete(key)
+                await self.redis_client.delete(key, self._gcra_key(key))
             except Exception:
                 pass
         else:
-            if key in self.memory_store:
-                del self.memory_store[key]
+            self.memory_store.pop(key, None)
+            if self.shared_store is not None:
+                try:
+                    await self.shared_store.run(self.shared_store.reset, key)
+                except sqlite3.Error as e:
+                    print(f"Warning: Shared rate-limit store error: {e}. Could not reset {key}.")
     
-    async def cleanup_memory(self):
-        """Periodic cleanup of expired entries in memory store (call from background task if needed)."""
+    async def cleanup_memory(self) -> int:
+        """Drop in-memory entries that no longer limit anything. Returns how many were removed."""
+        if self.use_redis:
+            return 0
+        current_time = time.time()
+        expired = [key for key, entry in self.memory_store.items() if entry.expires_at <= current_time]
+        for key in expired:
+            del self.memory_store[key]
+        removed = len(expired)
+        if self.shared_store is not None:
+            removed += await self.shared_store.run(self.shared_store.cleanup)
+        self.swept += removed
+        return removed
+
+    async def run_sweeper(self, interval_seconds: int | None = None) -> None:
+        """Background loop started from the app lifespan."""
+        interval = interval_seconds or settings.RATE_LIMIT_SWEEP_INTERVAL_SECONDS
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.cleanup_memory()
+            except Exception as e:
+                print(f"Warning: Rate limiter sweep failed: {e}")
+
+    async def stats(self) -> dict:
+        data = {
+            "backend": "redis" if self.use_redis else "sqlite" if self.shared_store else "memory",
+            "algorithm": self.algorithm,
+        }
+        if self.shared_store is not None and not self.use_redis:
+            try:
+                data["shared"] = await self.shared_store.run(self.shared_store.stats)
+            except sqlite3.Error as e:
+                data["shared"] = {"error": str(e)}
         if not self.use_redis:
-            current_time = time.time()
-            keys_to_delete = []
-            
-            for key, timestamps in self.memory_store.items():
-                # Remove entries older than max window
-                self.memory_store[key] = [
-                    ts for ts in timestamps
-                    if current_time - ts < settings.RATE_LIMIT_LOGIN_WINDOW_SECONDS
-                ]
-                
-                # Mark empty keys for deletion
-                if not self.memory_store[key]:
-                    keys_to_delete.append(key)
-            
-            for key in keys_to_delete:
-                del self.memory_store[key]
+            approx_bytes = sys.getsizeof(self.memory_store)
+            for key, entry in self.memory_store.items():
+                approx_bytes += sys.getsizeof(key) + sys.getsizeof(entry)
+                if entry.attempts is not None:
+                    approx_bytes += sys.getsizeof(entry.attempts)
+            data.update({
+                "keys": len(self.memory_store),
+                "max_keys": self.memory_max_keys,
+                "evictions": self.evictions,
+                "swept": self.swept,
+                "approx_memory_bytes": approx_bytes,
+            })
+        return data
 
 
 # Global rate limiter instance
@@ -1,6 +1,10 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from typing import Any, Callable, Optional, TypeVar
 
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
@@ -9,6 +13,8 @@ from .config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -18,6 +24,86 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# bcrypt is deliberately slow (~200-300 ms per call). Request handlers use the async
+# wrappers below so the work runs on a dedicated, bounded executor instead of stalling
+# the event loop. When more than PASSWORD_HASH_MAX_PENDING jobs are queued or running,
+# new requests fail fast with 503 instead of piling up behind the queue. A job counts as
+# pending until the executor has finished it, even if the request awaiting it is gone.
+_hash_executor: Executor | None = None
+_hash_lock = threading.Lock()
+_hash_pending = 0
+_hash_completed = 0
+_hash_rejected = 0
+
+
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        workers = max(1, settings.PASSWORD_HASH_WORKERS)
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _hash_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+    return _hash_executor
+
+
+def _hash_job_done(future: Future) -> None:
+    # Runs on the executor's thread (or here, if the job was cancelled before it started)
+    global _hash_pending, _hash_completed
+    with _hash_lock:
+        _hash_pending -= 1
+        if not future.cancelled():
+            _hash_completed += 1
+
+
+async def _run_hashing(func: Callable[..., T], *args: Any) -> T:
+    global _hash_pending, _hash_rejected
+    with _hash_lock:
+        if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            _hash_rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy. Please try again shortly.",
+                headers={"Retry-After": "1"},
+            )
+        _hash_pending += 1
+    try:
+        future = _get_hash_executor().submit(func, *args)
+    except BaseException:
+        with _hash_lock:
+            _hash_pending -= 1
+        raise
+    # Not in a finally: cancelling this coroutine does not stop a job that already started
+    future.add_done_callback(_hash_job_done)
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+def password_hashing_stats() -> dict[str, Any]:
+    return {
+        "executor": settings.PASSWORD_HASH_EXECUTOR,
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+        "pending": _hash_pending,
+        "completed": _hash_completed,
+        "rejected": _hash_rejected,
+    }
+
+
+def shutdown_password_hashing() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
 def create_access_token(
     subject: str | Any,
     expires_minutes: Optional[int] = None,
@@ -0,0 +1,222 @@
+"""
+Redis-backed refresh-token and session store
+
+Enabled with REFRESH_TOKEN_STORE=redis (and REDIS_URL). Otherwise ``token_store.enabled`` is
+False and refresh tokens live only in the SQL ``refresh_tokens`` table, as before.
+
+Keys (``{user_id}`` is a Redis Cluster hash tag, so all keys of a user share a slot):
+- ``rt:{user_id}:{token_hash}``: hash with ``user_id``, ``expires_at``, ``revoked_at``
+  (epoch seconds, empty while active) and ``reason``. Expires with the token via
+  EXPIREAT, so nothing has to be purged. Revoked tokens stay until then so reuse can
+  still be detected.
+- ``rt_user:{user_id}``: set of the user's active token hashes, for "log out everywhere".
+- ``sess:{user_id}:{sid}``: server-side half of an access token carrying a ``sid`` claim
+  (cookie sessions); deleting it revokes that token before it expires.
+- ``sess_user:{user_id}``: set of the user's session ids.
+
+Refresh tokens are opaque, so they start with their owner's id (``<user_id>.<random>``,
+see ``refresh_tokens.generate_refresh_token_value``) to let the token key be built
+without a lookup; tokens without the prefix are only known to SQL.
+
+Rotation and revocation run as Lua scripts so concurrent refreshes of the same token see
+exactly one winner. Scripts only touch keys passed in KEYS. SQL still receives every
+write when REFRESH_TOKEN_SQL_AUDIT is on, but is never read on the hot path.
+"""
+
+import time
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+# Members added while a "log out everywhere" runs are picked up by another round
+REVOKE_USER_MAX_ROUNDS = 3
+
+# KEYS: old token, new token, user token set. ARGV: now, old hash, new hash, new expires_at
+# Returns {"rotated", user_id} | {"revoked", user_id, revoked_at, reason} | {"invalid"}
+_ROTATE_SCRIPT = """
+local rec = redis.call('HMGET', KEYS[1], 'user_id', 'revoked_at', 'reason')
+if not rec[1] then
+  return {'invalid'}
+end
+if rec[2] and rec[2] ~= '' then
+  return {'revoked', rec[1], rec[2], rec[3] or ''}
+end
+redis.call('HSET', KEYS[1], 'revoked_at', ARGV[1], 'reason', 'rotated')
+redis.call('SREM', KEYS[3], ARGV[2])
+redis.call('HSET', KEYS[2], 'user_id', rec[1], 'expires_at', ARGV[4], 'revoked_at', '', 'reason', '')
+redis.call('EXPIREAT', KEYS[2], ARGV[4])
+redis.call('SADD', KEYS[3], ARGV[3])
+redis.call('EXPIREAT', KEYS[3], ARGV[4])
+return {'rotated', rec[1]}
+"""
+
+# KEYS: token, user token set. ARGV: now, hash, reason. Returns 1 if an active token was revoked.
+_REVOKE_SCRIPT = """
+local rec = redis.call('HMGET', KEYS[1], 'user_id', 'revoked_at')
+if not rec[1] or (rec[2] and rec[2] ~= '') then
+  return 0
+end
+redis.call('HSET', KEYS[1], 'revoked_at', ARGV[1], 'reason', ARGV[3])
+redis.call('SREM', KEYS[2], ARGV[2])
+return 1
+"""
+
+# KEYS: user token set, user session set, then n token keys, then session keys.
+# ARGV: now, reason, n, then the n token hashes and the session ids (in KEYS order).
+# Returns the number of tokens revoked.
+_REVOKE_USER_SCRIPT = """
+local n = tonumber(ARGV[3])
+local revoked = 0
+for i = 1, n do
+  local key = KEYS[2 + i]
+  if redis.call('EXISTS', key) == 1 then
+    redis.call('HSET', key, 'revoked_at', ARGV[1], 'reason', ARGV[2])
+    revoked = revoked + 1
+  end
+  redis.call('SREM', KEYS[1], ARGV[3 + i])
+end
+for i = 3 + n, #KEYS do
+  redis.call('DEL', KEYS[i])
+  redis.call('SREM', KEYS[2], ARGV[1 + i])
+end
+return revoked
+"""
+
+
+def _token_key(user_id: int, token_hash: str) -> str:
+    return f"rt:{{{user_id}}}:{token_hash}"
+
+
+def _user_tokens_key(user_id: int) -> str:
+    return f"rt_user:{{{user_id}}}"
+
+
+def _session_key(user_id: int, sid: str) -> str:
+    return f"sess:{{{user_id}}}:{sid}"
+
+
+def _user_sessions_key(user_id: int) -> str:
+    return f"sess_user:{{{user_id}}}"
+
+
+class TokenStore:
+    """Refresh tokens and session ids in Redis with native TTL expiry."""
+
+    def __init__(self):
+        self.redis_client: Optional["redis.Redis"] = None
+        if settings.REFRESH_TOKEN_STORE == "redis":
+            if REDIS_AVAILABLE and settings.REDIS_URL:
+                try:
+                    self.redis_client = redis.from_url(
+                        settings.REDIS_URL,
+                        encoding="utf-8",
+                        decode_responses=True,
+                    )
+                except Exception as e:
+                    print(f"Warning: Redis connection failed: {e}. Using SQL refresh-token store.")
+                    self.redis_client = None
+            else:
+                print("Warning: REFRESH_TOKEN_STORE=redis needs redis and REDIS_URL. Using SQL refresh-token store.")
+        self._register_scripts()
+
+    def _register_scripts(self) -> None:
+        if self.redis_client is None:
+            return
+        self._rotate = self.redis_client.register_script(_ROTATE_SCRIPT)
+        self._revoke = self.redis_client.register_script(_REVOKE_SCRIPT)
+        self._revoke_user = self.redis_client.register_script(_REVOKE_USER_SCRIPT)
+
+    @property
+    def enabled(self) -> bool:
+        return self.redis_client is not None
+
+    @staticmethod
+    def _epoch(value: datetime) -> int:
+        return int(value.timestamp())
+
+    async def add(self, token_hash: str, user_id: int, expires_at: datetime) -> None:
+        expires = self._epoch(expires_at)
+        token_key = _token_key(user_id, token_hash)
+        user_key = _user_tokens_key(user_id)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(token_key, mapping={"user_id": user_id, "expires_at": expires, "revoked_at": "", "reason": ""})
+            pipe.expireat(token_key, expires)
+            pipe.sadd(user_key, token_hash)
+            pipe.expireat(user_key, expires)
+            await pipe.execute()
+
+    async def rotate(
+        self, user_id: int, old_hash: str, new_hash: str, expires_at: datetime
+    ) -> tuple[str, Optional[int], Optional[float], Optional[str]]:
+        """Atomically revoke ``old_hash`` and store ``new_hash`` in its place.
+
+        Returns (status, user_id, revoked_at, reason) where status is "rotated", "revoked"
+        (already rotated or revoked at ``revoked_at`` for ``reason``) or "invalid".
+        """
+        result = await self._rotate(
+            keys=[_token_key(user_id, old_hash), _token_key(user_id, new_hash), _user_tokens_key(user_id)],
+            args=[int(time.time()), old_hash, new_hash, self._epoch(expires_at)],
+        )
+        status = result[0]
+        owner = int(result[1]) if len(result) > 1 else None
+        revoked_at = float(result[2]) if len(result) > 2 else None
+        reason = result[3] if len(result) > 3 else None
+        return status, owner, revoked_at, reason
+
+    async def revoke(self, user_id: int, token_hash: str, reason: str) -> bool:
+        revoked = await self._revoke(
+            keys=[_token_key(user_id, token_hash), _user_tokens_key(user_id)],
+            args=[int(time.time()), token_hash, reason],
+        )
+        return bool(revoked)
+
+    async def revoke_user(self, user_id: int, reason: str) -> int:
+        """Revoke all refresh tokens and sessions of a user."""
+        tokens_key = _user_tokens_key(user_id)
+        sessions_key = _user_sessions_key(user_id)
+        revoked = 0
+        for _ in range(REVOKE_USER_MAX_ROUNDS):
+            hashes = sorted(await self.redis_client.smembers(tokens_key))
+            sids = sorted(await self.redis_client.smembers(sessions_key))
+            if not hashes and not sids:
+                break
+            revoked += int(await self._revoke_user(
+                keys=[
+                    tokens_key,
+                    sessions_key,
+                    *(_token_key(user_id, h) for h in hashes),
+                    *(_session_key(user_id, sid) for sid in sids),
+                ],
+                args=[int(time.time()), reason, len(hashes), *hashes, *sids],
+            ))
+        return revoked
+
+    async def add_session(self, sid: str, user_id: int, ttl_seconds: int) -> None:
+        user_key = _user_sessions_key(user_id)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.set(_session_key(user_id, sid), user_id, ex=ttl_seconds)
+            pipe.sadd(user_key, sid)
+            # The set outlives its newest session; stale members are harmless and dropped with it.
+            pipe.expire(user_key, ttl_seconds)
+            await pipe.execute()
+
+    async def session_active(self, sid: str, user_id: int) -> bool:
+        return bool(await self.redis_client.exists(_session_key(user_id, sid)))
+
+    async def end_session(self, sid: str, user_id: int) -> None:
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(_session_key(user_id, sid))
+            pipe.srem(_user_sessions_key(user_id), sid)
+            await pipe.execute()
+
+
+# Global token store instance
+token_store = TokenStore()
@@ -0,0 +1,240 @@
+"""
+Authenticated-user cache
+
+Keeps a snapshot of recently authenticated ``User`` rows so ``get_current_user`` does not
+need a DB round trip on every request.
+
+Tiers:
+- In-process LRU (always on): bounded by USER_CACHE_MAX_ENTRIES, entries expire after
+  USER_CACHE_TTL_SECONDS.
+- Redis (optional, when REDIS_URL is set): shared across workers. Each user has a version
+  counter (``user_cache:{id}:v``); snapshots are stored under ``user_cache:{id}:{version}``.
+  Invalidation bumps the version, so every worker's LRU entry goes stale on its next lookup.
+
+Without Redis an invalidation only reaches the current worker; other workers pick up the
+change once their entry's TTL runs out.
+
+Any code path that changes a user row must call ``user_cache.invalidate(user_id)`` after
+committing.
+
+Secret columns (password hash, TOTP secret, backup codes, one-time tokens) are never part
+of a snapshot, so they never reach Redis. On a cached user they are unloaded; the paths
+that read them load them with ``load_secrets`` (see ``get_current_user_with_secrets``).
+"""
+
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.models.user import User
+
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+# Version keys outlive snapshots so a bumped version is never "forgotten" while an old
+# snapshot could still be served.
+VERSION_KEY_TTL_SECONDS = 24 * 60 * 60
+
+SECRET_COLUMNS = (
+    "hashed_password",
+    "two_factor_secret",
+    "two_factor_backup_codes",
+    "verification_token",
+    "password_reset_token",
+)
+
+_DATETIME_COLUMNS = {c.key for c in User.__table__.columns if isinstance(c.type, DateTime)}
+
+
+def _snapshot(user: User) -> dict[str, Any]:
+    """Column values of a user without the secret columns, JSON-safe."""
+    data: dict[str, Any] = {}
+    for column in User.__table__.columns:
+        if column.key in SECRET_COLUMNS:
+            continue
+        value = getattr(user, column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        data[column.key] = value
+    return data
+
+
+def _restore(data: dict[str, Any]) -> User:
+    """Build a detached ``User`` from a snapshot, as if freshly loaded from a query."""
+    # Snapshots written before secrets were excluded may still hold them
+    values = {key: value for key, value in data.items() if key not in SECRET_COLUMNS}
+    for key in _DATETIME_COLUMNS:
+        if values.get(key):
+            values[key] = datetime.fromisoformat(values[key])
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+class UserCache:
+    """Bounded LRU of user snapshots with an optional Redis tier."""
+
+    def __init__(self):
+        self.max_entries = settings.USER_CACHE_MAX_ENTRIES
+        self.ttl_seconds = settings.USER_CACHE_TTL_SECONDS
+        self.enabled = settings.USER_CACHE_ENABLED
+        # {user_id: (expires_at, version, snapshot)}
+        self._entries: OrderedDict[int, tuple[float, int, dict[str, Any]]] = OrderedDict()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self.redis_client: Optional["redis.Redis"] = None
+        if self.enabled and REDIS_AVAILABLE and settings.REDIS_URL:
+            try:
+                self.redis_client = redis.from_url(
+                    settings.REDIS_URL,
+                    encoding="utf-8",
+                    decode_responses=True,
+                )
+            except Exception as e:
+                print(f"Warning: Redis connection failed: {e}. Using in-process user cache only.")
+                self.redis_client = None
+
+    @staticmethod
+    def _version_key(user_id: int) -> str:
+        return f"user_cache:{user_id}:v"
+
+    @staticmethod
+    def _snapshot_key(user_id: int, version: int) -> str:
+        return f"user_cache:{user_id}:{version}"
+
+    async def _current_version(self, user_id: int) -> int:
+        if not self.redis_client:
+            return 0
+        raw = await self.redis_client.get(self._version_key(user_id))
+        return int(raw) if raw else 0
+
+    def _store_local(self, user_id: int, version: int, snapshot: dict[str, Any]) -> None:
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, version, snapshot)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _lookup(self, user_id: int) -> tuple[Optional[dict[str, Any]], Optional[int]]:
+        """Cached snapshot (or None) and the version it was looked up under (None if Redis failed)."""
+        try:
+            version = await self._current_version(user_id)
+        except Exception as e:
+            print(f"Warning: Redis error: {e}. Skipping user cache.")
+            return None, None
+
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            expires_at, entry_version, snapshot = entry
+            if expires_at > time.monotonic() and entry_version == version:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return snapshot, version
+            del self._entries[user_id]
+
+        if self.redis_client:
+            try:
+                raw = await self.redis_client.get(self._snapshot_key(user_id, version))
+            except Exception as e:
+                print(f"Warning: Redis error: {e}. Skipping user cache.")
+                raw = None
+            if raw:
+                snapshot = json.loads(raw)
+                self._store_local(user_id, version, snapshot)
+                self.redis_hits += 1
+                return snapshot, version
+        return None, version
+
+    async def store(self, user: User, version: int) -> None:
+        """Cache ``user`` under ``version``, read *before* the row was loaded.
+
+        Re-reading the version after the load could file a row loaded before a concurrent
+        change under the version that change bumped, serving it as current until the TTL.
+        """
+        if not self.enabled:
+            return
+        snapshot = _snapshot(user)
+        if self.redis_client:
+            try:
+                await self.redis_client.set(
+                    self._snapshot_key(user.id, version),
+                    json.dumps(snapshot),
+                    ex=self.ttl_seconds,
+                )
+            except Exception as e:
+                print(f"Warning: Redis error: {e}. Caching user in-process only.")
+        self._store_local(user.id, version, snapshot)
+
+    async def get_user(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        """Return the user attached to ``db``, from cache when possible."""
+        version = None
+        if self.enabled:
+            snapshot, version = await self._lookup(user_id)
+            if snapshot is not None:
+                # load=False attaches the snapshot without emitting a SELECT; changes made
+                # by the handler are still flushed on commit.
+                return await db.merge(_restore(snapshot), load=False)
+            self.misses += 1
+
+        user = await db.get(User, user_id)
+        if user is not None and version is not None:
+            await self.store(user, version)
+        return user
+
+    async def load_secrets(self, db: AsyncSession, user: User) -> User:
+        """Load the secret columns a cached user lacks (one SELECT; none for a user loaded from the DB)."""
+        unloaded = inspect(user).unloaded
+        missing = [key for key in SECRET_COLUMNS if key in unloaded]
+        if missing:
+            await db.refresh(user, missing)
+        return user
+
+    async def invalidate(self, user_id: int) -> None:
+        """Drop a user's cached snapshot here and, with Redis, on every worker."""
+        self.invalidations += 1
+        self._entries.pop(user_id, None)
+        if self.redis_client:
+            try:
+                key = self._version_key(user_id)
+                await self.redis_client.incr(key)
+                await self.redis_client.expire(key, VERSION_KEY_TTL_SECONDS)
+            except Exception as e:
+                print(f"Warning: Redis error: {e}. User cache invalidated locally only.")
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": "redis+lru" if self.redis_client else "lru",
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Global user cache instance
+user_cache = UserCache()
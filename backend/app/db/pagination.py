@@ -0,0 +1,119 @@
+"""
+Keyset (cursor) pagination
+
+List endpoints accept an opaque ``cursor`` next to their page/offset params. A cursor
+encodes the sort key of the last row served, newest first on ``(created_at, id)``, and
+the next page is ``WHERE (created_at, id) < cursor ORDER BY created_at DESC, id DESC
+LIMIT n``: an index range scan whose cost does not depend on how deep the page is.
+Every response carries ``next_cursor`` (None on the last page), so a client can start
+with page 1 and follow cursors from there.
+
+Totals cost a COUNT over the whole filter, so they are computed on page/offset requests
+(existing clients show page counts) and only on request (``include_total=true``) when
+paging by cursor. They come from ``count_cache`` and may be estimates (``total_exact``).
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, String, and_, or_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.core.count_cache import count_cache
+
+
+@dataclass
+class Page:
+    items: list[Any]
+    next_cursor: str | None
+    total: int | None
+    total_exact: bool | None = None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[InstrumentedAttribute]) -> list[Any]:
+    """Decode a cursor into values typed like ``columns``; 400 if it is not one of ours."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("wrong length")
+        return [
+            datetime.fromisoformat(v) if col.type.python_type is datetime else col.type.python_type(v)
+            for col, v in zip(columns, values)
+        ]
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _compare(column: InstrumentedAttribute, value: Any, sqlite: bool):
+    """(column < value, column == value) for the cursor condition."""
+    if sqlite and isinstance(value, datetime) and not value.microsecond:
+        # SQLite keeps datetimes as text, "2024-01-02 03:04:05" from server defaults and
+        # "2024-01-02 03:04:05.000000" from Python, while a bound datetime always renders the
+        # latter. "Before" is before the short form; "equal" is either form.
+        stored = type_coerce(column, String)
+        short = str(value)
+        return stored < short, stored.in_([short, f"{short}.000000"])
+    return column < value, column == value
+
+
+def _before(columns: Sequence[InstrumentedAttribute], values: Sequence[Any], sqlite: bool = False):
+    """Rows sorting after ``values`` in descending order: (a, b) < (x, y), spelled out so MySQL uses the index."""
+    condition = _compare(columns[-1], values[-1], sqlite)[0]
+    for column, value in reversed(list(zip(columns[:-1], values[:-1]))):
+        less, equal = _compare(column, value, sqlite)
+        condition = or_(less, and_(equal, condition))
+    return condition
+
+
+def _selects_entity(stmt: Select) -> bool:
+    descriptions = stmt.column_descriptions
+    return len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    order_by: Sequence[InstrumentedAttribute],
+    *,
+    limit: int,
+    cursor: str | None = None,
+    offset: int = 0,
+    include_total: bool | None = None,
+) -> Page:
+    """
+    One page of ``stmt`` newest first on ``order_by``. ``stmt`` selects an entity (items are
+    instances) or columns (items are rows, which must include the ``order_by`` columns).
+    With a cursor the offset is ignored. ``include_total`` defaults to True for offset pages,
+    False for cursors.
+    """
+    query = stmt.order_by(*(column.desc() for column in order_by))
+    if cursor:
+        sqlite = db.get_bind().dialect.name == "sqlite"
+        query = query.where(_before(order_by, decode_cursor(cursor, order_by), sqlite))
+    elif offset:
+        query = query.offset(offset)
+    # One extra row tells whether there is a next page without counting
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.scalars().all() if _selects_entity(stmt) else result.all()
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column in order_by])
+
+    if include_total is None:
+        include_total = not cursor
+    if not include_total:
+        return Page(items=items, next_cursor=next_cursor, total=None)
+    counted = await count_cache.total(db, stmt)
+    return Page(items=items, next_cursor=next_cursor, total=counted.value, total_exact=counted.exact)
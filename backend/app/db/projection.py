@@ -0,0 +1,76 @@
+"""
+Column projections for admin lists
+
+List endpoints select only the columns their item schema serialises and build items
+straight from the result rows, instead of hydrating ORM objects and copying attributes
+into response models. ``fields=`` narrows that further (a sparse fieldset, e.g.
+``fields=id,title,created_at``): only those columns are read and items carry only those
+keys. ``id`` is always included.
+
+Item schemas come from ``partial_model``: every field optional, and the route uses
+``response_model_exclude_unset=True`` so that fields left out are absent, not null.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Optional, Sequence, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, create_model
+from sqlalchemy import Select, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def partial_model(model: Type[BaseModel], name: str) -> Type[BaseModel]:
+    """A copy of ``model`` with every field optional (default None)."""
+    return create_model(
+        name,
+        **{
+            field_name: (Optional[info.annotation], None)
+            for field_name, info in model.model_fields.items()
+        },
+    )
+
+
+@dataclass
+class Projection:
+    # Response field -> column, or -> {sub-field: column} for a nested object
+    columns: dict[str, Any]
+    always: tuple[str, ...] = field(default=("id",))
+
+    def fields(self, requested: Optional[str]) -> list[str]:
+        """Field names for a ``fields=`` value (all when omitted); 400 on unknown names."""
+        if not requested:
+            return list(self.columns)
+        names = {name.strip() for name in requested.split(",") if name.strip()}
+        unknown = sorted(names - self.columns.keys())
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(self.columns)}",
+            )
+        return [name for name in self.columns if name in names or name in self.always]
+
+    def select(self, names: Sequence[str], order_by: Sequence[InstrumentedAttribute] = ()) -> Select:
+        """SELECT of the columns behind ``names``, plus the sort columns paginate needs."""
+        labelled = []
+        for name in names:
+            spec = self.columns[name]
+            if isinstance(spec, dict):
+                labelled += [column.label(f"{name}__{sub}") for sub, column in spec.items()]
+            else:
+                labelled.append(spec.label(name))
+        selected = {column.key for column in labelled}
+        labelled += [column.label(column.key) for column in order_by if column.key not in selected]
+        return select(*labelled)
+
+    def item(self, row: Row, names: Sequence[str]) -> dict[str, Any]:
+        values = row._mapping
+        item = {}
+        for name in names:
+            spec = self.columns[name]
+            if isinstance(spec, dict):
+                nested = {sub: values[f"{name}__{sub}"] for sub in spec}
+                item[name] = nested if any(v is not None for v in nested.values()) else None
+            else:
+                item[name] = values[name]
+        return item
@@ -1,12 +1,52 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
 from .core.config import settings, get_cors_origins
+from .core.rate_limit import rate_limiter
+from .core.security import shutdown_password_hashing
+from .services.blog_search import blog_search
+from .services.email import close_email_provider
+from .services.email_outbox import email_dispatcher
+from .services.google_sheets import get_sheets_service
+from .services.login_attempt_writer import login_attempt_writer
+from .services.newsletter_campaigns import campaign_sender
+from .services.refresh_tokens import run_refresh_token_purge
 from .api.v1.routes import api_router
 
-app = FastAPI(title=settings.APP_NAME)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: background workers are started here
+    await login_attempt_writer.start()
+    await get_sheets_service().start()
+    await blog_search.ensure_index()
+    if settings.EMAIL_OUTBOX_DISPATCHER:
+        await email_dispatcher.start()
+    if settings.NEWSLETTER_CAMPAIGN_SENDER:
+        await campaign_sender.start()
+    background_tasks = [
+        asyncio.create_task(run_refresh_token_purge(), name="refresh-token-purge"),
+        asyncio.create_task(rate_limiter.run_sweeper(), name="rate-limit-sweeper"),
+    ]
+    yield
+    # Shutdown
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await campaign_sender.stop()
+    await email_dispatcher.stop()
+    await close_email_provider()
+    await login_attempt_writer.stop()
+    await get_sheets_service().stop()
+    shutdown_password_hashing()
+
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,27 @@
+"""Outgoing email queue (transactional outbox)"""
+from sqlalchemy import String, Integer, DateTime, Text, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from app.db.session import Base
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # The dispatcher polls for due rows: WHERE status IN (...) AND next_attempt_at <= now
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)  # verification, password_reset, lockout, contact
+    to_addr: Mapped[str] = mapped_column(String(255), nullable=False)
+    from_addr: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")  # pending, sending, sent, dead
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
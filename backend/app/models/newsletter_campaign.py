@@ -0,0 +1,31 @@
+"""Newsletter campaign model"""
+from sqlalchemy import String, Integer, DateTime, Text, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from app.db.session import Base
+
+
+class NewsletterCampaign(Base):
+    __tablename__ = "newsletter_campaigns"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)  # string.Template, e.g. "Hello ${first_name}"
+    # Segment: subscribers with this interest / role (None = everyone)
+    segment_interest: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    segment_role: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="draft", index=True)  # draft, queued, running, paused, completed
+    # Checkpoint: every subscriber with id <= this has been handled
+    last_subscriber_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_recipients: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    sent_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Lease held by the sender process while running; an expired lease lets another process resume
+    lease_owner: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    created_by_user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
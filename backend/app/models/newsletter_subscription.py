@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Integer, String, DateTime
+from sqlalchemy import Index, Integer, String, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.session import Base
@@ -7,6 +7,10 @@ from app.db.session import Base
 
 class NewsletterSubscription(Base):
     __tablename__ = "newsletter_subscriptions"
+    __table_args__ = (
+        # Admin list keyset: ORDER BY created_at DESC, id DESC
+        Index("ix_newsletter_subscriptions_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     email: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, index=True)
@@ -0,0 +1,22 @@
+"""Inverted index behind the admin global search (one row per term per entity)"""
+from sqlalchemy import Index, Integer, SmallInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+
+
+class SearchIndexEntry(Base):
+    __tablename__ = "search_index"
+    __table_args__ = (
+        # Re-indexing / removing one entity
+        Index("ix_search_index_entity", "entity_type", "entity_id"),
+        # Candidates per score tier, in index order: WHERE weight = ? AND term (= ? | range)
+        # ORDER BY term DESC, entity_id DESC
+        Index("ix_search_index_weight_term", "weight", "term", "entity_id"),
+    )
+
+    # Primary key order makes prefix lookups a range scan on term
+    term: Mapped[str] = mapped_column(String(64), primary_key=True)
+    entity_type: Mapped[str] = mapped_column(String(16), primary_key=True)  # user, contact, newsletter, media, blog
+    entity_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    weight: Mapped[int] = mapped_column(SmallInteger, nullable=False)
@@ -0,0 +1,16 @@
+"""High-water marks for the Google Sheets backfill"""
+from datetime import datetime
+from sqlalchemy import Integer, String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+
+
+class SheetsSyncState(Base):
+    __tablename__ = "sheets_sync_state"
+
+    sheet: Mapped[str] = mapped_column(String(32), primary_key=True)  # "contact" or "newsletter"
+    # Every row with id <= this is known to be in the sheet
+    last_synced_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows_backfilled: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
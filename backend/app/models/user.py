@@ -13,6 +13,8 @@ class User(Base):
     full_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
     role: Mapped[str] = mapped_column(String(32), nullable=False, default="student", index=True)
+    # NULL for accounts created before migration 0020
+    created_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, default=datetime.utcnow, index=True)
     
     # Email verification fields
     is_email_verified: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
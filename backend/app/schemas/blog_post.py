@@ -2,6 +2,8 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
 
+from app.db.projection import partial_model
+
 
 # Base schema with common fields
 class BlogPostBase(BaseModel):
@@ -72,10 +74,28 @@ class BlogPostPublic(BaseModel):
         from_attributes = True
 
 
+# Admin list item: BlogPostResponse, or the subset picked with fields=
+BlogPostListItem = partial_model(BlogPostResponse, "BlogPostListItem")
+
+
 # Schema for paginated blog posts
 class BlogPostsListResponse(BaseModel):
-    posts: list[BlogPostResponse]
-    total: int
+    posts: list[BlogPostListItem]
+    total: Optional[int] = None
+    total_exact: Optional[bool] = None  # False when estimated from table statistics
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+class BlogSearchHit(BlogPostPublic):
+    title_highlight: str  # HTML-escaped title, matches wrapped in <mark>
+    snippet: str  # HTML-escaped excerpt of the body around the matches
+    score: float
+
+
+class BlogSearchResponse(BaseModel):
+    items: list[BlogSearchHit]
+    total: int
+    query: str
@@ -2,6 +2,8 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
+from app.db.projection import partial_model
+
 
 # ===== FOLDER SCHEMAS =====
 class FolderBase(BaseModel):
@@ -71,12 +73,18 @@ class FileResponse(BaseModel):
         from_attributes = True
 
 
+# List item: FileResponse, or the subset picked with fields=
+FileListItem = partial_model(FileResponse, "FileListItem")
+
+
 class FilesListResponse(BaseModel):
-    items: List[FileResponse]
-    total: int
+    items: List[FileListItem]
+    total: Optional[int] = None
+    total_exact: Optional[bool] = None  # False when estimated from table statistics
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class FoldersListResponse(BaseModel):
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+
+
+class CampaignCreate(BaseModel):
+    subject: str = Field(..., min_length=1, max_length=255)
+    body: str = Field(
+        ...,
+        min_length=1,
+        description="Plain-text body. Placeholders: ${first_name}, ${last_name}, ${name}, ${email}, ${organization}",
+    )
+    segment_interest: Optional[str] = Field(None, max_length=64)
+    segment_role: Optional[str] = Field(None, max_length=64)
+
+
+class CampaignProgress(BaseModel):
+    id: int
+    subject: str
+    segment_interest: Optional[str] = None
+    segment_role: Optional[str] = None
+    status: str
+    total_recipients: Optional[int] = None
+    sent_count: int
+    failed_count: int
+    last_subscriber_id: int
+    percent_complete: Optional[float] = None
+    send_rate_per_second: Optional[float] = None
+    eta_seconds: Optional[int] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class CampaignsListResponse(BaseModel):
+    items: List[CampaignProgress]
+    total: int
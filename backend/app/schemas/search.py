@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+
+SearchEntityType = Literal["user", "contact", "newsletter", "media", "blog"]
+
+
+class AdminSearchResult(BaseModel):
+    type: SearchEntityType
+    id: int
+    title: str
+    subtitle: Optional[str] = None
+    score: int
+    created_at: Optional[datetime] = None  # NULL for users created before migration 0020
+
+
+class AdminSearchResponse(BaseModel):
+    items: list[AdminSearchResult]
+    query: str
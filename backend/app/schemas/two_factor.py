@@ -40,6 +40,8 @@ class TwoFactorDisableRequest(BaseModel):
 class TwoFactorStatusResponse(BaseModel):
     enabled: bool
     backup_codes_remaining: int
+    # True when stored codes use the old unindexed format; regenerating them upgrades it.
+    backup_codes_legacy: bool = False
     confirmed_at: datetime | None = None
     last_verified_at: datetime | None = None
 
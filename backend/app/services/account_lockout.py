@@ -1,7 +1,4 @@
 """Account lockout service for handling failed login attempts"""
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
@@ -9,6 +6,10 @@ from sqlalchemy import select, func
 from app.models.user import User
 from app.models.login_attempt import LoginAttempt
 from app.core.config import settings
+from app.core.user_cache import user_cache
+from app.services.email import get_email_provider
+from app.services.email_outbox import add_outbox_email
+from app.services.login_attempt_writer import login_attempt_writer
 
 
 # Constants
@@ -16,39 +17,61 @@ MAX_FAILED_ATTEMPTS = 5
 LOCKOUT_DURATION_MINUTES = 15
 
 
-async def record_login_attempt(
+def queue_login_attempt(
     db: AsyncSession,
     user: User,
     success: bool,
     ip_address: str | None = None,
     user_agent: str | None = None
 ) -> None:
-    """Record a login attempt (successful or failed)"""
-    attempt = LoginAttempt(
+    """
+    Hand a login attempt to the batched writer.
+    Falls back to adding the row to ``db`` (written on the caller's next commit) when the
+    writer is not running, e.g. in scripts.
+    """
+    if login_attempt_writer.running:
+        login_attempt_writer.record(user.id, success, ip_address=ip_address, user_agent=user_agent)
+        return
+    db.add(LoginAttempt(
         user_id=user.id,
         ip_address=ip_address,
         attempt_time=datetime.utcnow(),
         success=success,
         user_agent=user_agent
-    )
-    db.add(attempt)
+    ))
+
+
+async def record_login_attempt(
+    db: AsyncSession,
+    user: User,
+    success: bool,
+    ip_address: str | None = None,
+    user_agent: str | None = None
+) -> None:
+    """Record a login attempt (successful or failed)"""
+    queue_login_attempt(db, user, success, ip_address=ip_address, user_agent=user_agent)
     await db.commit()
 
 
-async def is_account_locked(db: AsyncSession, user: User) -> tuple[bool, datetime | None]:
+def _clear_lock(user: User) -> None:
+    user.is_locked = False
+    user.locked_until = None
+    user.failed_login_attempts = 0
+
+
+def check_lockout(user: User) -> tuple[bool, datetime | None]:
     """
-    Check if account is locked.
+    Check if account is locked without writing anything.
+    An expired lockout is cleared on ``user``; the caller commits it.
     Returns (is_locked, locked_until)
     """
     # Check if manually locked with expiry
     if user.is_locked and user.locked_until:
-        # Check if lockout has expired
         if datetime.utcnow() < user.locked_until:
             return True, user.locked_until
-        else:
-            # Lockout expired, unlock account
-            await unlock_account(db, user)
-            return False, None
+        # Lockout expired, unlock account
+        _clear_lock(user)
+        return False, None
     
     # Check if manually locked without expiry (admin lock)
     if user.is_locked and not user.locked_until:
@@ -57,6 +80,44 @@ async def is_account_locked(db: AsyncSession, user: User) -> tuple[bool, datetim
     return False, None
 
 
+async def is_account_locked(db: AsyncSession, user: User) -> tuple[bool, datetime | None]:
+    """
+    Check if account is locked, committing the unlock when a lockout has expired.
+    Returns (is_locked, locked_until)
+    """
+    was_locked = user.is_locked
+    is_locked, locked_until = check_lockout(user)
+    if was_locked and not is_locked:
+        await db.commit()
+        await db.refresh(user)
+        await user_cache.invalidate(user.id)
+    return is_locked, locked_until
+
+
+def apply_failed_attempt(user: User) -> bool:
+    """
+    Count a failed attempt on ``user`` and lock it if the threshold is reached.
+    Nothing is written; returns True if the account was locked.
+    """
+    user.failed_login_attempts += 1
+    if user.failed_login_attempts >= MAX_FAILED_ATTEMPTS:
+        user.is_locked = True
+        user.locked_until = datetime.utcnow() + timedelta(minutes=LOCKOUT_DURATION_MINUTES)
+        return True
+    return False
+
+
+def apply_successful_login(user: User) -> None:
+    """Clear the failed attempts counter (and an expiring lock) on ``user`` without writing."""
+    if user.failed_login_attempts:
+        user.failed_login_attempts = 0
+    
+    # If account was auto-locked (has expiry), unlock it
+    if user.is_locked and user.locked_until:
+        user.is_locked = False
+        user.locked_until = None
+
+
 async def record_failed_attempt(
     db: AsyncSession,
     user: User,
@@ -67,32 +128,17 @@ async def record_failed_attempt(
     Record a failed login attempt and lock account if threshold reached.
     Returns True if account was locked, False otherwise.
     """
-    # Record the failed attempt
-    await record_login_attempt(db, user, success=False, ip_address=ip_address, user_agent=user_agent)
-    
-    # Increment failed attempts counter
-    user.failed_login_attempts += 1
-    
-    # Check if we've hit the threshold
-    if user.failed_login_attempts >= MAX_FAILED_ATTEMPTS:
-        # Lock the account
-        user.is_locked = True
-        user.locked_until = datetime.utcnow() + timedelta(minutes=LOCKOUT_DURATION_MINUTES)
-        
-        await db.commit()
-        await db.refresh(user)
-        
-        # Send lockout notification email
-        try:
-            await send_lockout_email(user)
-        except Exception as e:
-            print(f"⚠️ Failed to send lockout email: {str(e)}")
-        
-        return True
+    queue_login_attempt(db, user, success=False, ip_address=ip_address, user_agent=user_agent)
+    was_locked = apply_failed_attempt(user)
+    if was_locked:
+        # Lockout notification goes out with the same commit
+        queue_lockout_email(db, user)
     
     await db.commit()
     await db.refresh(user)
-    return False
+    await user_cache.invalidate(user.id)
+    
+    return was_locked
 
 
 async def record_successful_login(
@@ -102,38 +148,30 @@ async def record_successful_login(
     user_agent: str | None = None
 ) -> None:
     """Record a successful login and clear failed attempts counter"""
-    # Record the successful attempt
-    await record_login_attempt(db, user, success=True, ip_address=ip_address, user_agent=user_agent)
-    
-    # Reset failed attempts counter
-    user.failed_login_attempts = 0
-    
-    # If account was auto-locked (has expiry), unlock it
-    if user.is_locked and user.locked_until:
-        user.is_locked = False
-        user.locked_until = None
+    queue_login_attempt(db, user, success=True, ip_address=ip_address, user_agent=user_agent)
+    apply_successful_login(user)
     
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
 
 
 async def unlock_account(db: AsyncSession, user: User) -> None:
     """Unlock a user account (admin action or automatic after expiry)"""
-    user.is_locked = False
-    user.locked_until = None
-    user.failed_login_attempts = 0
+    _clear_lock(user)
     
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
 
 
-async def send_lockout_email(user: User) -> None:
-    """Send email notification when account is locked"""
+def queue_lockout_email(db: AsyncSession, user: User) -> None:
+    """Queue the account-locked notification; it is written by the caller's next commit"""
     # Frontend URL (configurable)
     frontend_url = "http://localhost:3000"
     
     # If SMTP is not configured, just print the notification
-    if not settings.SMTP_HOST or not settings.SMTP_USER:
+    if not get_email_provider():
         print(f"⚠️ Email provider not configured. Lockout notification not sent.")
         print(f"🔒 Account locked: {user.email} - Locked until {user.locked_until}")
         return
@@ -167,27 +205,14 @@ Best regards,
 STEM-ED-ARCHITECTS Security Team
 """
     
-    # Create message
-    message = MIMEMultipart()
-    message["From"] = settings.SMTP_FROM or settings.SMTP_USER
-    message["To"] = user.email
-    message["Subject"] = subject
-    message.attach(MIMEText(body, "plain"))
-    
-    try:
-        # Send email via SMTP
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            if settings.SMTP_TLS:
-                server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(message)
-        
-        print(f"🔒 Lockout notification sent to {user.email}")
-    except Exception as e:
-        print(f"❌ Failed to send lockout email: {str(e)}")
-        # Still print notification for debugging
-        print(f"🔒 Account locked: {user.email} - Locked until {locked_until_str}")
-        raise
+    add_outbox_email(
+        db,
+        kind="lockout",
+        to=user.email,
+        subject=subject,
+        body=body,
+        from_addr=settings.SMTP_FROM or settings.SMTP_USER,
+    )
 
 
 async def get_recent_failed_attempts(db: AsyncSession, user: User, minutes: int = 60) -> int:
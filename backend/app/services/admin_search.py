@@ -0,0 +1,339 @@
+"""
+Admin global search
+
+One search box over users, contact messages, newsletter subscribers, media files and
+blog posts, backed by ``search_index``: an inverted index with one row per (term, entity)
+and a weight for the field the term came from (an email outranks an organization name).
+
+Maintenance is incremental. Mapper events rewrite an entity's terms in the same flush
+that inserts, updates (only when an indexed field changed) or deletes it; the newsletter
+upsert paths, which bypass the ORM unit of work, call ``reindex`` themselves. Existing
+rows are indexed once with ``python search_reindex.py``.
+
+A query is split into words; every word must prefix-match a term of the entity
+(type-ahead: "jo sm" finds John Smith). Each word is a range scan on the primary key.
+The word with the fewest matches (counted up to SELECTIVITY_PROBE_LIMIT) drives. Its
+candidates are read best score first without sorting anything: one tier per (exact or
+prefix, weight), highest score first, each a range of ``ix_search_index_weight_term``
+read backwards (newest first per term) and stopped as soon as there are enough:
+``limit`` for a one-word query, CANDIDATE_LIMIT otherwise. The other words are only
+looked up for those entities. Candidates are scored in Python, and only the top results
+are loaded from their tables.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import and_, delete, event, func, insert, inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+from app.models.blog_post import BlogPost
+from app.models.contact_message import ContactMessage
+from app.models.media import MediaFile
+from app.models.newsletter_subscription import NewsletterSubscription
+from app.models.search_index import SearchIndexEntry
+from app.models.user import User
+
+
+TERM_MAX_LENGTH = 64
+MIN_PREFIX_LENGTH = 2
+MAX_QUERY_WORDS = 5
+CANDIDATE_LIMIT = 2000
+# Matches counted per word to find the most selective one (an index-only count)
+SELECTIVITY_PROBE_LIMIT = 20000
+EXACT_MATCH_BONUS = 2
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+@dataclass
+class SearchableEntity:
+    model: Any
+    # (attribute, weight): higher weights rank first
+    fields: tuple[tuple[str, int], ...]
+    # Columns loaded for display (never the large text columns)
+    display_columns: tuple[str, ...]
+    # Row (the model instance) -> title, subtitle
+    display: Callable[[Any], tuple[str, Optional[str]]]
+
+
+def _join(*parts: Optional[str]) -> Optional[str]:
+    return " · ".join(p for p in parts if p) or None
+
+
+ENTITIES: dict[str, SearchableEntity] = {
+    "user": SearchableEntity(
+        User,
+        (("email", 5), ("full_name", 4)),
+        ("email", "full_name", "role", "created_at"),
+        lambda u: (u.full_name or u.email, _join(u.email, u.role)),
+    ),
+    "contact": SearchableEntity(
+        ContactMessage,
+        (("email", 5), ("name", 4), ("organization", 2), ("service", 1)),
+        ("name", "email", "organization", "service", "created_at"),
+        lambda m: (m.name, _join(m.email, m.organization, m.service)),
+    ),
+    "newsletter": SearchableEntity(
+        NewsletterSubscription,
+        (("email", 5), ("first_name", 4), ("last_name", 4), ("organization", 2)),
+        ("email", "first_name", "last_name", "organization", "created_at"),
+        lambda s: (s.email, _join(" ".join(p for p in (s.first_name, s.last_name) if p), s.organization)),
+    ),
+    "media": SearchableEntity(
+        MediaFile,
+        (("title", 4), ("original_filename", 4), ("alt_text", 1)),
+        ("title", "original_filename", "file_type", "created_at"),
+        lambda f: (f.title or f.original_filename, _join(f.original_filename, f.file_type)),
+    ),
+    "blog": SearchableEntity(
+        BlogPost,
+        (("title", 5), ("slug", 2), ("category", 1)),
+        ("title", "category", "published", "created_at"),
+        lambda p: (p.title, _join(p.category, "published" if p.published else "draft")),
+    ),
+}
+_TYPE_OF_MODEL = {spec.model: name for name, spec in ENTITIES.items()}
+_WEIGHTS = sorted({weight for spec in ENTITIES.values() for _, weight in spec.fields}, reverse=True)
+# (score, exact, weight), best first; an exact match outranks a prefix match of equal score
+_TIERS = sorted(
+    [(weight + EXACT_MATCH_BONUS, True, weight) for weight in _WEIGHTS] + [(weight, False, weight) for weight in _WEIGHTS],
+    key=lambda tier: (-tier[0], not tier[1]),
+)
+
+
+def index_terms(values: Iterable[tuple[Optional[str], int]]) -> dict[str, int]:
+    """{term: weight} for field values. Emails are also indexed whole, so "jo.doe@ex" prefix-matches."""
+    terms: dict[str, int] = {}
+    for value, weight in values:
+        if not value:
+            continue
+        value = value.lower()
+        words = _WORD_RE.findall(value)
+        if "@" in value:
+            words.append(value.strip())
+        for word in words:
+            word = word[:TERM_MAX_LENGTH]
+            if len(word) >= MIN_PREFIX_LENGTH and weight > terms.get(word, 0):
+                terms[word] = weight
+    return terms
+
+
+def query_words(q: str) -> list[str]:
+    q = q.strip().lower()
+    if "@" in q:
+        # An email fragment: match the whole-email term
+        return [q[:TERM_MAX_LENGTH]]
+    return [w[:TERM_MAX_LENGTH] for w in _WORD_RE.findall(q) if len(w) >= MIN_PREFIX_LENGTH][:MAX_QUERY_WORDS]
+
+
+def _entity_rows(entity_type: str, obj: Any) -> list[dict[str, Any]]:
+    spec = ENTITIES[entity_type]
+    terms = index_terms((getattr(obj, attr), weight) for attr, weight in spec.fields)
+    return [
+        {"term": term, "entity_type": entity_type, "entity_id": obj.id, "weight": weight}
+        for term, weight in terms.items()
+    ]
+
+
+def _delete_entity(entity_type: str, entity_ids: list[int]):
+    return delete(SearchIndexEntry).where(
+        SearchIndexEntry.entity_type == entity_type, SearchIndexEntry.entity_id.in_(entity_ids)
+    )
+
+
+def _indexed_columns(entity_type: str) -> list[Any]:
+    spec = ENTITIES[entity_type]
+    return [spec.model.id, *(getattr(spec.model, attr) for attr, _ in spec.fields)]
+
+
+async def reindex(db: AsyncSession, model: Any, *criteria) -> None:
+    """Rewrite the terms of rows written without the unit of work (upserts). The caller commits."""
+    entity_type = _TYPE_OF_MODEL[model]
+    rows = (await db.execute(select(*_indexed_columns(entity_type)).where(*criteria))).all()
+    if not rows:
+        return
+    await db.execute(_delete_entity(entity_type, [row.id for row in rows]))
+    entries = [entry for row in rows for entry in _entity_rows(entity_type, row)]
+    if entries:
+        await db.execute(insert(SearchIndexEntry), entries)
+
+
+async def rebuild(db: AsyncSession, entity_type: str, chunk_size: int = 1000) -> int:
+    """Index every row of one entity type from scratch, committing per chunk. Returns rows indexed."""
+    model = ENTITIES[entity_type].model
+    await db.execute(delete(SearchIndexEntry).where(SearchIndexEntry.entity_type == entity_type))
+    await db.commit()
+    last_id, indexed = 0, 0
+    while True:
+        rows = (await db.execute(
+            select(*_indexed_columns(entity_type)).where(model.id > last_id).order_by(model.id).limit(chunk_size)
+        )).all()
+        if not rows:
+            return indexed
+        entries = [entry for row in rows for entry in _entity_rows(entity_type, row)]
+        if entries:
+            await db.execute(insert(SearchIndexEntry), entries)
+        await db.commit()
+        last_id = rows[-1].id
+        indexed += len(rows)
+
+
+def _prefix_condition(db: AsyncSession, word: str):
+    if db.get_bind().dialect.name == "sqlite":
+        # BINARY collation: a plain range is an index range scan (LIKE would not be)
+        upper = word[:-1] + chr(ord(word[-1]) + 1)
+        return (SearchIndexEntry.term >= word) & (SearchIndexEntry.term < upper)
+    return SearchIndexEntry.term.startswith(word, autoescape=True)
+
+
+def _matches(db: AsyncSession, word: str, types: Optional[list[str]]):
+    stmt = select(
+        SearchIndexEntry.term, SearchIndexEntry.entity_type, SearchIndexEntry.entity_id, SearchIndexEntry.weight
+    ).where(_prefix_condition(db, word))
+    if types:
+        stmt = stmt.where(SearchIndexEntry.entity_type.in_(types))
+    return stmt
+
+
+async def _match_count(db: AsyncSession, stmt) -> int:
+    """Rows matching ``stmt``, counted no further than SELECTIVITY_PROBE_LIMIT."""
+    capped = stmt.with_only_columns(SearchIndexEntry.term).limit(SELECTIVITY_PROBE_LIMIT).subquery()
+    return await db.scalar(select(func.count()).select_from(capped))
+
+
+async def _candidates(
+    db: AsyncSession, word: str, types: Optional[list[str]], target: int
+) -> dict[tuple[str, int], int]:
+    """The ``target`` best matches of ``word`` as {(type, id): score}, tier by tier, never sorting a range."""
+    best: dict[tuple[str, int], int] = {}
+    for score, exact, weight in _TIERS:
+        stmt = select(SearchIndexEntry.entity_type, SearchIndexEntry.entity_id).where(SearchIndexEntry.weight == weight)
+        if exact:
+            stmt = stmt.where(SearchIndexEntry.term == word).order_by(SearchIndexEntry.entity_id.desc())
+        else:
+            stmt = stmt.where(_prefix_condition(db, word), SearchIndexEntry.term > word).order_by(
+                SearchIndexEntry.term.desc(), SearchIndexEntry.entity_id.desc()
+            )
+        if types:
+            stmt = stmt.where(SearchIndexEntry.entity_type.in_(types))
+        offset = 0
+        while len(best) < target:
+            # An entity can match under several terms (an email and its parts): page until enough distinct
+            rows = (await db.execute(stmt.limit(target).offset(offset))).all()
+            for entity_type, entity_id in rows:
+                best.setdefault((entity_type, entity_id), score)
+            if len(rows) < target:
+                break
+            offset += target
+        if len(best) >= target:
+            break
+    return best
+
+
+async def search(
+    db: AsyncSession,
+    q: str,
+    *,
+    types: Optional[list[str]] = None,
+    limit: int = 20,
+) -> list[dict[str, Any]]:
+    """Typed results across entities, best first."""
+    words = query_words(q)
+    if not words:
+        return []
+
+    matches = {word: _matches(db, word, types) for word in words}
+    if len(words) > 1:
+        counts = {word: await _match_count(db, stmt) for word, stmt in matches.items()}
+        words = sorted(words, key=counts.__getitem__)
+
+    target = min(limit, CANDIDATE_LIMIT) if len(words) == 1 else CANDIDATE_LIMIT
+    scores = await _candidates(db, words[0], types, target)
+    for word in words[1:]:
+        if not scores:
+            return []
+        ids_by_type: dict[str, list[int]] = {}
+        for entity_type, entity_id in scores:
+            ids_by_type.setdefault(entity_type, []).append(entity_id)
+        stmt = matches[word].where(or_(*(
+            and_(SearchIndexEntry.entity_type == entity_type, SearchIndexEntry.entity_id.in_(ids))
+            for entity_type, ids in ids_by_type.items()
+        )))
+        best: dict[tuple[str, int], int] = {}
+        for term, entity_type, entity_id, weight in await db.execute(stmt):
+            score = weight + (EXACT_MATCH_BONUS if term == word else 0)
+            key = (entity_type, entity_id)
+            if score > best.get(key, 0):
+                best[key] = score
+        # Every word has to match
+        scores = {key: scores[key] + score for key, score in best.items() if key in scores}
+    if not scores:
+        return []
+
+    # Best score first; newest (highest id) first among equals
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0][1]))[:limit]
+    by_type: dict[str, list[int]] = {}
+    for (entity_type, entity_id), _ in ranked:
+        by_type.setdefault(entity_type, []).append(entity_id)
+
+    loaded: dict[tuple[str, int], Any] = {}
+    for entity_type, ids in by_type.items():
+        spec = ENTITIES[entity_type]
+        model = spec.model
+        stmt = (
+            select(model)
+            .options(load_only(*(getattr(model, c) for c in spec.display_columns)))
+            .where(model.id.in_(ids))
+            # The session may already hold a stale copy (e.g. the admin's own user)
+            .execution_options(populate_existing=True)
+        )
+        for obj in (await db.execute(stmt)).scalars():
+            loaded[(entity_type, obj.id)] = obj
+
+    results = []
+    for key, score in ranked:
+        obj = loaded.get(key)
+        if obj is None:
+            # Deleted without the ORM (e.g. ON DELETE CASCADE); dropped until the next reindex
+            continue
+        title, subtitle = ENTITIES[key[0]].display(obj)
+        created_at = getattr(obj, "created_at", None)
+        results.append({
+            "type": key[0],
+            "id": key[1],
+            "title": title,
+            "subtitle": subtitle,
+            "score": score,
+            "created_at": created_at,
+        })
+    return results
+
+
+def _listen(entity_type: str, spec: SearchableEntity) -> None:
+    fields = [attr for attr, _ in spec.fields]
+
+    def index_row(mapper, connection, target) -> None:
+        connection.execute(_delete_entity(entity_type, [target.id]))
+        rows = _entity_rows(entity_type, target)
+        if rows:
+            connection.execute(insert(SearchIndexEntry), rows)
+
+    def index_changed_row(mapper, connection, target) -> None:
+        state = inspect(target)
+        # Logins, lockouts etc. update users constantly; only indexed fields matter
+        if any(state.attrs[attr].history.has_changes() for attr in fields):
+            index_row(mapper, connection, target)
+
+    def unindex_row(mapper, connection, target) -> None:
+        connection.execute(_delete_entity(entity_type, [target.id]))
+
+    event.listen(spec.model, "after_insert", index_row)
+    event.listen(spec.model, "after_update", index_changed_row)
+    event.listen(spec.model, "after_delete", unindex_row)
+
+
+for _entity_type, _spec in ENTITIES.items():
+    _listen(_entity_type, _spec)
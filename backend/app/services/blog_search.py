@@ -0,0 +1,313 @@
+"""
+Blog full-text search
+
+- SQLite: an FTS5 table ``blog_posts_fts`` (rowid = post id) holding the plain text of
+  title, excerpt and content, porter-stemmed, plus the ``updated_at`` it was indexed at.
+  Mapper events on ``BlogPost`` rewrite a post's row in the same flush that inserts,
+  updates or deletes it, in any process that writes through the ORM (they look for the
+  table on the connection when ``ensure_index`` has not run). Each worker builds the
+  table at startup if it is missing, and otherwise re-indexes posts whose ``updated_at``
+  differs from the indexed one (changed by raw SQL or restored from a backup). Ranking is FTS5 ``bm25()`` with title
+  matches weighted above excerpt and body; snippets come from ``snippet()``.
+- MySQL: FULLTEXT indexes on ``blog_posts`` (migration 0018), maintained by InnoDB.
+  Ranking is ``MATCH ... AGAINST`` in boolean mode with the title index weighted; snippets
+  are cut from the stripped content in Python.
+
+User input never reaches the MATCH syntax directly: it is split into words, each word is
+required and the last one also matches as a prefix (search-as-you-type). Snippets and
+highlighted titles are HTML-escaped with matches wrapped in ``<mark>``. Without either
+index (FTS5 missing from the SQLite build, MySQL migration not applied) ``match_condition``
+falls back to the old ILIKE scan.
+"""
+
+import html
+import re
+from typing import Any, Optional
+
+from sqlalchemy import column, event, func, literal_column, or_, select, table, text
+from sqlalchemy.dialects.mysql import match as mysql_match
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import SessionLocal
+from app.models.blog_post import BlogPost
+from app.models.user import User
+
+
+FTS_TABLE = "blog_posts_fts"
+MYSQL_FULLTEXT_INDEX = "ft_blog_posts_search"
+MYSQL_TITLE_INDEX = "ft_blog_posts_title"
+MAX_TERMS = 10
+_fts = table(FTS_TABLE, column("rowid"))
+_FTS_INSERT = text(
+    f"INSERT INTO {FTS_TABLE} (rowid, title, excerpt, body, updated_at) "
+    "VALUES (:id, :title, :excerpt, :body, (SELECT updated_at FROM blog_posts WHERE id = :id))"
+)
+SNIPPET_CHARS = 200
+# Placeholders for match markers: escaped text cannot contain them
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def plain_text(value: Optional[str]) -> str:
+    """Rich-text HTML to searchable plain text."""
+    if not value:
+        return ""
+    return _SPACE_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", value))).strip()
+
+
+def query_terms(q: str) -> list[str]:
+    return _WORD_RE.findall(q.lower())[:MAX_TERMS]
+
+
+def _marked_html(value: str) -> str:
+    return html.escape(value).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def _mark_terms(value: str, terms: list[str]) -> str:
+    if not terms:
+        return value
+    pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in terms) + r")\w*", re.IGNORECASE)
+    return pattern.sub(lambda m: _MARK_OPEN + m.group(0) + _MARK_CLOSE, value)
+
+
+def _python_snippet(content: str, terms: list[str]) -> str:
+    """A window of the stripped content around the first matching term (MySQL)."""
+    text_ = plain_text(content)
+    start = 0
+    if terms:
+        found = re.search(r"\b(" + "|".join(re.escape(t) for t in terms) + r")", text_, re.IGNORECASE)
+        if found:
+            start = max(0, found.start() - SNIPPET_CHARS // 4)
+    window = text_[start:start + SNIPPET_CHARS]
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if start + SNIPPET_CHARS < len(text_) else ""
+    return prefix + _mark_terms(window, terms) + suffix
+
+
+class BlogSearch:
+    """Dialect-specific full-text index over blog posts."""
+
+    def __init__(self):
+        # Set by ensure_index(); None until checked
+        self.backend: Optional[str] = None
+
+    async def ensure_index(self) -> None:
+        """Detect (and on SQLite, build) the search index. Called once per worker at startup."""
+        async with SessionLocal() as db:
+            dialect = db.get_bind().dialect.name
+            try:
+                if dialect == "sqlite":
+                    columns = {row[1] for row in await db.execute(text(f"PRAGMA table_info({FTS_TABLE})"))}
+                    if columns and "updated_at" not in columns:
+                        # Built before the index recorded updated_at: start over
+                        await db.execute(text(f"DROP TABLE {FTS_TABLE}"))
+                        columns = set()
+                    if not columns:
+                        await db.execute(text(
+                            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                            "title, excerpt, body, updated_at UNINDEXED, "
+                            "tokenize = 'porter unicode61 remove_diacritics 2', prefix = '2 3')"
+                        ))
+                        indexed = await self.rebuild(db)
+                        print(f"Blog search index built ({indexed} posts)")
+                    else:
+                        refreshed = await self.reconcile(db)
+                        if refreshed:
+                            print(f"Blog search index: re-indexed {refreshed} posts changed outside the app")
+                    self.backend = "fts5"
+                elif dialect == "mysql":
+                    found = await db.scalar(text(
+                        "SELECT COUNT(DISTINCT INDEX_NAME) FROM information_schema.STATISTICS "
+                        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'blog_posts' "
+                        "AND INDEX_NAME IN (:search, :title)"
+                    ), {"search": MYSQL_FULLTEXT_INDEX, "title": MYSQL_TITLE_INDEX})
+                    self.backend = "mysql" if found == 2 else "like"
+                else:
+                    self.backend = "like"
+                await db.commit()
+            except Exception as e:
+                self.backend = "like"
+                print(f"Warning: Blog search index unavailable, falling back to LIKE: {e}")
+        if self.backend == "like":
+            print("Warning: Blog search is using LIKE scans (no full-text index)")
+
+    async def rebuild(self, db: AsyncSession, chunk_size: int = 500) -> int:
+        """Re-index every post (SQLite). The caller commits."""
+        await db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        ids = (await db.execute(select(BlogPost.id).order_by(BlogPost.id))).scalars().all()
+        return await self._index_ids(db, ids, chunk_size)
+
+    async def reconcile(self, db: AsyncSession, chunk_size: int = 500) -> int:
+        """Re-index posts missing from the index or changed since (SQLite); drop deleted ones.
+
+        Returns how many posts were re-indexed. The caller commits.
+        """
+        await db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid NOT IN (SELECT id FROM blog_posts)"))
+        stale = (await db.execute(text(
+            f"SELECT p.id FROM blog_posts p LEFT JOIN {FTS_TABLE} f ON f.rowid = p.id "
+            "WHERE f.rowid IS NULL OR f.updated_at IS NOT p.updated_at ORDER BY p.id"
+        ))).scalars().all()
+        return await self._index_ids(db, stale, chunk_size)
+
+    async def _index_ids(self, db: AsyncSession, ids, chunk_size: int) -> int:
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            rows = (await db.execute(
+                select(BlogPost.id, BlogPost.title, BlogPost.excerpt, BlogPost.content).where(BlogPost.id.in_(chunk))
+            )).all()
+            await db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({','.join(map(str, chunk))})"))
+            if rows:
+                await db.execute(_FTS_INSERT, [_fts_row(r.id, r.title, r.excerpt, r.content) for r in rows])
+        return len(ids)
+
+    def match_condition(self, q: str):
+        """WHERE clause selecting posts that match ``q`` (used by the admin list filter too)."""
+        terms = query_terms(q)
+        if self.backend == "fts5" and terms:
+            return BlogPost.id.in_(
+                select(_fts.c.rowid)
+                .where(text(f"{FTS_TABLE} MATCH :fts_query").bindparams(fts_query=_fts_query(terms)))
+            )
+        if self.backend == "mysql" and terms:
+            return _mysql_match((BlogPost.title, BlogPost.excerpt, BlogPost.content), terms) > 0
+        like = f"%{q}%"
+        return or_(BlogPost.title.ilike(like), BlogPost.content.ilike(like), BlogPost.excerpt.ilike(like))
+
+    async def search(
+        self,
+        db: AsyncSession,
+        q: str,
+        *,
+        category: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+    ) -> tuple[list[dict[str, Any]], int]:
+        """Published posts matching ``q``, best first, with snippets. Returns (hits, total)."""
+        terms = query_terms(q)
+        if not terms:
+            return [], 0
+        base = [BlogPost.published == True]  # noqa: E712
+        if category:
+            base.append(BlogPost.category == category)
+
+        columns = (
+            BlogPost.id, BlogPost.title, BlogPost.slug, BlogPost.excerpt, BlogPost.category,
+            BlogPost.featured_image, BlogPost.created_at, BlogPost.updated_at,
+            User.full_name.label("author_name"),
+        )
+        if self.backend == "fts5":
+            match = text(f"{FTS_TABLE} MATCH :fts_query").bindparams(fts_query=_fts_query(terms))
+            rank = literal_column(f"bm25({FTS_TABLE}, 10.0, 4.0, 1.0)")
+            stmt = (
+                select(*columns, (-rank).label("score"))
+                .select_from(_fts)
+                .join(BlogPost, BlogPost.id == _fts.c.rowid)
+                .outerjoin(User, User.id == BlogPost.author_id)
+                .where(match, *base)
+                .order_by(rank, BlogPost.id.desc())
+            )
+            # IN, not a join: joined, SQLite may probe MATCH once per blog_posts row
+            total_stmt = select(func.count(BlogPost.id)).where(self.match_condition(q), *base)
+        else:
+            if self.backend == "mysql":
+                score = _mysql_match((BlogPost.title,), terms) * 3 + _mysql_match((BlogPost.title, BlogPost.excerpt, BlogPost.content), terms)
+                condition = score > 0
+            else:
+                score = literal_column("0")
+                condition = self.match_condition(q)
+            stmt = (
+                select(*columns, BlogPost.content, score.label("score"))
+                .outerjoin(User, User.id == BlogPost.author_id)
+                .where(condition, *base)
+                .order_by(score.desc(), BlogPost.id.desc())
+            )
+            total_stmt = select(func.count(BlogPost.id)).where(condition, *base)
+
+        rows = (await db.execute(stmt.limit(limit).offset(offset))).all()
+        total = await db.scalar(total_stmt) or 0
+
+        marked = {}
+        if self.backend == "fts5" and rows:
+            # Snippets only for the page: computed in the ranking query they would run for every match
+            marked = {
+                r.rowid: (r.title_marked, r.snippet_marked)
+                for r in await db.execute(
+                    select(
+                        _fts.c.rowid,
+                        literal_column(f"highlight({FTS_TABLE}, 0, char(2), char(3))").label("title_marked"),
+                        literal_column(f"snippet({FTS_TABLE}, 2, char(2), char(3), '…', 32)").label("snippet_marked"),
+                    ).where(match, _fts.c.rowid.in_([row.id for row in rows]))
+                )
+            }
+
+        hits = []
+        for row in rows:
+            data = row._asdict()
+            if self.backend == "fts5":
+                title_marked, snippet_marked = marked.get(row.id, (row.title, ""))
+                title = _marked_html(title_marked or "")
+                snippet = _marked_html(snippet_marked or "")
+            else:
+                title = _marked_html(_mark_terms(data["title"], terms))
+                snippet = _marked_html(_python_snippet(data.pop("content"), terms))
+            data.update(title_highlight=title, snippet=snippet, score=round(float(data["score"] or 0), 4))
+            hits.append(data)
+        return hits, total
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": self.backend}
+
+
+def _fts_query(terms: list[str]) -> str:
+    """Every term required (quoted, so no FTS syntax), the last one as a prefix."""
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _mysql_match(columns, terms: list[str]):
+    """MATCH ... AGAINST in boolean mode: every term required, the last one as a prefix."""
+    boolean_query = " ".join(f"+{t}" for t in terms) + "*"
+    return mysql_match(*columns, against=boolean_query).in_boolean_mode()
+
+
+def _fts_row(post_id: int, title: Optional[str], excerpt: Optional[str], content: Optional[str]) -> dict[str, Any]:
+    return {"id": post_id, "title": plain_text(title), "excerpt": plain_text(excerpt), "body": plain_text(content)}
+
+
+# Global blog search instance
+blog_search = BlogSearch()
+
+
+def _fts_enabled(connection) -> bool:
+    """Whether this write must maintain the FTS table.
+
+    Decided from the connection when ``ensure_index`` has not run in this process (scripts,
+    workers), so their writes reach the index too.
+    """
+    if blog_search.backend is not None:
+        return blog_search.backend == "fts5"
+    if connection.dialect.name != "sqlite":
+        return False
+    exists = connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE})
+    return exists.first() is not None
+
+
+# Keep the SQLite FTS table in step with blog_posts (same flush, same transaction)
+@event.listens_for(BlogPost, "after_insert")
+@event.listens_for(BlogPost, "after_update")
+def _index_post(mapper, connection, target: BlogPost) -> None:
+    if not _fts_enabled(connection):
+        return
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": target.id})
+    connection.execute(_FTS_INSERT, _fts_row(target.id, target.title, target.excerpt, target.content))
+
+
+@event.listens_for(BlogPost, "after_delete")
+def _unindex_post(mapper, connection, target: BlogPost) -> None:
+    if not _fts_enabled(connection):
+        return
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": target.id})
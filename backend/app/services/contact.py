@@ -1,10 +1,16 @@
+from datetime import datetime
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app.models.contact_message import ContactMessage
 from app.models.newsletter_subscription import NewsletterSubscription
 from app.core.config import settings
+from app.services import admin_search
 from app.services.email import get_email_provider
+from app.services.email_outbox import add_outbox_email
 from app.services.google_sheets import get_sheets_service
 
 
@@ -27,10 +33,12 @@ async def create_contact_message(
         message=message,
     )
     db.add(cm)
+    # Optional: email notification, queued in the same transaction
+    _maybe_queue_contact_email(db, cm)
     await db.commit()
     await db.refresh(cm)
     
-    # Save to Google Sheets (non-blocking)
+    # Queue for Google Sheets (flushed in batches in the background)
     try:
         sheets_service = get_sheets_service()
         sheets_service.add_contact_message(
@@ -40,20 +48,44 @@ async def create_contact_message(
             phone=cm.phone,
             service=cm.service,
             message=cm.message,
-            created_at=cm.created_at
+            created_at=cm.created_at,
+            record_id=cm.id,
         )
     except Exception as e:
         print(f"⚠️  Failed to save to Google Sheets: {e}")
-    
-    # Optional: send email notification
-    try:
-        await _maybe_send_contact_email(cm)
-    except Exception:
-        # Do not fail the request if email sending fails
-        pass
     return cm
 
 
+_SUBSCRIBER_FIELDS = ("first_name", "last_name", "organization", "role", "interests")
+
+
+def newsletter_upsert_statement(db: AsyncSession, rows: list[dict], keep_existing_values: bool = False):
+    """
+    One INSERT that creates new subscribers and updates existing ones (matched on email):
+    ``ON DUPLICATE KEY UPDATE`` on MySQL, ``ON CONFLICT (email) DO UPDATE`` on SQLite.
+    Only the fields present in ``rows`` are updated; with ``keep_existing_values`` a None
+    never overwrites a stored value (bulk imports with blank cells).
+    """
+    fields = [f for f in _SUBSCRIBER_FIELDS if f in rows[0]]
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql_insert(NewsletterSubscription).values(rows)
+        incoming = stmt.inserted
+    else:
+        stmt = sqlite_insert(NewsletterSubscription).values(rows)
+        incoming = stmt.excluded
+    table = NewsletterSubscription.__table__
+    updates = {
+        f: func.coalesce(incoming[f], table.c[f]) if keep_existing_values else incoming[f]
+        for f in fields
+    }
+    if db.get_bind().dialect.name == "mysql":
+        # A no-op assignment keeps "do nothing" semantics when there is nothing to update
+        return stmt.on_duplicate_key_update(updates or {"email": table.c.email})
+    if not updates:
+        return stmt.on_conflict_do_nothing(index_elements=["email"])
+    return stmt.on_conflict_do_update(index_elements=["email"], set_=updates)
+
+
 async def subscribe_newsletter(
     db: AsyncSession,
     *,
@@ -64,48 +96,35 @@ async def subscribe_newsletter(
     role: str | None,
     interests: list[str] | None,
 ) -> NewsletterSubscription:
-    # Upsert-like: if exists, update fields
-    res = await db.execute(select(NewsletterSubscription).where(NewsletterSubscription.email == email))
-    existing = res.scalars().first()
-    if existing:
-        existing.first_name = first_name
-        existing.last_name = last_name
-        existing.organization = organization
-        existing.role = role
-        existing.interests = ",".join(interests) if interests else None
-        await db.commit()
-        await db.refresh(existing)
-        
-        # Save to Google Sheets (non-blocking)
-        try:
-            sheets_service = get_sheets_service()
-            sheets_service.add_newsletter_subscriber(
-                email=existing.email,
-                first_name=existing.first_name,
-                last_name=existing.last_name,
-                organization=existing.organization,
-                role=existing.role,
-                interests=existing.interests.split(",") if existing.interests else None,
-                created_at=existing.created_at
-            )
-        except Exception as e:
-            print(f"⚠️  Failed to save to Google Sheets: {e}")
-        
-        return existing
-
-    sub = NewsletterSubscription(
-        email=email,
-        first_name=first_name,
-        last_name=last_name,
-        organization=organization,
-        role=role,
-        interests=",".join(interests) if interests else None,
-    )
-    db.add(sub)
+    # Atomic upsert: concurrent signups with the same email cannot race into a duplicate-key error
+    stmt = newsletter_upsert_statement(db, [{
+        "email": email,
+        "first_name": first_name,
+        "last_name": last_name,
+        "organization": organization,
+        "role": role,
+        "interests": ",".join(interests) if interests else None,
+        "created_at": datetime.utcnow(),
+    }])
+    if db.get_bind().dialect.insert_returning:
+        res = await db.execute(
+            stmt.returning(NewsletterSubscription),
+            execution_options={"populate_existing": True},
+        )
+        sub = res.scalar_one()
+    else:
+        # MySQL has no INSERT ... RETURNING: read the row back
+        await db.execute(stmt)
+        res = await db.execute(
+            select(NewsletterSubscription)
+            .where(NewsletterSubscription.email == email)
+            .execution_options(populate_existing=True)
+        )
+        sub = res.scalar_one()
+    await admin_search.reindex(db, NewsletterSubscription, NewsletterSubscription.id == sub.id)
     await db.commit()
-    await db.refresh(sub)
     
-    # Save to Google Sheets (non-blocking)
+    # Queue for Google Sheets (flushed in batches in the background)
     try:
         sheets_service = get_sheets_service()
         sheets_service.add_newsletter_subscriber(
@@ -115,7 +134,8 @@ async def subscribe_newsletter(
             organization=sub.organization,
             role=sub.role,
             interests=sub.interests.split(",") if sub.interests else None,
-            created_at=sub.created_at
+            created_at=sub.created_at,
+            record_id=sub.id,
         )
     except Exception as e:
         print(f"⚠️  Failed to save to Google Sheets: {e}")
@@ -123,9 +143,8 @@ async def subscribe_newsletter(
     return sub
 
 
-async def _maybe_send_contact_email(cm: ContactMessage):
-    provider = get_email_provider()
-    if not provider:
+def _maybe_queue_contact_email(db: AsyncSession, cm: ContactMessage):
+    if not get_email_provider():
         return
     to = getattr(settings, "SMTP_TO", None) or getattr(settings, "SMTP_FROM", None)
     if not to:
@@ -139,4 +158,4 @@ async def _maybe_send_contact_email(cm: ContactMessage):
         f"Service: {cm.service or '-'}\n\n"
         f"Message:\n{cm.message}\n"
     )
-    await provider.send(subject=subject, body=body, to=to, from_addr=getattr(settings, "SMTP_FROM", None))
+    add_outbox_email(db, kind="contact", to=to, subject=subject, body=body, from_addr=getattr(settings, "SMTP_FROM", None))
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from typing import Protocol, Optional, Dict, Any
 from app.core.config import settings
 
@@ -12,13 +15,40 @@ class EmailProvider(Protocol):
     async def send(self, *, subject: str, body: str, to: str, from_addr: Optional[str] = None) -> None: ...
 
 
+def _timed_out(exc: BaseException) -> bool:
+    # smtplib reports a socket timeout as SMTPServerDisconnected raised while handling it
+    return isinstance(exc, TimeoutError) or isinstance(exc.__context__, TimeoutError)
+
+
 @dataclass
 class SMTPProvider:
+    """
+    SMTP transport with a small pool of persistent, authenticated connections.
+
+    Connecting, STARTTLS and AUTH happen once per connection instead of once per email.
+    At most ``pool_size`` messages are in flight; each is sent by smtplib in a worker
+    thread so the event loop never blocks. A pooled connection the server has dropped is
+    replaced transparently (one reconnect, then the error is raised). ``timeout`` bounds
+    every socket operation of a send, ``connect_timeout`` the connect and handshake. A
+    timeout is never retried here: the server may still accept the message.
+    """
+
     host: str
     port: int = 587
     user: Optional[str] = None
     password: Optional[str] = None
     use_tls: bool = True
+    timeout: float = 30
+    connect_timeout: float = 10
+    pool_size: int = 2
+    idle_check_seconds: float = 30  # NOOP a connection idle this long before reusing it
+    _idle: list = field(default_factory=list, init=False, repr=False)
+    _slots: Optional[asyncio.Semaphore] = field(default=None, init=False, repr=False)
+    _latencies: deque = field(default_factory=lambda: deque(maxlen=512), init=False, repr=False)
+    sent: int = field(default=0, init=False)
+    failed: int = field(default=0, init=False)
+    connections_opened: int = field(default=0, init=False)
+    reconnects: int = field(default=0, init=False)
 
     async def send(self, *, subject: str, body: str, to: str, from_addr: Optional[str] = None) -> None:
         msg = EmailMessage()
@@ -27,17 +57,105 @@ class SMTPProvider:
         msg["To"] = to
         msg.set_content(body)
 
-        if self.use_tls:
-            with smtplib.SMTP(self.host, self.port) as s:
-                s.starttls()
-                if self.user and self.password:
-                    s.login(self.user, self.password)
-                s.send_message(msg)
-        else:
-            with smtplib.SMTP(self.host, self.port) as s:
-                if self.user and self.password:
-                    s.login(self.user, self.password)
-                s.send_message(msg)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(1, self.pool_size))
+        async with self._slots:
+            conn, last_used = self._idle.pop() if self._idle else (None, 0.0)
+            started = time.perf_counter()
+            try:
+                # smtplib blocks; keep it off the event loop
+                conn = await asyncio.to_thread(self._deliver, conn, last_used, msg)
+            except Exception:
+                self.failed += 1
+                raise
+            self._latencies.append(time.perf_counter() - started)
+            self.sent += 1
+            self._idle.append((conn, time.monotonic()))
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.connect_timeout)
+        try:
+            if self.use_tls:
+                conn.starttls()
+            if self.user and self.password:
+                conn.login(self.user, self.password)
+            conn.sock.settimeout(self.timeout)
+        except Exception:
+            self._close(conn)
+            raise
+        self.connections_opened += 1
+        return conn
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP) -> None:
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    def _deliver(self, conn: Optional[smtplib.SMTP], last_used: float, msg: EmailMessage) -> smtplib.SMTP:
+        """Send on a pooled connection (or a new one); runs in a worker thread."""
+        if conn is not None and time.monotonic() - last_used > self.idle_check_seconds:
+            try:
+                alive = conn.noop()[0] == 250
+            except Exception:
+                alive = False
+            if not alive:
+                self._close(conn)
+                conn = None
+                self.reconnects += 1
+        fresh = conn is None
+        if conn is None:
+            conn = self._connect()
+        try:
+            conn.send_message(msg)
+            return conn
+        except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+            self._close(conn)
+            if fresh or _timed_out(e):
+                raise
+        except Exception:
+            # The session state is unknown after a failed transaction; don't reuse it.
+            self._close(conn)
+            raise
+        # The server closed a pooled connection while it sat idle: retry once on a new one.
+        self.reconnects += 1
+        conn = self._connect()
+        try:
+            conn.send_message(msg)
+        except Exception:
+            self._close(conn)
+            raise
+        return conn
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            await asyncio.to_thread(self._close, conn)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def pct(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "transport": "smtp",
+            "pool_size": self.pool_size,
+            "idle_connections": len(self._idle),
+            "sent": self.sent,
+            "failed": self.failed,
+            "connections_opened": self.connections_opened,
+            "reconnects": self.reconnects,
+            "latency_ms": {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+                "p50": pct(0.5),
+                "p95": pct(0.95),
+                "max": pct(1.0),
+            },
+        }
 
 
 @dataclass
@@ -68,17 +186,40 @@ class SESProvider:
         raise NotImplementedError("SES provider not implemented")
 
 
+_provider: Optional[EmailProvider] = None
+
+
 def get_email_provider() -> Optional[EmailProvider]:
     # Choose provider by settings; currently supports SMTP only unless API keys present.
+    # One instance per process so pooled connections are shared by every sender.
+    global _provider
+    if _provider is not None:
+        return _provider
     if getattr(settings, "SMTP_HOST", None):
-        return SMTPProvider(
+        _provider = SMTPProvider(
             host=settings.SMTP_HOST,
             port=int(getattr(settings, "SMTP_PORT", 587)),
             user=getattr(settings, "SMTP_USER", None),
             password=getattr(settings, "SMTP_PASSWORD", None),
             use_tls=bool(getattr(settings, "SMTP_TLS", True)),
+            timeout=settings.SMTP_SEND_TIMEOUT_SECONDS,
+            connect_timeout=settings.SMTP_CONNECT_TIMEOUT_SECONDS,
+            pool_size=settings.SMTP_POOL_SIZE,
+            idle_check_seconds=settings.SMTP_IDLE_CHECK_SECONDS,
         )
     # Extend here: if SENDGRID_API_KEY configured, return SendGridProvider(...)
     # if MAILGUN_API_KEY & MAILGUN_DOMAIN configured, return MailgunProvider(...)
     # if AWS creds/region configured, return SESProvider(...)
-    return None
+    return _provider
+
+
+def email_transport_stats() -> Optional[Dict[str, Any]]:
+    stats = getattr(_provider, "stats", None)
+    return stats() if stats else None
+
+
+async def close_email_provider() -> None:
+    """Close pooled connections (app shutdown)."""
+    close = getattr(_provider, "close", None)
+    if close:
+        await close()
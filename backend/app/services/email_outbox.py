@@ -0,0 +1,350 @@
+"""
+Email outbox
+
+Request handlers never talk to SMTP. They insert a row into ``email_outbox`` (usually in
+the same transaction as the change that triggered the email) and return. The
+``EmailDispatcher`` background task claims due rows, sends them through the configured
+``EmailProvider`` and records the outcome:
+
+- sent: status "sent"; rows are purged after EMAIL_OUTBOX_RETENTION_DAYS
+- failed: retried with exponential backoff (EMAIL_OUTBOX_RETRY_BASE_SECONDS, doubling, with
+  jitter, capped at EMAIL_OUTBOX_RETRY_MAX_SECONDS)
+- failed EMAIL_OUTBOX_MAX_ATTEMPTS times: dead-lettered as status "dead" with the last error
+
+Rows are claimed with a conditional UPDATE, so several API workers (or a separate
+``email_worker.py`` process) can dispatch from the same table without sending twice. A
+claim is a lease: if the process dies mid-send the row becomes due again after
+EMAIL_OUTBOX_SEND_TIMEOUT_SECONDS. The lease is renewed while the batch is in flight (a
+row may wait behind other sends for the shared SMTP pool), and the outcome is only recorded
+if the row still carries this claim's lease. Each dispatcher sends at most EMAIL_OUTBOX_MAX_PER_MINUTE
+emails per minute.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.services.email import EmailProvider, get_email_provider
+
+
+_DUE_STATUSES = ("pending", "sending")
+
+
+def add_outbox_email(
+    db: AsyncSession,
+    *,
+    kind: str,
+    to: str,
+    subject: str,
+    body: str,
+    from_addr: str | None = None,
+) -> EmailOutbox:
+    """Queue an email. The row is written by the caller's next commit, which also wakes the dispatcher."""
+    now = datetime.utcnow()
+    email = EmailOutbox(
+        kind=kind,
+        to_addr=to,
+        from_addr=from_addr,
+        subject=subject[:255],
+        body=body,
+        status="pending",
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now,
+    )
+    db.add(email)
+    event.listen(db.sync_session, "after_commit", _wake_dispatcher, once=True)
+    return email
+
+
+def _wake_dispatcher(session) -> None:
+    email_dispatcher.wake()
+
+
+async def enqueue_email(
+    db: AsyncSession,
+    *,
+    kind: str,
+    to: str,
+    subject: str,
+    body: str,
+    from_addr: str | None = None,
+) -> EmailOutbox:
+    """Queue an email and commit."""
+    email = add_outbox_email(db, kind=kind, to=to, subject=subject, body=body, from_addr=from_addr)
+    await db.commit()
+    return email
+
+
+class EmailDispatcher:
+    """Sends queued emails in the background."""
+
+    def __init__(self):
+        self.batch_size = max(1, settings.EMAIL_OUTBOX_BATCH_SIZE)
+        self.poll_interval = max(0.1, settings.EMAIL_OUTBOX_POLL_SECONDS)
+        self.max_per_minute = settings.EMAIL_OUTBOX_MAX_PER_MINUTE
+        self.max_attempts = max(1, settings.EMAIL_OUTBOX_MAX_ATTEMPTS)
+        self.retry_base = max(1, settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS)
+        self.retry_max = max(self.retry_base, settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS)
+        self.lease_seconds = max(1, settings.EMAIL_OUTBOX_SEND_TIMEOUT_SECONDS)
+        self._recent_sends: deque[float] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._last_purge = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.dead_lettered = 0
+        self.budget_waits = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _budget_remaining(self) -> int:
+        if self.max_per_minute <= 0:
+            return self.batch_size
+        cutoff = time.monotonic() - 60
+        while self._recent_sends and self._recent_sends[0] <= cutoff:
+            self._recent_sends.popleft()
+        return self.max_per_minute - len(self._recent_sends)
+
+    def _backoff(self, attempts: int) -> timedelta:
+        delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    def _lease_until(self) -> datetime:
+        # Whole seconds, rounded up: MySQL DATETIME drops the fraction, and the lease is
+        # compared for equality when it is renewed or released.
+        until = datetime.utcnow() + timedelta(seconds=self.lease_seconds + 1)
+        return until.replace(microsecond=0)
+
+    async def _claim(self, db: AsyncSession, limit: int) -> list[EmailOutbox]:
+        now = datetime.utcnow()
+        res = await db.execute(
+            select(EmailOutbox.id)
+            .where(EmailOutbox.status.in_(_DUE_STATUSES), EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(limit)
+        )
+        lease_until = self._lease_until()
+        claimed = []
+        for email_id in res.scalars().all():
+            # Only one dispatcher wins each row, even with several running.
+            res = await db.execute(
+                update(EmailOutbox)
+                .where(
+                    EmailOutbox.id == email_id,
+                    EmailOutbox.status.in_(_DUE_STATUSES),
+                    EmailOutbox.next_attempt_at <= now,
+                )
+                .values(status="sending", attempts=EmailOutbox.attempts + 1, next_attempt_at=lease_until)
+                .execution_options(synchronize_session=False)
+            )
+            if res.rowcount == 1:
+                claimed.append(email_id)
+        await db.commit()
+        if not claimed:
+            return []
+        res = await db.execute(select(EmailOutbox).where(EmailOutbox.id.in_(claimed)))
+        return list(res.scalars().all())
+
+    def _owned(self, email_id: int, lease: datetime):
+        return (
+            EmailOutbox.id == email_id,
+            EmailOutbox.status == "sending",
+            EmailOutbox.next_attempt_at == lease,
+        )
+
+    async def _renew_leases(self, db: AsyncSession, leases: dict[int, datetime], done: asyncio.Event) -> None:
+        """Extend the lease of every claimed row until ``done`` is set.
+
+        A row whose lease was taken over by another dispatcher is dropped from ``leases``:
+        it is not sent if it is still queued, and its outcome is not recorded.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(done.wait(), timeout=self.lease_seconds / 3)
+                return
+            except asyncio.TimeoutError:
+                pass
+            lease_until = self._lease_until()
+            renewed = []
+            try:
+                for email_id, lease in list(leases.items()):
+                    res = await db.execute(
+                        update(EmailOutbox)
+                        .where(*self._owned(email_id, lease))
+                        .values(next_attempt_at=lease_until)
+                        .execution_options(synchronize_session=False)
+                    )
+                    if res.rowcount == 1:
+                        renewed.append(email_id)
+                    else:
+                        del leases[email_id]
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                print(f"Warning: Email outbox lease renewal failed: {e}")
+                continue
+            for email_id in renewed:
+                if email_id in leases:
+                    leases[email_id] = lease_until
+
+    async def _send(self, provider: EmailProvider, email: EmailOutbox) -> Optional[str]:
+        """Send one email; returns the error message, or None on success.
+
+        Deliberately not wrapped in a timeout: cancelling the coroutine would not stop the
+        provider's worker thread, which could still deliver a message recorded as failed
+        and sent again on retry. The provider bounds every socket operation itself
+        (SMTP_CONNECT_TIMEOUT_SECONDS, SMTP_SEND_TIMEOUT_SECONDS).
+        """
+        try:
+            await provider.send(subject=email.subject, body=email.body, to=email.to_addr, from_addr=email.from_addr)
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"[:1000]
+        return None
+
+    async def dispatch_once(self) -> int:
+        """Send one batch of due emails. Returns how many were attempted."""
+        provider = get_email_provider()
+        if provider is None:
+            return 0
+        limit = min(self.batch_size, self._budget_remaining())
+        if limit <= 0:
+            self.budget_waits += 1
+            return 0
+
+        async with SessionLocal() as db:
+            emails = await self._claim(db, limit)
+            if not emails:
+                return 0
+            self._recent_sends.extend([time.monotonic()] * len(emails))
+            leases = {email.id: email.next_attempt_at for email in emails}
+            done = asyncio.Event()
+            heartbeat = asyncio.create_task(self._renew_leases(db, leases, done))
+
+            async def send(email: EmailOutbox) -> Optional[str]:
+                if email.id not in leases:
+                    return None
+                return await self._send(provider, email)
+
+            try:
+                errors = await asyncio.gather(*(send(email) for email in emails))
+            finally:
+                done.set()
+                await heartbeat
+
+            now = datetime.utcnow()
+            for email, error in zip(emails, errors):
+                lease = leases.get(email.id)
+                if lease is None:
+                    continue
+                if error is None:
+                    values = {"status": "sent", "sent_at": now, "last_error": None}
+                elif email.attempts >= self.max_attempts:
+                    values = {"status": "dead", "last_error": error}
+                else:
+                    values = {
+                        "status": "pending",
+                        "next_attempt_at": now + self._backoff(email.attempts),
+                        "last_error": error,
+                    }
+                res = await db.execute(
+                    update(EmailOutbox)
+                    .where(*self._owned(email.id, lease))
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                if res.rowcount == 0:
+                    # The lease expired and another dispatcher owns the row now
+                    print(f"Warning: Email {email.id} was re-claimed mid-send; outcome not recorded")
+                    continue
+                if error is None:
+                    self.sent += 1
+                elif values["status"] == "dead":
+                    self.dead_lettered += 1
+                    print(f"Warning: Email {email.id} ({email.kind}) to {email.to_addr} dead-lettered after {email.attempts} attempts: {error}")
+                else:
+                    self.failed += 1
+            await db.commit()
+        return len(emails)
+
+    async def purge_sent(self) -> int:
+        """Delete sent rows older than EMAIL_OUTBOX_RETENTION_DAYS. Dead letters are kept."""
+        cutoff = datetime.utcnow() - timedelta(days=settings.EMAIL_OUTBOX_RETENTION_DAYS)
+        async with SessionLocal() as db:
+            res = await db.execute(
+                delete(EmailOutbox)
+                .where(EmailOutbox.status == "sent", EmailOutbox.sent_at < cutoff)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        return res.rowcount
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while not self._stopping:
+            try:
+                attempted = await self.dispatch_once()
+            except Exception as e:
+                print(f"Warning: Email dispatch failed: {e}")
+                attempted = 0
+            if time.monotonic() - self._last_purge > 3600:
+                self._last_purge = time.monotonic()
+                try:
+                    await self.purge_sent()
+                except Exception as e:
+                    print(f"Warning: Email outbox purge failed: {e}")
+            if attempted >= self.batch_size:
+                # A full batch: more is probably waiting
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="email-dispatcher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # Let in-flight sends finish and record their outcome.
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        self._wakeup = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dead_lettered": self.dead_lettered,
+            "budget_per_minute": self.max_per_minute,
+            "budget_remaining": self._budget_remaining(),
+            "budget_waits": self.budget_waits,
+        }
+
+
+# Global email dispatcher instance
+email_dispatcher = EmailDispatcher()
@@ -6,7 +6,9 @@ from sqlalchemy import select
 
 from app.models.user import User
 from app.services.email import get_email_provider
+from app.services.email_outbox import enqueue_email
 from app.core.config import settings
+from app.core.user_cache import user_cache
 
 
 def generate_verification_token() -> str:
@@ -21,11 +23,12 @@ async def create_verification_token(db: AsyncSession, user: User) -> str:
     user.verification_token_expires = datetime.utcnow() + timedelta(hours=24)  # Valid for 24 hours
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
     return token
 
 
-async def send_verification_email(user: User, token: str, frontend_url: str = "http://localhost:3000") -> bool:
-    """Send verification email to user"""
+async def send_verification_email(db: AsyncSession, user: User, token: str, frontend_url: str = "http://localhost:3000") -> bool:
+    """Queue the verification email for the background dispatcher"""
     email_provider = get_email_provider()
     if not email_provider:
         print("⚠️ Email provider not configured. Verification email not sent.")
@@ -52,19 +55,15 @@ Best regards,
 STEM-ED-ARCHITECTS Team
     """
     
-    try:
-        await email_provider.send(
-            subject=subject,
-            body=body,
-            to=user.email,
-            from_addr=settings.SMTP_FROM or "noreply@stem-ed-architects.com"
-        )
-        print(f"✅ Verification email sent to {user.email}")
-        return True
-    except Exception as e:
-        print(f"❌ Failed to send verification email: {str(e)}")
-        print(f"📧 Verification link: {verification_link}")
-        return False
+    await enqueue_email(
+        db,
+        kind="verification",
+        to=user.email,
+        subject=subject,
+        body=body,
+        from_addr=settings.SMTP_FROM or "noreply@stem-ed-architects.com",
+    )
+    return True
 
 
 async def verify_email_token(db: AsyncSession, token: str) -> User | None:
@@ -87,6 +86,7 @@ async def verify_email_token(db: AsyncSession, token: str) -> User | None:
     user.verification_token_expires = None
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
     
     return user
 
@@ -107,5 +107,5 @@ async def resend_verification_email(db: AsyncSession, email: str, frontend_url:
     # Generate new token
     token = await create_verification_token(db, user)
     
-    # Send email
-    return await send_verification_email(user, token, frontend_url)
+    # Queue email
+    return await send_verification_email(db, user, token, frontend_url)
@@ -1,16 +1,77 @@
 """
 Google Sheets integration service for saving contact messages and newsletter subscribers
+
+``add_contact_message``/``add_newsletter_subscriber`` only queue a row. A background task
+started from the app lifespan flushes each sheet's queue with one ``append_rows`` call
+every GOOGLE_SHEETS_FLUSH_SECONDS, off the event loop. Worksheet handles and the "header
+row exists" check are cached per process, so a steady-state flush is a single API call.
+Rate-limit (429) and transient 5xx errors are retried with exponential backoff; rows that
+still fail are kept for the next flush (up to GOOGLE_SHEETS_MAX_BUFFER per sheet).
 """
+import asyncio
 import gspread
+from gspread.exceptions import APIError
 from google.oauth2.service_account import Credentials
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 import os
 from pathlib import Path
 
 from app.core.config import settings
 
 
+# The trailing ID column (database id) lets sheets_backfill.py tell which rows are present
+CONTACT_HEADERS = ["Date", "Name", "Email", "Organization", "Phone", "Service", "Message", "ID"]
+NEWSLETTER_HEADERS = ["Date", "Email", "First Name", "Last Name", "Organization", "Role", "Interests", "ID"]
+
+# Quota exceeded and transient server errors; anything else is not worth retrying
+_RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+
+def contact_row(
+    name: Optional[str],
+    email: str,
+    organization: Optional[str],
+    phone: Optional[str],
+    service: Optional[str],
+    message: Optional[str],
+    created_at: datetime,
+    record_id: Optional[int] = None,
+) -> list[str]:
+    return [
+        created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        name or "",
+        email,
+        organization or "",
+        phone or "",
+        service or "",
+        message or "",
+        str(record_id) if record_id is not None else "",
+    ]
+
+
+def newsletter_row(
+    email: str,
+    first_name: Optional[str],
+    last_name: Optional[str],
+    organization: Optional[str],
+    role: Optional[str],
+    interests: Optional[list],
+    created_at: datetime,
+    record_id: Optional[int] = None,
+) -> list[str]:
+    return [
+        created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        email,
+        first_name or "",
+        last_name or "",
+        organization or "",
+        role or "",
+        ", ".join(interests) if interests else "",
+        str(record_id) if record_id is not None else "",
+    ]
+
+
 class GoogleSheetsService:
     """Service for writing data to Google Sheets"""
     
@@ -19,6 +80,21 @@ class GoogleSheetsService:
         self.contact_sheet_id = settings.GOOGLE_SHEETS_CONTACT_SHEET_ID
         self.newsletter_sheet_id = settings.GOOGLE_SHEETS_NEWSLETTER_SHEET_ID
         self.enabled = all([self.credentials_file, self.contact_sheet_id, self.newsletter_sheet_id])
+        self.flush_interval = max(0.1, settings.GOOGLE_SHEETS_FLUSH_SECONDS)
+        self.max_buffer = max(1, settings.GOOGLE_SHEETS_MAX_BUFFER)
+        self.max_retries = max(0, settings.GOOGLE_SHEETS_MAX_RETRIES)
+        self._headers = {self.contact_sheet_id: CONTACT_HEADERS, self.newsletter_sheet_id: NEWSLETTER_HEADERS}
+        self._worksheets: dict[str, gspread.Worksheet] = {}
+        self._headers_checked: set[str] = set()
+        self._pending: dict[str, list[list[str]]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.retries = 0
+        self.dropped = 0
         
         if self.enabled:
             self._init_client()
@@ -46,6 +122,48 @@ class GoogleSheetsService:
             print(f"❌ Failed to initialize Google Sheets client: {e}")
             self.enabled = False
     
+    def _worksheet(self, sheet_id: str) -> gspread.Worksheet:
+        """First worksheet of a spreadsheet, opened once per process."""
+        sheet = self._worksheets.get(sheet_id)
+        if sheet is None:
+            sheet = self.client.open_by_key(sheet_id).sheet1
+            self._worksheets[sheet_id] = sheet
+        return sheet
+
+    def _ensure_headers(self, sheet_id: str, headers: list[str]) -> None:
+        if sheet_id in self._headers_checked:
+            return
+        sheet = self._worksheet(sheet_id)
+        current = sheet.row_values(1) if sheet.row_count else []
+        if not current:
+            sheet.append_row(headers)
+        elif len(current) < len(headers):
+            # Sheet created before a column was added
+            sheet.update(values=[headers], range_name="A1")
+        self._headers_checked.add(sheet_id)
+
+    def append_rows(self, sheet_id: str, headers: list[str], rows: list[list[str]]) -> None:
+        """Append rows in one API call (blocking; run it in a thread).
+
+        INSERT_ROWS never overwrites, so the live flush and a backfill can append concurrently.
+        """
+        self._ensure_headers(sheet_id, headers)
+        self._worksheet(sheet_id).append_rows(rows, value_input_option="RAW", insert_data_option="INSERT_ROWS")
+
+    def read_columns(self, sheet_id: str, headers: list[str], columns: list[str]) -> list[list[str]]:
+        """Values of whole columns below the header, e.g. ["C", "H"], in one API call (blocking)."""
+        self._ensure_headers(sheet_id, headers)
+        ranges = self._worksheet(sheet_id).batch_get([f"{col}2:{col}" for col in columns])
+        return [[cell[0] if cell else "" for cell in value_range] for value_range in ranges]
+
+    def _enqueue(self, sheet_id: str, row: list[str]) -> None:
+        pending = self._pending.setdefault(sheet_id, [])
+        pending.append(row)
+        overflow = len(pending) - self.max_buffer
+        if overflow > 0:
+            del pending[:overflow]
+            self.dropped += overflow
+
     def add_contact_message(
         self,
         name: Optional[str],
@@ -54,42 +172,21 @@ class GoogleSheetsService:
         phone: Optional[str],
         service: Optional[str],
         message: Optional[str],
-        created_at: datetime
+        created_at: datetime,
+        record_id: Optional[int] = None,
     ) -> bool:
         """
-        Add a contact message to Google Sheets
+        Queue a contact message for the next flush to Google Sheets
         
-        Returns True if successful, False otherwise
+        Returns True if queued, False if the integration is disabled
         """
         if not self.enabled:
             return False
-        
-        try:
-            sheet = self.client.open_by_key(self.contact_sheet_id).sheet1
-            
-            # Check if headers exist, if not create them
-            if sheet.row_count == 0 or not sheet.row_values(1):
-                headers = ["Date", "Name", "Email", "Organization", "Phone", "Service", "Message"]
-                sheet.append_row(headers)
-            
-            # Format the row data
-            row = [
-                created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                name or "",
-                email,
-                organization or "",
-                phone or "",
-                service or "",
-                message or ""
-            ]
-            
-            sheet.append_row(row)
-            print(f"✅ Contact message saved to Google Sheets: {email}")
-            return True
-            
-        except Exception as e:
-            print(f"❌ Failed to save contact message to Google Sheets: {e}")
-            return False
+        self._enqueue(
+            self.contact_sheet_id,
+            contact_row(name, email, organization, phone, service, message, created_at, record_id),
+        )
+        return True
     
     def add_newsletter_subscriber(
         self,
@@ -99,42 +196,99 @@ class GoogleSheetsService:
         organization: Optional[str],
         role: Optional[str],
         interests: Optional[list],
-        created_at: datetime
+        created_at: datetime,
+        record_id: Optional[int] = None,
     ) -> bool:
         """
-        Add a newsletter subscriber to Google Sheets
+        Queue a newsletter subscriber for the next flush to Google Sheets
         
-        Returns True if successful, False otherwise
+        Returns True if queued, False if the integration is disabled
         """
         if not self.enabled:
             return False
-        
-        try:
-            sheet = self.client.open_by_key(self.newsletter_sheet_id).sheet1
-            
-            # Check if headers exist, if not create them
-            if sheet.row_count == 0 or not sheet.row_values(1):
-                headers = ["Date", "Email", "First Name", "Last Name", "Organization", "Role", "Interests"]
-                sheet.append_row(headers)
-            
-            # Format the row data
-            row = [
-                created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                email,
-                first_name or "",
-                last_name or "",
-                organization or "",
-                role or "",
-                ", ".join(interests) if interests else ""
-            ]
-            
-            sheet.append_row(row)
-            print(f"✅ Newsletter subscriber saved to Google Sheets: {email}")
-            return True
-            
-        except Exception as e:
-            print(f"❌ Failed to save newsletter subscriber to Google Sheets: {e}")
-            return False
+        self._enqueue(
+            self.newsletter_sheet_id,
+            newsletter_row(email, first_name, last_name, organization, role, interests, created_at, record_id),
+        )
+        return True
+
+    async def append_with_retry(self, sheet_id: str, rows: list[list[str]]) -> None:
+        """``append_rows`` off the event loop, retrying quota and transient errors."""
+        headers = self._headers[sheet_id]
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(self.append_rows, sheet_id, headers, rows)
+                return
+            except APIError as e:
+                if e.code not in _RETRYABLE_CODES or attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                print(f"⚠️  Google Sheets API error {e.code}; retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    async def flush(self) -> int:
+        """Append everything queued so far, one API call per sheet. Returns rows written."""
+        written = 0
+        for sheet_id in list(self._pending):
+            rows, self._pending[sheet_id] = self._pending[sheet_id], []
+            if not rows:
+                continue
+            try:
+                await self.append_with_retry(sheet_id, rows)
+            except Exception as e:
+                print(f"❌ Failed to save {len(rows)} rows to Google Sheets: {e}. Retrying on next flush.")
+                self.failed_flushes += 1
+                # Re-open the worksheet next time in case the cached handle went stale
+                self._worksheets.pop(sheet_id, None)
+                self._headers_checked.discard(sheet_id)
+                self._pending[sheet_id][:0] = rows
+                overflow = len(self._pending[sheet_id]) - self.max_buffer
+                if overflow > 0:
+                    del self._pending[sheet_id][:overflow]
+                    self.dropped += overflow
+                continue
+            written += len(rows)
+            self.flushes += 1
+        self.written += written
+        return written
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def start(self) -> None:
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="google-sheets-sync")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        self._wakeup = None
+        await self.flush()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "queued": sum(len(rows) for rows in self._pending.values()),
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "retries": self.retries,
+            "dropped": self.dropped,
+        }
 
 
 # Singleton instance
@@ -0,0 +1,130 @@
+"""
+Batched writer for ``LoginAttempt`` audit rows
+
+Login handlers call ``login_attempt_writer.record(...)``, which only appends to an in-memory
+buffer. A background task started from the app lifespan inserts the buffer in one
+multi-row INSERT every LOGIN_ATTEMPT_FLUSH_MS, or as soon as LOGIN_ATTEMPT_BATCH_SIZE rows
+are waiting, so login throughput is not bounded by one commit per attempt.
+
+Rows still buffered are flushed on shutdown. If a flush fails the rows are put back and
+retried on the next cycle; beyond LOGIN_ATTEMPT_MAX_BUFFER the oldest rows are dropped.
+Lockout decisions use ``users.failed_login_attempts``, never these rows, so the short
+write delay does not weaken account lockout.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.login_attempt import LoginAttempt
+
+
+class LoginAttemptWriter:
+    """Buffers login attempts and inserts them in batches."""
+
+    def __init__(self):
+        self.batch_size = max(1, settings.LOGIN_ATTEMPT_BATCH_SIZE)
+        self.flush_interval = max(1, settings.LOGIN_ATTEMPT_FLUSH_MS) / 1000
+        self.max_buffer = max(self.batch_size, settings.LOGIN_ATTEMPT_MAX_BUFFER)
+        self._buffer: list[dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def record(
+        self,
+        user_id: int,
+        success: bool,
+        ip_address: str | None = None,
+        user_agent: str | None = None,
+    ) -> None:
+        self._buffer.append({
+            "user_id": user_id,
+            "ip_address": ip_address[:45] if ip_address else None,
+            "attempt_time": datetime.utcnow(),
+            "success": success,
+            "user_agent": user_agent[:255] if user_agent else None,
+        })
+        self._trim()
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _trim(self) -> None:
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.dropped += overflow
+
+    async def flush(self) -> int:
+        """Insert everything buffered so far. Returns the number of rows written."""
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        try:
+            async with SessionLocal() as db:
+                await db.execute(insert(LoginAttempt), rows)
+                await db.commit()
+        except Exception as e:
+            print(f"Warning: Failed to write {len(rows)} login attempts: {e}. Retrying on next flush.")
+            self.failed_flushes += 1
+            self._buffer[:0] = rows
+            self._trim()
+            return 0
+        self.flushes += 1
+        self.written += len(rows)
+        return len(rows)
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="login-attempt-writer")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # Let an in-flight flush finish instead of cancelling it mid-INSERT.
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        self._wakeup = None
+        await self.flush()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "buffered": len(self._buffer),
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+        }
+
+
+# Global login attempt writer instance
+login_attempt_writer = LoginAttemptWriter()
@@ -0,0 +1,415 @@
+"""
+Newsletter campaigns
+
+A campaign is created as a draft and queued from the admin API. ``CampaignSender`` (a
+background task in every API worker, or in ``email_worker.py``) claims a queued campaign
+with a lease, so exactly one process sends it, then:
+
+- streams the segment with keyset pagination (``id > checkpoint ORDER BY id LIMIT n``),
+  selecting only the columns the template needs, so memory stays flat at any list size
+- renders subject and body from templates compiled once per campaign (a template without
+  placeholders is rendered once and reused for every recipient)
+- sends through the shared email provider with NEWSLETTER_SEND_CONCURRENCY messages in
+  flight, paced to NEWSLETTER_SEND_RATE_PER_SECOND
+- renews the lease every third of NEWSLETTER_LEASE_SECONDS while a batch is in flight, and
+  stops sending as soon as a renewal finds the lease taken over
+- after every batch, records the checkpoint and counts and renews the lease in one UPDATE
+
+A crashed or restarted sender leaves the lease to expire; the next claim resumes from the
+checkpoint, so at most one batch is sent twice. Pausing takes effect at the next
+checkpoint. Failed recipients are counted (``failed_count``/``last_error``), not retried;
+transactional mail goes through the email outbox instead.
+"""
+
+import asyncio
+import secrets
+import time
+from datetime import datetime, timedelta
+from string import Template
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import func, literal, or_, and_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.newsletter_campaign import NewsletterCampaign
+from app.models.newsletter_subscription import NewsletterSubscription
+from app.services.email import EmailProvider, get_email_provider
+
+
+PLACEHOLDERS = frozenset({"first_name", "last_name", "name", "email", "organization"})
+
+
+class CampaignTemplate:
+    """Subject and body templates, compiled once per campaign."""
+
+    def __init__(self, subject: str, body: str):
+        self._subject = Template(subject)
+        self._body = Template(body)
+        if not (self._subject.is_valid() and self._body.is_valid()):
+            raise ValueError("Invalid placeholder syntax; use ${name} and $$ for a literal $")
+        identifiers = set(self._subject.get_identifiers()) | set(self._body.get_identifiers())
+        unknown = identifiers - PLACEHOLDERS
+        if unknown:
+            raise ValueError(f"Unknown placeholders: {', '.join(sorted(unknown))}")
+        self._static = None if identifiers else (self._subject.substitute(), self._body.substitute())
+
+    def render(self, recipient: Row) -> tuple[str, str]:
+        if self._static is not None:
+            return self._static
+        name = " ".join(part for part in (recipient.first_name, recipient.last_name) if part)
+        values = {
+            "first_name": recipient.first_name or "there",
+            "last_name": recipient.last_name or "",
+            "name": name or "there",
+            "email": recipient.email,
+            "organization": recipient.organization or "",
+        }
+        return self._subject.substitute(values), self._body.substitute(values)
+
+
+def segment_conditions(campaign: NewsletterCampaign) -> list:
+    conditions = []
+    if campaign.segment_interest:
+        # interests is a comma-separated list; match whole entries only
+        interests = literal(",") + func.coalesce(NewsletterSubscription.interests, "") + literal(",")
+        conditions.append(interests.contains(f",{campaign.segment_interest},", autoescape=True))
+    if campaign.segment_role:
+        conditions.append(NewsletterSubscription.role == campaign.segment_role)
+    return conditions
+
+
+async def count_recipients(db: AsyncSession, campaign: NewsletterCampaign) -> int:
+    res = await db.execute(
+        select(func.count(NewsletterSubscription.id)).where(*segment_conditions(campaign))
+    )
+    return res.scalar_one()
+
+
+async def fetch_recipient_batch(
+    db: AsyncSession, campaign: NewsletterCampaign, after_id: int, limit: int
+) -> Sequence[Row]:
+    res = await db.execute(
+        select(
+            NewsletterSubscription.id,
+            NewsletterSubscription.email,
+            NewsletterSubscription.first_name,
+            NewsletterSubscription.last_name,
+            NewsletterSubscription.organization,
+        )
+        .where(NewsletterSubscription.id > after_id, *segment_conditions(campaign))
+        .order_by(NewsletterSubscription.id)
+        .limit(limit)
+    )
+    return res.all()
+
+
+def campaign_progress(campaign: NewsletterCampaign) -> dict[str, Any]:
+    processed = campaign.sent_count + campaign.failed_count
+    percent = rate = eta = None
+    if campaign.total_recipients:
+        percent = round(min(100.0, processed * 100 / campaign.total_recipients), 1)
+    if campaign.started_at and processed:
+        end = campaign.finished_at or datetime.utcnow()
+        elapsed = (end - campaign.started_at).total_seconds()
+        if elapsed > 0:
+            rate = round(processed / elapsed, 1)
+            if campaign.status == "running" and campaign.total_recipients:
+                eta = int(max(0, campaign.total_recipients - processed) / rate)
+    return {
+        "id": campaign.id,
+        "subject": campaign.subject,
+        "segment_interest": campaign.segment_interest,
+        "segment_role": campaign.segment_role,
+        "status": campaign.status,
+        "total_recipients": campaign.total_recipients,
+        "sent_count": campaign.sent_count,
+        "failed_count": campaign.failed_count,
+        "last_subscriber_id": campaign.last_subscriber_id,
+        "percent_complete": percent,
+        "send_rate_per_second": rate,
+        "eta_seconds": eta,
+        "last_error": campaign.last_error,
+        "created_at": campaign.created_at,
+        "started_at": campaign.started_at,
+        "finished_at": campaign.finished_at,
+    }
+
+
+class CampaignSender:
+    """Claims queued campaigns and sends them in the background."""
+
+    poll_interval = 5.0
+
+    def __init__(self):
+        self.batch_size = max(1, settings.NEWSLETTER_BATCH_SIZE)
+        self.concurrency = max(1, settings.NEWSLETTER_SEND_CONCURRENCY)
+        self.rate = settings.NEWSLETTER_SEND_RATE_PER_SECOND
+        self.lease_seconds = max(10, settings.NEWSLETTER_LEASE_SECONDS)
+        self.owner = secrets.token_hex(8)
+        self._next_slot = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.current_campaign_id: Optional[int] = None
+        self.sent = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _claimable(self, now: datetime):
+        return or_(
+            NewsletterCampaign.status == "queued",
+            and_(NewsletterCampaign.status == "running", NewsletterCampaign.lease_expires_at < now),
+        )
+
+    async def _claim(self, db: AsyncSession) -> Optional[NewsletterCampaign]:
+        now = datetime.utcnow()
+        res = await db.execute(
+            select(NewsletterCampaign.id)
+            .where(self._claimable(now))
+            .order_by(NewsletterCampaign.id)
+            .limit(1)
+        )
+        campaign_id = res.scalar_one_or_none()
+        if campaign_id is None:
+            return None
+        res = await db.execute(
+            update(NewsletterCampaign)
+            .where(NewsletterCampaign.id == campaign_id, self._claimable(now))
+            .values(
+                status="running",
+                lease_owner=self.owner,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                started_at=func.coalesce(NewsletterCampaign.started_at, now),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if res.rowcount != 1:
+            return None
+        return await db.get(NewsletterCampaign, campaign_id)
+
+    async def _checkpoint(
+        self,
+        campaign_id: int,
+        last_id: int,
+        sent: int,
+        failed: int,
+        error: Optional[str],
+        done: bool = False,
+    ) -> bool:
+        """Record a finished batch. Returns False when the campaign should stop (paused, or lease lost)."""
+        now = datetime.utcnow()
+        values: dict[str, Any] = {
+            "last_subscriber_id": last_id,
+            "sent_count": NewsletterCampaign.sent_count + sent,
+            "failed_count": NewsletterCampaign.failed_count + failed,
+            "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+        }
+        if error is not None:
+            values["last_error"] = error
+        async with SessionLocal() as db:
+            res = await db.execute(
+                update(NewsletterCampaign)
+                .where(NewsletterCampaign.id == campaign_id, NewsletterCampaign.lease_owner == self.owner)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            if res.rowcount != 1:
+                await db.rollback()
+                return False
+            if done:
+                await db.execute(
+                    update(NewsletterCampaign)
+                    .where(NewsletterCampaign.id == campaign_id, NewsletterCampaign.status == "running")
+                    .values(status="completed", finished_at=now, lease_owner=None, lease_expires_at=None)
+                    .execution_options(synchronize_session=False)
+                )
+            status = await db.scalar(select(NewsletterCampaign.status).where(NewsletterCampaign.id == campaign_id))
+            await db.commit()
+        return status == "running"
+
+    async def _renew_lease(self, campaign_id: int) -> bool:
+        """Extend the lease mid-batch. Returns False when another process owns the campaign now."""
+        async with SessionLocal() as db:
+            res = await db.execute(
+                update(NewsletterCampaign)
+                .where(NewsletterCampaign.id == campaign_id, NewsletterCampaign.lease_owner == self.owner)
+                .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        return res.rowcount == 1
+
+    async def _heartbeat(self, campaign_id: int, done: asyncio.Event, lost: asyncio.Event) -> None:
+        """Renew the lease until ``done`` is set; set ``lost`` if it has been taken over."""
+        while True:
+            try:
+                await asyncio.wait_for(done.wait(), timeout=self.lease_seconds / 3)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                owned = await self._renew_lease(campaign_id)
+            except Exception as e:
+                print(f"Warning: Newsletter campaign {campaign_id} lease renewal failed: {e}")
+                continue
+            if not owned:
+                print(f"Warning: Newsletter campaign {campaign_id} lease lost mid-batch; stopping")
+                lost.set()
+                return
+
+    async def _release(self, campaign_id: int, status: Optional[str] = None, error: Optional[str] = None) -> None:
+        """Give up the lease so the campaign can be resumed right away (by us or another process)."""
+        values: dict[str, Any] = {"lease_owner": None, "lease_expires_at": datetime.utcnow()}
+        if status is not None:
+            values["status"] = status
+        if error is not None:
+            values["last_error"] = error
+        async with SessionLocal() as db:
+            await db.execute(
+                update(NewsletterCampaign)
+                .where(NewsletterCampaign.id == campaign_id, NewsletterCampaign.lease_owner == self.owner)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def _pace(self) -> None:
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        start = max(now, self._next_slot)
+        self._next_slot = start + 1 / self.rate
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def _send_one(
+        self,
+        provider: EmailProvider,
+        template: CampaignTemplate,
+        recipient: Row,
+        slots: asyncio.Semaphore,
+        lost: asyncio.Event,
+    ) -> Optional[str]:
+        subject, body = template.render(recipient)
+        async with slots:
+            await self._pace()
+            if lost.is_set():
+                return None
+            try:
+                await provider.send(subject=subject, body=body, to=recipient.email)
+            except Exception as e:
+                return f"{recipient.email}: {type(e).__name__}: {e}"[:1000]
+        return None
+
+    async def run_campaign(self, campaign: NewsletterCampaign) -> None:
+        provider = get_email_provider()
+        if provider is None:
+            await self._release(campaign.id, status="paused", error="Email provider not configured")
+            return
+        template = CampaignTemplate(campaign.subject, campaign.body)
+        if campaign.total_recipients is None:
+            async with SessionLocal() as db:
+                total = await count_recipients(db, campaign)
+                await db.execute(
+                    update(NewsletterCampaign)
+                    .where(NewsletterCampaign.id == campaign.id)
+                    .values(total_recipients=total)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+
+        self.current_campaign_id = campaign.id
+        slots = asyncio.Semaphore(self.concurrency)
+        last_id = campaign.last_subscriber_id
+        try:
+            while not self._stopping:
+                async with SessionLocal() as db:
+                    batch = await fetch_recipient_batch(db, campaign, last_id, self.batch_size)
+                if not batch:
+                    await self._checkpoint(campaign.id, last_id, 0, 0, None, done=True)
+                    return
+                done_sending, lost = asyncio.Event(), asyncio.Event()
+                heartbeat = asyncio.create_task(self._heartbeat(campaign.id, done_sending, lost))
+                try:
+                    errors = await asyncio.gather(
+                        *(self._send_one(provider, template, r, slots, lost) for r in batch)
+                    )
+                finally:
+                    done_sending.set()
+                    await heartbeat
+                if lost.is_set():
+                    # The new owner resumes from our last checkpoint
+                    break
+                failures = [e for e in errors if e is not None]
+                self.sent += len(batch) - len(failures)
+                self.failed += len(failures)
+                last_id = batch[-1].id
+                done = len(batch) < self.batch_size
+                keep_going = await self._checkpoint(
+                    campaign.id, last_id, len(batch) - len(failures), len(failures),
+                    failures[-1] if failures else None, done=done,
+                )
+                if done or not keep_going:
+                    break
+            if self._stopping:
+                await self._release(campaign.id)
+        finally:
+            self.current_campaign_id = None
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while not self._stopping:
+            try:
+                async with SessionLocal() as db:
+                    campaign = await self._claim(db)
+                if campaign is not None:
+                    await self.run_campaign(campaign)
+                    continue
+            except Exception as e:
+                print(f"Warning: Newsletter campaign sender failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="newsletter-campaign-sender")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # Finish the batch in flight, checkpoint it and hand the lease back.
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        self._wakeup = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "current_campaign_id": self.current_campaign_id,
+            "sent": self.sent,
+            "failed": self.failed,
+            "concurrency": self.concurrency,
+            "rate_per_second": self.rate,
+        }
+
+
+# Global campaign sender instance
+campaign_sender = CampaignSender()
@@ -0,0 +1,142 @@
+"""
+Bulk import of newsletter subscribers from CSV
+
+The file is read row by row (never loaded whole) and upserted in batches of
+NEWSLETTER_IMPORT_BATCH_SIZE with one multi-row ``newsletter_upsert_statement`` per batch,
+so a 50k-row mailing list is a few dozen statements. Existing subscribers (matched on
+email) get the CSV's non-empty values; blank cells never erase stored data. Imported
+rows reach Google Sheets through ``sheets_backfill.py``, not the live sync.
+"""
+import csv
+import io
+import re
+from datetime import datetime
+from typing import IO, Any, AsyncIterator
+
+from pydantic.networks import validate_email
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.newsletter_subscription import NewsletterSubscription
+from app.services import admin_search
+from app.services.contact import newsletter_upsert_statement
+
+
+# Accepted header spellings (compared lower-cased, with spaces/dashes as underscores)
+_HEADER_ALIASES = {
+    "email": "email",
+    "email_address": "email",
+    "e_mail": "email",
+    "first_name": "first_name",
+    "firstname": "first_name",
+    "given_name": "first_name",
+    "last_name": "last_name",
+    "lastname": "last_name",
+    "surname": "last_name",
+    "organization": "organization",
+    "organisation": "organization",
+    "school": "organization",
+    "role": "role",
+    "interests": "interests",
+}
+# Column sizes of newsletter_subscriptions, so strict MySQL never rejects a batch
+_MAX_LENGTHS = {"first_name": 100, "last_name": 100, "organization": 255, "role": 64, "interests": 512}
+MAX_REPORTED_ERRORS = 20
+
+
+class SubscriberCsvImport:
+    """One CSV upload. ``read_header`` validates the columns before anything is written."""
+
+    def __init__(self, stream: IO[bytes], batch_size: int | None = None):
+        self._text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        self._reader = csv.reader(self._text)
+        self.batch_size = batch_size or settings.NEWSLETTER_IMPORT_BATCH_SIZE
+        self.columns: dict[str, int] = {}
+        self.progress: dict[str, Any] = {
+            "processed": 0,
+            "inserted": 0,
+            "updated": 0,
+            "skipped": 0,
+            "batches": 0,
+            "errors": [],
+            "done": False,
+        }
+
+    def read_header(self) -> None:
+        header = next(self._reader, None)
+        if not header:
+            raise ValueError("The CSV file is empty")
+        for index, name in enumerate(header):
+            key = re.sub(r"[\s\-]+", "_", name.strip().lower())
+            field = _HEADER_ALIASES.get(key)
+            if field and field not in self.columns:
+                self.columns[field] = index
+        if "email" not in self.columns:
+            raise ValueError("The CSV file needs an 'email' column")
+
+    def _error(self, line: int, message: str) -> None:
+        self.progress["skipped"] += 1
+        if len(self.progress["errors"]) < MAX_REPORTED_ERRORS:
+            self.progress["errors"].append({"line": line, "error": message})
+
+    def _parse(self, line: int, record: list[str]) -> dict[str, Any] | None:
+        def cell(field: str) -> str | None:
+            index = self.columns[field]
+            value = record[index].strip() if index < len(record) else ""
+            return value or None
+
+        raw_email = cell("email")
+        if not raw_email:
+            self._error(line, "missing email")
+            return None
+        try:
+            _, email = validate_email(raw_email)
+        except Exception:
+            self._error(line, f"invalid email: {raw_email[:100]}")
+            return None
+        if len(email) > 255:
+            self._error(line, "email too long")
+            return None
+
+        row: dict[str, Any] = {"email": email, "created_at": datetime.utcnow()}
+        for field in _MAX_LENGTHS:
+            if field not in self.columns:
+                continue
+            value = cell(field)
+            if value and field == "interests":
+                value = ",".join(part.strip() for part in re.split(r"[;,]", value) if part.strip()) or None
+            row[field] = value[:_MAX_LENGTHS[field]] if value else None
+        return row
+
+    async def _write(self, db: AsyncSession, batch: dict[str, dict[str, Any]]) -> None:
+        existing = await db.scalar(
+            select(func.count(NewsletterSubscription.id)).where(NewsletterSubscription.email.in_(list(batch)))
+        )
+        await db.execute(newsletter_upsert_statement(db, list(batch.values()), keep_existing_values=True))
+        await admin_search.reindex(db, NewsletterSubscription, NewsletterSubscription.email.in_(list(batch)))
+        await db.commit()
+        self.progress["inserted"] += len(batch) - existing
+        self.progress["updated"] += existing
+        self.progress["batches"] += 1
+
+    async def run(self, db: AsyncSession) -> AsyncIterator[dict[str, Any]]:
+        """Upsert every row; yields a progress snapshot after each batch and at the end."""
+        # Keyed by email: a repeated address within a batch keeps its last row
+        batch: dict[str, dict[str, Any]] = {}
+        for line, record in enumerate(self._reader, start=2):
+            if not any(cell.strip() for cell in record):
+                continue
+            self.progress["processed"] += 1
+            row = self._parse(line, record)
+            if row is None:
+                continue
+            batch[row["email"]] = row
+            if len(batch) >= self.batch_size:
+                await self._write(db, batch)
+                batch = {}
+                yield dict(self.progress)
+        if batch:
+            await self._write(db, batch)
+        self.progress["done"] = True
+        yield dict(self.progress)
@@ -1,15 +1,15 @@
 """Password reset service"""
 import secrets
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.models.user import User
 from app.core.config import settings
-from app.core.security import hash_password
+from app.core.security import hash_password_async
+from app.core.user_cache import user_cache
+from app.services.email import get_email_provider
+from app.services.email_outbox import enqueue_email
 
 
 def generate_reset_token() -> str:
@@ -25,17 +25,18 @@ async def create_reset_token(db: AsyncSession, user: User) -> str:
     
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
     
     return token
 
 
-async def send_reset_email(user: User, token: str) -> None:
-    """Send password reset email to user"""
+async def send_reset_email(db: AsyncSession, user: User, token: str) -> None:
+    """Queue the password reset email for the background dispatcher"""
     # Frontend URL (configurable)
     frontend_url = "http://localhost:3000"
     
     # If SMTP is not configured, just print the link
-    if not settings.SMTP_HOST or not settings.SMTP_USER:
+    if not get_email_provider():
         print(f"⚠️ Email provider not configured. Password reset email not sent.")
         print(f"🔗 Reset link: {frontend_url}/reset-password?token={token}")
         return
@@ -61,27 +62,14 @@ Best regards,
 STEM-ED-ARCHITECTS Team
 """
     
-    # Create message
-    message = MIMEMultipart()
-    message["From"] = settings.SMTP_FROM or settings.SMTP_USER
-    message["To"] = user.email
-    message["Subject"] = subject
-    message.attach(MIMEText(body, "plain"))
-    
-    try:
-        # Send email via SMTP
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            if settings.SMTP_TLS:
-                server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(message)
-        
-        print(f"✅ Password reset email sent to {user.email}")
-    except Exception as e:
-        print(f"❌ Failed to send reset email: {str(e)}")
-        # Still print link for testing
-        print(f"🔗 Reset link: {reset_link}")
-        raise
+    await enqueue_email(
+        db,
+        kind="password_reset",
+        to=user.email,
+        subject=subject,
+        body=body,
+        from_addr=settings.SMTP_FROM or settings.SMTP_USER,
+    )
 
 
 async def verify_reset_token(db: AsyncSession, token: str) -> User | None:
@@ -107,7 +95,7 @@ async def verify_reset_token(db: AsyncSession, token: str) -> User | None:
 async def reset_password(db: AsyncSession, user: User, new_password: str) -> None:
     """Reset user's password and clear reset token"""
     # Hash new password
-    user.hashed_password = hash_password(new_password)
+    user.hashed_password = await hash_password_async(new_password)
     
     # Clear reset token (one-time use)
     user.password_reset_token = None
@@ -115,3 +103,4 @@ async def reset_password(db: AsyncSession, user: User, new_password: str) -> Non
     
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
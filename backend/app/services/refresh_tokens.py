@@ -1,12 +1,30 @@
+"""
+Refresh tokens
+
+Two stores, selected by REFRESH_TOKEN_STORE:
+- "sql" (default): the ``refresh_tokens`` table is the source of truth.
+- "redis": ``core.token_store`` is the source of truth, with native TTL expiry and per-user
+  sets for "log out everywhere". Rows are still written to ``refresh_tokens`` for audit
+  when REFRESH_TOKEN_SQL_AUDIT is on, and the SQL path takes over if Redis errors.
+
+Either way, rows older than REFRESH_TOKEN_RETENTION_DAYS past expiry are purged by
+``purge_expired_refresh_tokens``, run periodically from the app lifespan.
+"""
+import asyncio
 import hashlib
 import secrets
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from sqlalchemy import select, update
+from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.token_store import token_store
+from app.core.user_cache import user_cache
+from app.db.session import SessionLocal
 from app.models.refresh_token import RefreshToken
 from app.models.user import User
 
@@ -18,23 +36,59 @@ def _hash(raw: str) -> str:
     return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
 
-def generate_refresh_token_value() -> str:
-    return secrets.token_urlsafe(REFRESH_BYTE_LENGTH)
+def generate_refresh_token_value(user_id: int) -> str:
+    # The owner prefix lets the Redis store address the user's keys without a lookup
+    return f"{user_id}.{secrets.token_urlsafe(REFRESH_BYTE_LENGTH)}"
+
+
+def _token_owner(raw: str) -> Optional[int]:
+    """User id a refresh token was issued to; None for tokens issued without the prefix."""
+    prefix, sep, _ = raw.partition(".")
+    return int(prefix) if sep and prefix.isdigit() else None
+
+
+def _sql_enabled() -> bool:
+    return not token_store.enabled or settings.REFRESH_TOKEN_SQL_AUDIT
+
 
+def _new_expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
 
-async def create_refresh_token(db: AsyncSession, user: User, raw_token: str, user_agent: str | None, ip: str | None) -> RefreshToken:
-    expires = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    rt = RefreshToken(
-        user_id=user.id,
-        token_hash=_hash(raw_token),
+
+def _token_row(user_id: int, token_hash: str, expires: datetime, user_agent: str | None, ip: str | None) -> RefreshToken:
+    return RefreshToken(
+        user_id=user_id,
+        token_hash=token_hash,
         created_at=datetime.now(timezone.utc),
         expires_at=expires,
         user_agent=user_agent[:255] if user_agent else None,
         ip=ip[:64] if ip else None,
     )
+
+
+async def add_refresh_token(db: AsyncSession, user: User, raw_token: str, user_agent: str | None, ip: str | None) -> RefreshToken | None:
+    """Issue a refresh token. The SQL row (if any) is written by the caller's next commit."""
+    token_hash = _hash(raw_token)
+    expires = _new_expiry()
+    stored = False
+    if token_store.enabled:
+        try:
+            await token_store.add(token_hash, user.id, expires)
+            stored = True
+        except Exception as e:
+            print(f"Warning: Redis error: {e}. Storing refresh token in SQL only.")
+    if stored and not settings.REFRESH_TOKEN_SQL_AUDIT:
+        return None
+    rt = _token_row(user.id, token_hash, expires, user_agent, ip)
     db.add(rt)
+    return rt
+
+
+async def create_refresh_token(db: AsyncSession, user: User, raw_token: str, user_agent: str | None, ip: str | None) -> RefreshToken | None:
+    rt = await add_refresh_token(db, user, raw_token, user_agent, ip)
     await db.commit()
-    await db.refresh(rt)
+    if rt is not None:
+        await db.refresh(rt)
     return rt
 
 
@@ -46,27 +100,216 @@ async def get_refresh_token(db: AsyncSession, raw_token: str) -> Optional[Refres
 
 async def revoke_refresh_token(db: AsyncSession, raw_token: str) -> None:
     h = _hash(raw_token)
+    owner = _token_owner(raw_token)
+    if token_store.enabled and owner is not None:
+        try:
+            await token_store.revoke(owner, h, "logout")
+        except Exception as e:
+            print(f"Warning: Redis error: {e}. Revoking refresh token in SQL only.")
+    if not _sql_enabled():
+        return
     await db.execute(
         update(RefreshToken)
         .where(RefreshToken.token_hash == h, RefreshToken.revoked_at.is_(None))
-        .values(revoked_at=datetime.now(timezone.utc))
+        .values(revoked_at=datetime.now(timezone.utc), revoked_reason="logout")
+    )
+    await db.commit()
+
+
+@dataclass
+class RefreshRotation:
+    """Outcome of ``rotate_refresh_token``.
+
+    status is one of:
+    - "rotated": the old token was revoked and ``raw_token`` replaces it
+    - "in_flight": the token was rotated moments ago by a parallel request (another tab);
+      the caller should retry with the newest token instead of failing the session
+    - "reused": an already-rotated token was presented again; every session of the user
+      has been revoked
+    - "invalid": unknown, expired or signed-out token
+    """
+
+    status: str
+    user_id: Optional[int] = None
+    raw_token: Optional[str] = None
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes even for timezone-aware columns
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+async def revoke_user_refresh_tokens(db: AsyncSession, user_id: int, reason: str = "logout_all") -> int:
+    """
+    Revoke every active refresh token of a user ("log out everywhere").
+    With the Redis store this also ends the user's server-side sessions, so their access
+    tokens stop working immediately. Returns how many refresh tokens were revoked.
+    """
+    revoked = 0
+    if token_store.enabled:
+        try:
+            revoked = await token_store.revoke_user(user_id, reason)
+        except Exception as e:
+            print(f"Warning: Redis error: {e}. Revoking refresh tokens in SQL only.")
+    if not _sql_enabled():
+        return revoked
+    res = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc), revoked_reason=reason)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return max(revoked, res.rowcount)
+
+
+async def _claim_refresh_token(db: AsyncSession, token_hash: str, now: datetime) -> Optional[int]:
+    """Revoke an active token if nobody else has yet; return its user_id when we won."""
+    revoke = (
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .values(revoked_at=now, revoked_reason="rotated")
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        res = await db.execute(revoke.returning(RefreshToken.user_id))
+        return res.scalar_one_or_none()
+
+    # MySQL has no UPDATE ... RETURNING: look the owner up, then claim by id.
+    res = await db.execute(
+        select(RefreshToken.id, RefreshToken.user_id).where(RefreshToken.token_hash == token_hash)
+    )
+    row = res.first()
+    if row is None:
+        return None
+    res = await db.execute(revoke.where(RefreshToken.id == row.id))
+    return row.user_id if res.rowcount == 1 else None
+
+
+async def _classify_failed_rotation(db: AsyncSession, token_hash: str, now: datetime) -> RefreshRotation:
+    res = await db.execute(
+        select(RefreshToken.user_id, RefreshToken.revoked_at, RefreshToken.revoked_reason)
+        .where(RefreshToken.token_hash == token_hash)
+    )
+    row = res.first()
+    if row is None or row.revoked_at is None or row.revoked_reason != "rotated":
+        # Unknown, simply expired, or signed out
+        return RefreshRotation("invalid")
+    grace = timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS)
+    if _as_utc(row.revoked_at) > now - grace:
+        return RefreshRotation("in_flight", user_id=row.user_id)
+    # A rotated token came back long after its replacement was issued: assume it leaked.
+    await revoke_user_refresh_tokens(db, row.user_id, reason="reuse")
+    return RefreshRotation("reused", user_id=row.user_id)
+
+
+async def _rotate_sql(db: AsyncSession, old_raw: str, user_agent: str | None, ip: str | None) -> RefreshRotation:
+    now = datetime.now(timezone.utc)
+    token_hash = _hash(old_raw)
+    user_id = await _claim_refresh_token(db, token_hash, now)
+    user = await user_cache.get_user(db, user_id) if user_id is not None else None
+    if user is None:
+        await db.rollback()
+        return await _classify_failed_rotation(db, token_hash, now)
+
+    new_raw = generate_refresh_token_value(user.id)
+    db.add(_token_row(user.id, _hash(new_raw), _new_expiry(), user_agent, ip))
+    await db.commit()
+    return RefreshRotation("rotated", user_id=user.id, raw_token=new_raw)
+
+
+async def _rotate_redis(db: AsyncSession, old_raw: str, user_agent: str | None, ip: str | None) -> RefreshRotation | None:
+    """Rotate in Redis; None means the token is unknown there and SQL should be asked."""
+    owner = _token_owner(old_raw)
+    if owner is None:
+        # Issued before tokens carried their owner: only SQL can know it
+        return None
+    old_hash = _hash(old_raw)
+    new_raw = generate_refresh_token_value(owner)
+    new_hash = _hash(new_raw)
+    expires = _new_expiry()
+    status, user_id, revoked_at, reason = await token_store.rotate(owner, old_hash, new_hash, expires)
+
+    if status == "invalid":
+        # With audit rows, a token issued while Redis was unavailable only exists in SQL.
+        return None if settings.REFRESH_TOKEN_SQL_AUDIT else RefreshRotation("invalid")
+    if status == "revoked":
+        if reason != "rotated":
+            return RefreshRotation("invalid")
+        if revoked_at is not None and revoked_at > time.time() - settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS:
+            return RefreshRotation("in_flight", user_id=user_id)
+        await revoke_user_refresh_tokens(db, user_id, reason="reuse")
+        return RefreshRotation("reused", user_id=user_id)
+
+    user = await user_cache.get_user(db, user_id)
+    if user is None:
+        await token_store.revoke(owner, new_hash, "logout")
+        return RefreshRotation("invalid")
+    if settings.REFRESH_TOKEN_SQL_AUDIT:
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == old_hash, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc), revoked_reason="rotated")
+            .execution_options(synchronize_session=False)
+        )
+        db.add(_token_row(user.id, new_hash, expires, user_agent, ip))
+        await db.commit()
+    return RefreshRotation("rotated", user_id=user.id, raw_token=new_raw)
+
+
+async def rotate_refresh_token(db: AsyncSession, old_raw: str, user_agent: str | None, ip: str | None) -> RefreshRotation:
+    """
+    Exchange a refresh token for a new one atomically.
+
+    SQL store: the old token is revoked with a conditional UPDATE (only while still
+    active), so of several parallel refreshes exactly one wins; the new token is inserted
+    in the same transaction. With UPDATE ... RETURNING and a cached user this is two
+    statements. Redis store: the same claim-and-replace runs as one Lua script.
+    """
+    if token_store.enabled:
+        try:
+            rotation = await _rotate_redis(db, old_raw, user_agent, ip)
+            if rotation is not None:
+                return rotation
+        except Exception as e:
+            print(f"Warning: Redis error: {e}. Rotating refresh token in SQL.")
+            await db.rollback()
+    return await _rotate_sql(db, old_raw, user_agent, ip)
+
+
+async def purge_expired_refresh_tokens(db: AsyncSession) -> int:
+    """Delete rows that expired more than REFRESH_TOKEN_RETENTION_DAYS ago."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.REFRESH_TOKEN_RETENTION_DAYS)
+    res = await db.execute(
+        delete(RefreshToken)
+        .where(RefreshToken.expires_at < cutoff)
+        .execution_options(synchronize_session=False)
     )
     await db.commit()
+    return res.rowcount
 
 
-async def rotate_refresh_token(db: AsyncSession, old_raw: str, user: User, user_agent: str | None, ip: str | None) -> tuple[str, RefreshToken]:
-    # revoke old
-    await revoke_refresh_token(db, old_raw)
-    # create new
-    new_raw = generate_refresh_token_value()
-    await create_refresh_token(db, user, new_raw, user_agent, ip)
-    return new_raw, await get_refresh_token(db, new_raw)  # type: ignore
+async def run_refresh_token_purge(interval_seconds: int = 3600) -> None:
+    """Background loop started from the app lifespan."""
+    while True:
+        try:
+            async with SessionLocal() as db:
+                purged = await purge_expired_refresh_tokens(db)
+            if purged:
+                print(f"Purged {purged} expired refresh tokens")
+        except Exception as e:
+            print(f"Warning: Refresh token purge failed: {e}")
+        await asyncio.sleep(interval_seconds)
 
 
 def is_refresh_token_active(token: RefreshToken) -> bool:
     now = datetime.now(timezone.utc)
     if token.revoked_at is not None:
         return False
-    if token.expires_at <= now:
+    if _as_utc(token.expires_at) <= now:
         return False
     return True
@@ -0,0 +1,198 @@
+"""
+Google Sheets backfill and reconciliation
+
+The live sync (``google_sheets``) drops rows it cannot write after retries. This job
+brings a sheet back in line with the database:
+
+1. read the sheet's ID column (and, for rows written before the ID column existed, the
+   natural key: date + email for contacts, email for subscribers) in one API call
+2. stream rows with id > the sheet's high-water mark from the database with keyset
+   pagination, GOOGLE_SHEETS_BACKFILL_CHUNK rows at a time, stopping at the first row
+   created less than GOOGLE_SHEETS_BACKFILL_SETTLE_SECONDS ago: the live sync may still
+   hold it in its queue, and appending it here would write it twice
+3. append the rows missing from the sheet in one ``append_rows`` call per chunk, then
+   advance the high-water mark in ``sheets_sync_state``
+
+Rows already in the sheet are skipped, so the job is idempotent, and the mark is saved
+after every chunk, so an interrupted run resumes where it stopped. Recent rows are left
+for the next run rather than skipped: the mark never passes them.
+"""
+import asyncio
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.contact_message import ContactMessage
+from app.models.newsletter_subscription import NewsletterSubscription
+from app.models.sheets_sync_state import SheetsSyncState
+from app.services.google_sheets import (
+    CONTACT_HEADERS,
+    NEWSLETTER_HEADERS,
+    GoogleSheetsService,
+    contact_row,
+    newsletter_row,
+)
+
+
+@dataclass
+class SheetSpec:
+    model: Any
+    sheet_id_setting: str
+    headers: list[str]
+    columns: list[Any]
+    to_row: Callable[[Any], list[str]]
+    # Sheet columns read for reconciliation: the ID column first, then the natural key
+    key_columns: list[str]
+
+
+SHEETS: dict[str, SheetSpec] = {
+    "contact": SheetSpec(
+        model=ContactMessage,
+        sheet_id_setting="GOOGLE_SHEETS_CONTACT_SHEET_ID",
+        headers=CONTACT_HEADERS,
+        columns=[
+            ContactMessage.id, ContactMessage.name, ContactMessage.email, ContactMessage.organization,
+            ContactMessage.phone, ContactMessage.service, ContactMessage.message, ContactMessage.created_at,
+        ],
+        to_row=lambda r: contact_row(r.name, r.email, r.organization, r.phone, r.service, r.message, r.created_at, r.id),
+        key_columns=["H", "A", "C"],
+    ),
+    "newsletter": SheetSpec(
+        model=NewsletterSubscription,
+        sheet_id_setting="GOOGLE_SHEETS_NEWSLETTER_SHEET_ID",
+        headers=NEWSLETTER_HEADERS,
+        columns=[
+            NewsletterSubscription.id, NewsletterSubscription.email, NewsletterSubscription.first_name,
+            NewsletterSubscription.last_name, NewsletterSubscription.organization, NewsletterSubscription.role,
+            NewsletterSubscription.interests, NewsletterSubscription.created_at,
+        ],
+        to_row=lambda r: newsletter_row(
+            r.email, r.first_name, r.last_name, r.organization, r.role,
+            r.interests.split(",") if r.interests else None, r.created_at, r.id,
+        ),
+        key_columns=["H", "B"],
+    ),
+}
+
+
+@dataclass
+class BackfillResult:
+    sheet: str
+    scanned: int = 0
+    already_present: int = 0
+    written: int = 0
+    api_calls: int = 0
+    last_synced_id: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+async def _present_keys(service: GoogleSheetsService, spec: SheetSpec, sheet_id: str) -> tuple[set[str], set[tuple]]:
+    """IDs in the sheet, plus natural keys of rows written before the ID column existed."""
+    columns = await asyncio.to_thread(service.read_columns, sheet_id, spec.headers, spec.key_columns)
+    ids_col, *key_cols = columns
+    height = max(len(col) for col in columns) if columns else 0
+    ids: set[str] = set()
+    legacy: set[tuple] = set()
+    for i in range(height):
+        record_id = ids_col[i] if i < len(ids_col) else ""
+        if record_id:
+            ids.add(record_id)
+        else:
+            values = [col[i] if i < len(col) else "" for col in key_cols]
+            legacy.add(tuple(values))
+    return ids, legacy
+
+
+def _natural_key_of(name: str, row: list[str]) -> tuple:
+    """Natural key of a formatted row, matching the key columns read from the sheet."""
+    if name == "contact":
+        return (row[0], row[2])  # Date (A), Email (C)
+    return (row[1],)  # Email (B)
+
+
+def _settled(records: list, cutoff: datetime) -> list:
+    """The leading records created before ``cutoff``; the rest may still be queued in the live sync."""
+    for i, record in enumerate(records):
+        created_at = record.created_at
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        if created_at > cutoff:
+            return records[:i]
+    return records
+
+
+async def _get_state(db: AsyncSession, name: str) -> SheetsSyncState:
+    state = await db.get(SheetsSyncState, name)
+    if state is None:
+        state = SheetsSyncState(sheet=name, last_synced_id=0, rows_backfilled=0, updated_at=datetime.utcnow())
+        db.add(state)
+    return state
+
+
+async def backfill_sheet(
+    db: AsyncSession,
+    service: GoogleSheetsService,
+    name: str,
+    chunk_size: Optional[int] = None,
+    dry_run: bool = False,
+    from_start: bool = False,
+) -> BackfillResult:
+    """Append database rows missing from one sheet. See the module docstring."""
+    spec = SHEETS[name]
+    sheet_id = getattr(settings, spec.sheet_id_setting)
+    if not service.enabled or not sheet_id:
+        raise RuntimeError("Google Sheets integration is not configured")
+    chunk_size = chunk_size or settings.GOOGLE_SHEETS_BACKFILL_CHUNK
+
+    state = await _get_state(db, name)
+    after_id = 0 if from_start else state.last_synced_id
+    result = BackfillResult(sheet=name, last_synced_id=after_id)
+
+    settle = max(settings.GOOGLE_SHEETS_BACKFILL_SETTLE_SECONDS, 2 * settings.GOOGLE_SHEETS_FLUSH_SECONDS)
+    cutoff = datetime.utcnow() - timedelta(seconds=settle)
+    present: Optional[tuple[set[str], set[tuple]]] = None
+    while True:
+        res = await db.execute(
+            select(*spec.columns)
+            .where(spec.model.id > after_id)
+            .order_by(spec.model.id)
+            .limit(chunk_size)
+        )
+        fetched = res.all()
+        records = _settled(fetched, cutoff)
+        if not records:
+            break
+        if present is None:
+            # Read the sheet only once there is something to reconcile
+            present = await _present_keys(service, spec, sheet_id)
+            result.api_calls += 1
+        ids, legacy = present
+        missing = []
+        for record in records:
+            row = spec.to_row(record)
+            if str(record.id) in ids or _natural_key_of(name, row) in legacy:
+                result.already_present += 1
+            else:
+                missing.append(row)
+        result.scanned += len(records)
+        after_id = records[-1].id
+
+        if not dry_run:
+            if missing:
+                await service.append_with_retry(sheet_id, missing)
+                result.api_calls += 1
+            state.last_synced_id = max(state.last_synced_id, after_id)
+            state.rows_backfilled += len(missing)
+            state.updated_at = datetime.utcnow()
+            await db.commit()
+        result.written += len(missing)
+        result.last_synced_id = after_id
+        if len(records) < len(fetched):
+            break
+    return result
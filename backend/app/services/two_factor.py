@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import hmac
 import json
 import secrets
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Iterable, Tuple
 
 import pyotp
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.encryption import encrypt_string, decrypt_string
-from app.core.security import hash_password, verify_password
+from app.core.security import hash_password_async, verify_password_async
+from app.core.user_cache import user_cache
 from app.models.user import User
 
 TWO_FACTOR_ISSUER = "STEM-ED-ARCHITECTS"
@@ -38,24 +44,67 @@ def generate_backup_codes(count: int = DEFAULT_BACKUP_CODE_COUNT) -> list[str]:
     return sorted(codes)
 
 
-def _load_backup_hashes(user: User) -> list[str]:
+# Backup codes are stored as a JSON list in ``users.two_factor_backup_codes``.
+#
+# Current format: ``[{"id": <hmac>, "hash": <bcrypt>}, ...]``. ``id`` is an HMAC-SHA256 of
+# the normalized code keyed from SECRET_KEY, so a submitted code is matched with one dict
+# lookup and a single bcrypt check; wrong guesses cost no bcrypt work at all. The bcrypt
+# hash stays the secret-at-rest protection if the database and key both leak.
+#
+# Legacy format: ``["<bcrypt>", ...]``. These entries have no identifier and can only be
+# matched by trying each hash in turn. They keep working (mixed lists included) until the
+# user regenerates codes; see ``report_legacy_backup_codes.py`` for finding affected accounts.
+# Rotating SECRET_KEY invalidates the identifiers, so codes must be regenerated after that.
+BackupCodeEntry = dict[str, str] | str
+
+
+@lru_cache(maxsize=1)
+def _backup_code_key() -> bytes:
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), b"two-factor-backup-code", hashlib.sha256).digest()
+
+
+def _backup_code_id(normalized_code: str) -> str:
+    return hmac.new(_backup_code_key(), normalized_code.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _normalize_backup_code(code: str) -> str:
+    normalized = (code or "").strip().upper().replace(" ", "")
+    # Accept codes with or without dash
+    if len(normalized) == 8 and "-" not in normalized:
+        normalized = f"{normalized[:4]}-{normalized[4:]}"
+    return normalized
+
+
+def _load_backup_entries(user: User) -> list[BackupCodeEntry]:
     if not user.two_factor_backup_codes:
         return []
     try:
         values = json.loads(user.two_factor_backup_codes)
-        if isinstance(values, list):
-            return [str(v) for v in values]
     except json.JSONDecodeError:
         return []
-    return []
+    if not isinstance(values, list):
+        return []
+    entries: list[BackupCodeEntry] = []
+    for value in values:
+        if isinstance(value, dict):
+            if value.get("id") and value.get("hash"):
+                entries.append({"id": str(value["id"]), "hash": str(value["hash"])})
+        else:
+            entries.append(str(value))
+    return entries
 
 
-def _dump_backup_hashes(hashes: Iterable[str]) -> str:
-    return json.dumps(list(hashes))
+def _dump_backup_entries(entries: Iterable[BackupCodeEntry]) -> str:
+    return json.dumps(list(entries))
 
 
 def get_backup_codes_remaining(user: User) -> int:
-    return len(_load_backup_hashes(user))
+    return len(_load_backup_entries(user))
+
+
+def has_legacy_backup_codes(user: User) -> bool:
+    """True when some stored codes predate the indexed format and need a linear scan."""
+    return any(isinstance(entry, str) for entry in _load_backup_entries(user))
 
 
 def decrypt_totp_secret(user: User) -> str | None:
@@ -73,37 +122,43 @@ def verify_totp_code(user: User, code: str, valid_window: int = 1) -> bool:
     return bool(totp.verify(normalized, valid_window=valid_window))
 
 
-def hash_backup_codes(codes: Iterable[str]) -> list[str]:
-    return [hash_password(code) for code in codes]
+async def hash_backup_codes(codes: Iterable[str]) -> list[dict[str, str]]:
+    normalized = [_normalize_backup_code(code) for code in codes]
+    hashes = await asyncio.gather(*(hash_password_async(code) for code in normalized))
+    return [{"id": _backup_code_id(code), "hash": hashed} for code, hashed in zip(normalized, hashes)]
 
 
-def verify_and_consume_backup_code(user: User, code: str) -> tuple[bool, list[str]]:
-    hashed_codes = _load_backup_hashes(user)
-    normalized = (code or "").strip().upper()
-    # Accept codes with or without dash
-    normalized = normalized.replace(" ", "")
-    if len(normalized) == 8 and "-" not in normalized:
-        normalized = f"{normalized[:4]}-{normalized[4:]}"
-    remaining: list[str] = []
-    consumed = False
-    for hashed in hashed_codes:
-        if not consumed and verify_password(normalized, hashed):
-            consumed = True
-            continue
-        remaining.append(hashed)
-    return consumed, remaining
+async def verify_and_consume_backup_code(user: User, code: str) -> tuple[bool, list[BackupCodeEntry]]:
+    entries = _load_backup_entries(user)
+    normalized = _normalize_backup_code(code)
+    if not normalized:
+        return False, entries
+
+    code_id = _backup_code_id(normalized)
+    for index, entry in enumerate(entries):
+        if isinstance(entry, dict) and hmac.compare_digest(entry["id"], code_id):
+            if await verify_password_async(normalized, entry["hash"]):
+                return True, entries[:index] + entries[index + 1:]
+            return False, entries
+
+    # Legacy entries have no identifier; fall back to checking them one by one.
+    for index, entry in enumerate(entries):
+        if isinstance(entry, str) and await verify_password_async(normalized, entry):
+            return True, entries[:index] + entries[index + 1:]
+    return False, entries
 
 
 async def start_two_factor_setup(db: AsyncSession, user: User) -> tuple[str, list[str], str]:
     secret = generate_totp_secret()
     backup_codes = generate_backup_codes()
     user.two_factor_secret = encrypt_string(secret)
-    user.two_factor_backup_codes = _dump_backup_hashes(hash_backup_codes(backup_codes))
+    user.two_factor_backup_codes = _dump_backup_entries(await hash_backup_codes(backup_codes))
     user.two_factor_enabled = False
     user.two_factor_confirmed_at = None
     user.two_factor_last_verified_at = None
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
     uri = build_provisioning_uri(user, secret)
     return secret, backup_codes, uri
 
@@ -116,6 +171,7 @@ async def enable_two_factor(db: AsyncSession, user: User, code: str) -> bool:
     user.two_factor_last_verified_at = _now_utc()
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
     return True
 
 
@@ -127,24 +183,36 @@ async def disable_two_factor(db: AsyncSession, user: User) -> None:
     user.two_factor_last_verified_at = None
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
 
 
-async def update_backup_code_hashes(db: AsyncSession, user: User, hashes: Iterable[str]) -> None:
-    user.two_factor_backup_codes = _dump_backup_hashes(hashes)
+def set_backup_code_entries(user: User, entries: Iterable[BackupCodeEntry]) -> None:
+    user.two_factor_backup_codes = _dump_backup_entries(entries)
+
+
+async def update_backup_code_hashes(db: AsyncSession, user: User, entries: Iterable[BackupCodeEntry]) -> None:
+    set_backup_code_entries(user, entries)
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
 
 
 async def regenerate_backup_codes(db: AsyncSession, user: User) -> tuple[list[str], int]:
     codes = generate_backup_codes()
-    hashed = hash_backup_codes(codes)
-    user.two_factor_backup_codes = _dump_backup_hashes(hashed)
+    hashed = await hash_backup_codes(codes)
+    user.two_factor_backup_codes = _dump_backup_entries(hashed)
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
     return codes, len(hashed)
 
 
-async def mark_two_factor_verified(db: AsyncSession, user: User) -> None:
+def set_two_factor_verified(user: User) -> None:
     user.two_factor_last_verified_at = _now_utc()
+
+
+async def mark_two_factor_verified(db: AsyncSession, user: User) -> None:
+    set_two_factor_verified(user)
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
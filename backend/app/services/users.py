@@ -2,7 +2,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
-from app.core.security import hash_password, verify_password
+from app.core.security import hash_password_async, verify_password_async
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
@@ -11,7 +11,8 @@ async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
 
 
 async def create_user(db: AsyncSession, email: str, password: str, full_name: str | None = None, role: str = "student") -> User:
-    user = User(email=email, hashed_password=hash_password(password), full_name=full_name, role=role)
+    hashed = await hash_password_async(password)
+    user = User(email=email, hashed_password=hashed, full_name=full_name, role=role)
     db.add(user)
     await db.commit()
     await db.refresh(user)
@@ -22,6 +23,6 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> User
     user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
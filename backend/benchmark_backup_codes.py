@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Compare the cost of verifying a two-factor backup code in the legacy and indexed formats.
+Runs in memory; no database needed.
+Usage: python benchmark_backup_codes.py [rounds]
+"""
+import sys
+import json
+import time
+import asyncio
+from app.core.security import hash_password, shutdown_password_hashing
+from app.models import blog_post, refresh_token  # noqa: F401 - register User relationship targets
+from app.models.user import User
+from app.services.two_factor import (
+    generate_backup_codes,
+    hash_backup_codes,
+    verify_and_consume_backup_code,
+)
+
+
+async def time_verify(user: User, code: str, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await verify_and_consume_backup_code(user, code)
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+async def benchmark(rounds: int):
+    codes = generate_backup_codes()
+    legacy_user = User(two_factor_backup_codes=json.dumps([hash_password(code) for code in codes]))
+    indexed_user = User(two_factor_backup_codes=json.dumps(await hash_backup_codes(codes)))
+
+    cases = [
+        ("first code", codes[0]),
+        ("last code", codes[-1]),
+        ("wrong guess", "0000-000X"),
+    ]
+    print(f"{len(codes)} backup codes, {rounds} rounds per case (ms per verification)\n")
+    print(f"{'case':<14}{'legacy':>10}{'indexed':>10}")
+    for label, code in cases:
+        legacy_ms = await time_verify(legacy_user, code, rounds)
+        indexed_ms = await time_verify(indexed_user, code, rounds)
+        print(f"{label:<14}{legacy_ms:>10.1f}{indexed_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    try:
+        asyncio.run(benchmark(rounds))
+    finally:
+        shutdown_password_hashing()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Compare Redis rate-limit checks: the old four-round-trip version against the atomic
+sliding-window and GCRA scripts in app.core.rate_limit.
+Needs a Redis server (REDIS_URL, default redis://localhost:6379/0); --fake runs the same
+code against fakeredis, which checks correctness but says nothing about latency.
+Usage: python benchmark_rate_limit.py [iterations] [--fake]
+"""
+import sys
+import time
+import asyncio
+import statistics
+from app.core.config import settings
+from app.core.rate_limit import RateLimiter
+
+
+async def legacy_check(client, key: str, max_attempts: int, window_seconds: int) -> tuple[bool, int]:
+    """The previous implementation: ZREMRANGEBYSCORE, ZCARD, ZADD, EXPIRE as separate calls."""
+    current_time = int(time.time())
+    await client.zremrangebyscore(key, 0, current_time - window_seconds)
+    attempt_count = await client.zcard(key)
+    if attempt_count >= max_attempts:
+        return True, 0
+    await client.zadd(key, {str(current_time): current_time})
+    await client.expire(key, window_seconds)
+    return False, max_attempts - attempt_count - 1
+
+
+async def time_calls(check, iterations: int) -> list[float]:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await check(f"bench:{i % 50}")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: list[float]):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<16}{statistics.median(samples):>10.3f}{p99:>10.3f}{statistics.mean(samples):>10.3f}")
+
+
+async def benchmark(iterations: int, fake: bool):
+    limiter = RateLimiter()
+    if fake:
+        import fakeredis.aioredis
+        limiter.redis_client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        limiter.use_redis = True
+        limiter._register_scripts()
+    elif not limiter.use_redis:
+        print("❌ Redis is not available. Set REDIS_URL or pass --fake.")
+        return
+    client = limiter.redis_client
+    limit, window = 1000, 60
+
+    # Burst of simultaneous attempts: the old whole-second members collapse into one entry
+    await client.delete("bench:burst", "bench:burst:gcra")
+    for _ in range(10):
+        await legacy_check(client, "bench:burst", limit, window)
+    legacy_counted = await client.zcard("bench:burst")
+    await client.delete("bench:burst")
+    for _ in range(10):
+        await limiter._check_redis("bench:burst", limit, window)
+    print(f"10 attempts in the same second counted as: legacy={legacy_counted}, sliding window={await client.zcard('bench:burst')}\n")
+
+    print(f"{iterations} checks each (ms per check)\n")
+    print(f"{'implementation':<16}{'p50':>10}{'p99':>10}{'mean':>10}")
+    report("legacy (4 RTT)", await time_calls(lambda k: legacy_check(client, f"{k}:legacy", limit, window), iterations))
+    limiter.algorithm = "sliding_window"
+    report("sliding window", await time_calls(lambda k: limiter._check_redis(k, limit, window), iterations))
+    limiter.algorithm = "gcra"
+    report("gcra", await time_calls(lambda k: limiter._check_redis(k, limit, window), iterations))
+
+    keys = [k async for k in client.scan_iter("bench:*")]
+    if keys:
+        await client.delete(*keys)
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    iterations = int(args[0]) if args else 2000
+    if not settings.REDIS_URL and "--fake" not in sys.argv:
+        settings.REDIS_URL = "redis://localhost:6379/0"
+    asyncio.run(benchmark(iterations, fake="--fake" in sys.argv))
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Run the email outbox dispatcher and newsletter campaign sender as their own process.
+
+By default every API worker runs both in-process. To send from a single dedicated
+process instead, set EMAIL_OUTBOX_DISPATCHER=false and NEWSLETTER_CAMPAIGN_SENDER=false
+for the API and run:
+
+Usage: python email_worker.py
+"""
+import asyncio
+
+from app.services.email import close_email_provider, email_transport_stats
+from app.services.email_outbox import email_dispatcher
+from app.services.newsletter_campaigns import campaign_sender
+
+
+async def main():
+    await email_dispatcher.start()
+    await campaign_sender.start()
+    print("📧 Email dispatcher and campaign sender running (Ctrl+C to stop)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await campaign_sender.stop()
+        await email_dispatcher.stop()
+        await close_email_provider()
+        print(f"📧 Stopped: {email_dispatcher.stats()} {campaign_sender.stats()} {email_transport_stats()}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Report users whose two-factor backup codes still use the legacy (unindexed) format.
+This only reports; it changes nothing. Legacy codes only store bcrypt hashes, so they
+cannot be converted without the plaintext, and a code the user types in is consumed on
+use, so there is nothing left to re-index either.
+
+Phase-out path:
+  - Legacy codes keep working: a submitted code is looked up by its identifier first and
+    only on a miss, and only for users still holding legacy entries, are the legacy
+    hashes tried one by one.
+  - GET /auth/2fa/status returns ``backup_codes_legacy: true`` for these users, so the
+    profile page asks them to regenerate.
+  - Regenerating (POST /auth/2fa/backup-codes/regenerate) replaces the whole list with
+    indexed codes; once this report shows zero, the legacy branch can be removed.
+
+Usage: python report_legacy_backup_codes.py [--notify]
+  --notify  print the emails of affected users so they can be asked to regenerate codes
+"""
+import sys
+import asyncio
+from sqlalchemy import select
+from app.db.session import SessionLocal
+from app.models import blog_post, refresh_token  # noqa: F401 - register User relationship targets
+from app.models.user import User
+from app.services.two_factor import get_backup_codes_remaining, has_legacy_backup_codes
+
+
+async def report_legacy_backup_codes(notify: bool = False) -> int:
+    async with SessionLocal() as db:
+        result = await db.stream_scalars(
+            select(User)
+            .where(User.two_factor_backup_codes.is_not(None))
+            .execution_options(yield_per=500)
+        )
+        total = 0
+        legacy = 0
+        async for user in result:
+            total += 1
+            if has_legacy_backup_codes(user):
+                legacy += 1
+                if notify:
+                    print(f"  - {user.email} ({get_backup_codes_remaining(user)} codes left)")
+
+        print(f"Users with backup codes: {total}")
+        print(f"Users on the legacy format: {legacy}")
+        if legacy:
+            print("\nThese users should regenerate their backup codes (POST /auth/2fa/backup-codes/regenerate).")
+        else:
+            print("✅ All backup codes use the indexed format")
+        return legacy
+
+
+if __name__ == "__main__":
+    asyncio.run(report_legacy_backup_codes(notify="--notify" in sys.argv[1:]))
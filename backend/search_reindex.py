@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Rebuild the admin global search index (the ``search_index`` table).
+
+The index is kept up to date as rows are written, so this is only needed once after
+migration 0019, or after rows were changed outside the application (SQL scripts, restores).
+
+Usage: python search_reindex.py [user|contact|newsletter|media|blog|all] [--chunk-size N]
+"""
+import argparse
+import asyncio
+import sys
+
+from app.db.session import SessionLocal
+from app.models import refresh_token  # noqa: F401 (User relationships)
+from app.services.admin_search import ENTITIES, rebuild
+
+
+async def main(args) -> bool:
+    names = list(ENTITIES) if args.entity == "all" else [args.entity]
+    ok = True
+    for name in names:
+        async with SessionLocal() as db:
+            try:
+                indexed = await rebuild(db, name, chunk_size=args.chunk_size)
+            except Exception as e:
+                print(f"❌ {name}: reindex failed: {e}")
+                ok = False
+                continue
+        print(f"✅ {name}: indexed {indexed} rows")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the admin search index")
+    parser.add_argument("entity", nargs="?", default="all", choices=[*ENTITIES, "all"])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    success = asyncio.run(main(parser.parse_args()))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Backfill Google Sheets with contact messages / newsletter subscribers missing from them.
+
+Rows already in the sheet are skipped and a high-water mark per sheet is kept in the
+database, so the job is safe to re-run and resumes after an interruption. Run it after
+a Sheets outage or credential rotation, or from cron, e.g. hourly:
+
+    0 * * * * cd /srv/stemed/backend && python sheets_backfill.py
+
+Usage: python sheets_backfill.py [contact|newsletter|all] [--dry-run] [--from-start] [--chunk-size N]
+
+--from-start ignores the high-water mark and reconciles every row (still without duplicates).
+"""
+import argparse
+import asyncio
+import sys
+
+from app.db.session import SessionLocal
+from app.services.google_sheets import get_sheets_service
+from app.services.sheets_backfill import SHEETS, backfill_sheet
+
+
+async def main(args) -> bool:
+    service = get_sheets_service()
+    if not service.enabled:
+        print("❌ Google Sheets integration is not configured")
+        return False
+    names = list(SHEETS) if args.sheet == "all" else [args.sheet]
+    ok = True
+    for name in names:
+        async with SessionLocal() as db:
+            try:
+                result = await backfill_sheet(
+                    db, service, name,
+                    chunk_size=args.chunk_size, dry_run=args.dry_run, from_start=args.from_start,
+                )
+            except Exception as e:
+                print(f"❌ {name}: backfill stopped: {e} (progress so far is saved; re-run to resume)")
+                ok = False
+                continue
+        verb = "would write" if args.dry_run else "wrote"
+        print(
+            f"✅ {name}: scanned {result.scanned}, {result.already_present} already in sheet, "
+            f"{verb} {result.written} in {result.api_calls} API calls (high-water mark {result.last_synced_id})"
+        )
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill Google Sheets from the database")
+    parser.add_argument("sheet", nargs="?", default="all", choices=[*SHEETS, "all"])
+    parser.add_argument("--dry-run", action="store_true", help="report what is missing without writing")
+    parser.add_argument("--from-start", action="store_true", help="ignore the high-water mark")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    success = asyncio.run(main(parser.parse_args()))
+    sys.exit(0 if success else 1)
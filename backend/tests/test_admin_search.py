@@ -0,0 +1,51 @@
+"""Admin search candidate selection when a word matches more rows than CANDIDATE_LIMIT."""
+import pytest
+
+from app.models.contact_message import ContactMessage
+from app.services import admin_search
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def contacts(db, monkeypatch):
+    monkeypatch.setattr(admin_search, "CANDIDATE_LIMIT", 3)
+
+    async def add(name: str, organization: str) -> ContactMessage:
+        contact = ContactMessage(
+            name=name, email=f"{name.split()[0].lower()}@example.com", organization=organization, message="Hello"
+        )
+        db.add(contact)
+        await db.commit()
+        return contact
+    return add
+
+
+async def test_best_candidates_survive_the_cap(db, contacts):
+    # "joan" sorts before "jones" in the index, but an organization weighs less than a name
+    for n in range(5):
+        await contacts(f"Pat{n} Lee", "Joan Academy")
+    jones = await contacts("Sam Jones", "Northside")
+
+    results = await admin_search.search(db, "jo")
+
+    assert results[0]["id"] == jones.id
+
+
+async def test_the_most_selective_word_drives(db, contacts):
+    for n in range(5):
+        await contacts(f"Kim{n} Park", "School 7")
+    target = await contacts("Kim Park", "School 42")
+
+    for q in ("school 42", "42 school"):
+        results = await admin_search.search(db, q)
+        assert [r["id"] for r in results] == [target.id]
+
+
+async def test_one_word_reads_exact_matches_then_newest_prefix_matches(db, contacts):
+    jo = await contacts("Jo Lee", "Northside")
+    johns = [await contacts(f"John{n} Park", "Northside") for n in range(5)]
+
+    results = await admin_search.search(db, "jo", limit=3)
+
+    assert [r["id"] for r in results] == [jo.id, johns[-1].id, johns[-2].id]
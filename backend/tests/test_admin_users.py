@@ -0,0 +1,29 @@
+"""Admin user list: created_at is served from the list projection."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_list_includes_created_at(db, client, login, user):
+    user.role = "admin"
+    db.add(User(email="older@example.com", hashed_password="x"))
+    await db.commit()
+    await db.execute(update(User).where(User.email == "older@example.com").values(created_at=None))
+    await db.commit()
+    headers = {"Authorization": f"Bearer {(await login())['access_token']}"}
+
+    response = await client.get("/api/v1/admin/users", headers=headers)
+
+    assert response.status_code == 200, response.text
+    created = {item["email"]: item["created_at"] for item in response.json()["items"]}
+    assert datetime.fromisoformat(created[user.email]) == user.created_at
+    # Accounts older than the column keep NULL
+    assert created["older@example.com"] == ""
+
+    response = await client.get("/api/v1/admin/users", params={"fields": "email"}, headers=headers)
+    assert all("created_at" not in item for item in response.json()["items"])
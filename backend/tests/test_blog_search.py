@@ -0,0 +1,55 @@
+"""Blog FTS index: kept current by processes that never ran ensure_index, reconciled at startup."""
+import pytest
+from sqlalchemy import text
+
+from app.models.blog_post import BlogPost
+from app.services.blog_search import FTS_TABLE, blog_search
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def index(db, monkeypatch):
+    await db.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+    await db.commit()
+    monkeypatch.setattr(blog_search, "backend", None)
+    await blog_search.ensure_index()
+    assert blog_search.backend == "fts5"
+
+
+async def titles(db, q: str) -> list[str]:
+    hits, _ = await blog_search.search(db, q)
+    return [hit["title"] for hit in hits]
+
+
+def post(user, title: str, slug: str) -> BlogPost:
+    return BlogPost(title=title, slug=slug, content="<p>Body</p>", author_id=user.id, published=True)
+
+
+async def test_writes_from_a_process_without_startup_are_indexed(db, user, index, monkeypatch):
+    # A script or worker: ensure_index never ran in it
+    monkeypatch.setattr(blog_search, "backend", None)
+    db.add(post(user, "Robotics club", "robotics"))
+    await db.commit()
+
+    monkeypatch.setattr(blog_search, "backend", "fts5")
+    assert await titles(db, "robotics") == ["Robotics club"]
+
+
+async def test_startup_reindexes_posts_changed_outside_the_app(db, user, index, monkeypatch):
+    db.add_all([post(user, "Robotics club", "robotics"), post(user, "Chess club", "chess")])
+    await db.commit()
+    # Raw SQL: no mapper events
+    await db.execute(text(
+        "UPDATE blog_posts SET title = 'Astronomy club', updated_at = datetime('now', '+1 minute') "
+        "WHERE slug = 'robotics'"
+    ))
+    await db.execute(text("DELETE FROM blog_posts WHERE slug = 'chess'"))
+    await db.commit()
+    assert await titles(db, "astronomy") == []
+
+    await blog_search.ensure_index()
+
+    assert await titles(db, "astronomy") == ["Astronomy club"]
+    assert await titles(db, "robotics") == []
+    assert (await db.execute(text(f"SELECT COUNT(*) FROM {FTS_TABLE}"))).scalar_one() == 1
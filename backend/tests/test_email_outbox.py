@@ -0,0 +1,74 @@
+"""Email outbox dispatch: a slow send is not cut short, re-sent or overwritten."""
+import asyncio
+
+import pytest
+from sqlalchemy import select, update
+
+import app.services.email_outbox as email_outbox
+from app.core.config import settings
+from app.models.email_outbox import EmailOutbox
+from app.services.email_outbox import EmailDispatcher, enqueue_email
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowProvider:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.sent: list[str] = []
+
+    async def send(self, *, subject, body, to, from_addr=None):
+        await asyncio.sleep(self.delay)
+        self.sent.append(to)
+
+
+async def test_send_slower_than_the_lease_is_recorded_once(db, monkeypatch):
+    provider = SlowProvider(delay=1.2)
+    monkeypatch.setattr(email_outbox, "get_email_provider", lambda: provider)
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_SEND_TIMEOUT_SECONDS", 1)
+    dispatcher = EmailDispatcher()
+    await enqueue_email(db, kind="test", to="a@example.com", subject="Hi", body="Hello")
+
+    assert await dispatcher.dispatch_once() == 1
+
+    email = (await db.execute(select(EmailOutbox).execution_options(populate_existing=True))).scalar_one()
+    assert email.status == "sent"
+    assert email.attempts == 1
+    assert provider.sent == ["a@example.com"]
+
+
+async def test_lease_is_renewed_while_the_batch_is_in_flight(db, monkeypatch):
+    provider = SlowProvider(delay=2.5)
+    monkeypatch.setattr(email_outbox, "get_email_provider", lambda: provider)
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_SEND_TIMEOUT_SECONDS", 1)
+    await enqueue_email(db, kind="test", to="a@example.com", subject="Hi", body="Hello")
+
+    first = asyncio.create_task(EmailDispatcher().dispatch_once())
+    await asyncio.sleep(2.2)
+    # Past the original lease: another worker polls the table
+    assert await EmailDispatcher().dispatch_once() == 0
+    assert await first == 1
+
+    email = (await db.execute(select(EmailOutbox).execution_options(populate_existing=True))).scalar_one()
+    assert email.status == "sent"
+    assert provider.sent == ["a@example.com"]
+
+
+async def test_late_owner_does_not_overwrite_a_reclaimed_row(db, monkeypatch):
+    provider = SlowProvider(delay=0.3)
+    monkeypatch.setattr(email_outbox, "get_email_provider", lambda: provider)
+    dispatcher = EmailDispatcher()
+    await enqueue_email(db, kind="test", to="a@example.com", subject="Hi", body="Hello")
+
+    first = asyncio.create_task(dispatcher.dispatch_once())
+    await asyncio.sleep(0.1)
+    # Simulate the lease lapsing and another dispatcher claiming the row
+    other_lease = dispatcher._lease_until().replace(year=2099)
+    await db.execute(update(EmailOutbox).values(status="sending", attempts=2, next_attempt_at=other_lease))
+    await db.commit()
+    assert await first == 1
+
+    email = (await db.execute(select(EmailOutbox).execution_options(populate_existing=True))).scalar_one()
+    assert email.status == "sending"
+    assert email.next_attempt_at == other_lease
+    assert dispatcher.sent == 0
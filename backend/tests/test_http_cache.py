@@ -0,0 +1,59 @@
+"""Conditional GET on the public blog: ETags change with joined author data and differ per URL."""
+import pytest
+
+from app.models.blog_post import BlogPost
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+LIST_URL = "/api/v1/public/blog/posts"
+
+
+@pytest.fixture
+async def author(db):
+    author = User(email="author@example.com", hashed_password="x", full_name="Ada Author")
+    db.add(author)
+    await db.flush()
+    db.add(BlogPost(title="Hello", slug="hello", content="<p>Hi</p>", published=True, author_id=author.id))
+    await db.commit()
+    return author
+
+
+async def _etag(client, url: str, **params) -> str:
+    response = await client.get(url, params=params)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+async def test_unchanged_content_is_not_modified(client, author):
+    for url in (LIST_URL, f"{LIST_URL}/hello"):
+        etag = await _etag(client, url)
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+
+@pytest.mark.parametrize("url", [LIST_URL, f"{LIST_URL}/hello"])
+async def test_author_rename_changes_the_etag(client, db, author, url):
+    etag = await _etag(client, url)
+
+    author.full_name = "Ada Lovelace"
+    await db.commit()
+    response = await client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    # users has no updated_at, so a date could not vouch for the author either
+    assert "Last-Modified" not in response.headers
+
+
+async def test_urls_never_share_an_etag(client, author):
+    # One post with id 1: the list's count equals the post's id
+    etags = {
+        await _etag(client, LIST_URL),
+        await _etag(client, f"{LIST_URL}/hello"),
+        await _etag(client, LIST_URL, page_size=5),
+        await _etag(client, LIST_URL, category="news"),
+    }
+
+    assert len(etags) == 4
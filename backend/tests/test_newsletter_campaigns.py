@@ -0,0 +1,83 @@
+"""Campaign sending: the lease outlives a slow batch, and a lost lease stops the sender."""
+import asyncio
+
+import pytest
+from sqlalchemy import select, update
+
+import app.services.newsletter_campaigns as newsletter_campaigns
+from app.models.newsletter_campaign import NewsletterCampaign
+from app.models.newsletter_subscription import NewsletterSubscription
+from app.services.newsletter_campaigns import CampaignSender
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowProvider:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.sent: list[str] = []
+
+    async def send(self, *, subject, body, to, from_addr=None):
+        await asyncio.sleep(self.delay)
+        self.sent.append(to)
+
+
+async def queue_campaign(db, recipients: int) -> int:
+    db.add_all(NewsletterSubscription(email=f"r{i}@example.com") for i in range(recipients))
+    campaign = NewsletterCampaign(subject="News", body="Hello ${first_name}", status="queued")
+    db.add(campaign)
+    await db.commit()
+    return campaign.id
+
+
+def sender(provider, monkeypatch) -> CampaignSender:
+    monkeypatch.setattr(newsletter_campaigns, "get_email_provider", lambda: provider)
+    s = CampaignSender()
+    s.lease_seconds = 1
+    s.concurrency = 1
+    s.rate = 0
+    return s
+
+
+async def test_lease_is_renewed_during_a_slow_batch(db, monkeypatch):
+    provider = SlowProvider(delay=0.25)
+    campaign_id = await queue_campaign(db, 10)
+    first, second = sender(provider, monkeypatch), sender(provider, monkeypatch)
+
+    async with newsletter_campaigns.SessionLocal() as s:
+        campaign = await first._claim(s)
+    run = asyncio.create_task(first.run_campaign(campaign))
+    for _ in range(4):
+        await asyncio.sleep(0.5)
+        async with newsletter_campaigns.SessionLocal() as s:
+            assert await second._claim(s) is None
+    await run
+
+    campaign = await db.scalar(
+        select(NewsletterCampaign).where(NewsletterCampaign.id == campaign_id).execution_options(populate_existing=True)
+    )
+    assert campaign.status == "completed"
+    assert campaign.sent_count == 10
+    assert len(provider.sent) == 10
+
+
+async def test_sender_stops_when_the_lease_is_taken_over(db, monkeypatch):
+    provider = SlowProvider(delay=0.2)
+    campaign_id = await queue_campaign(db, 10)
+    first = sender(provider, monkeypatch)
+
+    async with newsletter_campaigns.SessionLocal() as s:
+        campaign = await first._claim(s)
+    run = asyncio.create_task(first.run_campaign(campaign))
+    await asyncio.sleep(0.3)
+    await db.execute(update(NewsletterCampaign).values(lease_owner="other"))
+    await db.commit()
+    await run
+
+    # Stopped at the next renewal (every lease/3 seconds), well short of the batch
+    assert 1 <= len(provider.sent) <= 4
+    campaign = await db.scalar(
+        select(NewsletterCampaign).where(NewsletterCampaign.id == campaign_id).execution_options(populate_existing=True)
+    )
+    assert campaign.lease_owner == "other"
+    assert campaign.sent_count == 0
@@ -0,0 +1,47 @@
+"""Password hashing back-pressure counts jobs until the executor finishes them."""
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_EXECUTOR", "thread")
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 1)
+    monkeypatch.setattr(security, "_hash_executor", None)
+    yield
+    security.shutdown_password_hashing()
+
+
+async def test_cancelled_request_keeps_its_job_counted(executor):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+        return "hash"
+
+    request = asyncio.create_task(security._run_hashing(slow_hash))
+    while not started.is_set():
+        await asyncio.sleep(0.01)
+    # The client times out; the hash keeps running on the executor
+    request.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await request
+
+    assert security.password_hashing_stats()["pending"] == 1
+    with pytest.raises(HTTPException) as busy:
+        await security._run_hashing(slow_hash)
+    assert busy.value.status_code == 503
+
+    release.set()
+    while security.password_hashing_stats()["pending"]:
+        await asyncio.sleep(0.01)
+    assert await security._run_hashing(lambda: "ok") == "ok"
@@ -0,0 +1,79 @@
+"""The public blog list and post are each one joined SELECT, and the list never reads content."""
+import pytest
+from sqlalchemy import event
+
+from app.api.v1.endpoints.public import blog as public_blog
+from app.db.session import engine
+from app.models.blog_post import BlogPost
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def posts(db):
+    authors = [User(email=f"author{n}@example.com", hashed_password="x", full_name=f"Author {n}") for n in range(3)]
+    db.add_all(authors)
+    await db.flush()
+    db.add_all([
+        BlogPost(
+            title=f"Post {n}", slug=f"post-{n}", content="<p>body</p>" * 100, excerpt="Excerpt",
+            published=True, author_id=authors[n % 3].id,
+        )
+        for n in range(12)
+    ])
+    await db.commit()
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    """SQL the handlers run for the content itself (conditional-GET validators stubbed out)."""
+    async def no_validators(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(public_blog, "collection_validators", no_validators)
+    monkeypatch.setattr(public_blog, "row_validators", no_validators)
+    seen: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+async def test_list_pages_are_one_statement_without_content(client, posts, statements):
+    first = await client.get("/api/v1/public/blog/posts", params={"page_size": 5})
+
+    assert first.status_code == 200
+    assert len(first.json()) == 5
+    assert first.json()[0]["author_name"]
+    assert len(statements) == 1
+
+    statements.clear()
+    cursor = first.headers["X-Next-Cursor"]
+    second = await client.get("/api/v1/public/blog/posts", params={"page_size": 5, "cursor": cursor})
+
+    assert second.status_code == 200
+    assert len(second.json()) == 5
+    assert not {p["id"] for p in first.json()} & {p["id"] for p in second.json()}
+    assert len(statements) == 1
+
+
+async def test_list_never_selects_content(client, posts, statements):
+    await client.get("/api/v1/public/blog/posts")
+    cursor = (await client.get("/api/v1/public/blog/posts", params={"page_size": 5})).headers["X-Next-Cursor"]
+    await client.get("/api/v1/public/blog/posts", params={"page_size": 5, "cursor": cursor, "category": "news"})
+
+    assert statements
+    assert not [sql for sql in statements if "blog_posts.content" in sql]
+
+
+async def test_post_is_one_statement(client, posts, statements):
+    response = await client.get("/api/v1/public/blog/posts/post-4")
+
+    assert response.status_code == 200
+    assert response.json()["content"].startswith("<p>body</p>")
+    assert response.json()["author_name"] == "Author 1"
+    assert len(statements) == 1
@@ -0,0 +1,85 @@
+"""Shared SQLite rate-limit store: exact across limiter instances, off the event loop, fails closed."""
+import sqlite3
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.core.rate_limit import RateLimiter
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def shared_limiter(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "sqlite")
+    monkeypatch.setattr(settings, "RATE_LIMIT_SQLITE_PATH", str(tmp_path / "rate_limit.db"))
+
+    def limiter(algorithm: str = "sliding_window") -> RateLimiter:
+        monkeypatch.setattr(settings, "RATE_LIMIT_ALGORITHM", algorithm)
+        return RateLimiter()
+    return limiter
+
+
+@pytest.mark.parametrize("algorithm", ["sliding_window", "gcra"])
+async def test_limit_is_shared_between_workers(shared_limiter, algorithm):
+    workers = [shared_limiter(algorithm), shared_limiter(algorithm)]
+
+    allowed = 0
+    for i in range(10):
+        result = await workers[i % 2].check("login:1.2.3.4", 5, 60)
+        allowed += not result.limited
+
+    assert allowed == 5
+
+
+async def test_checks_run_off_the_event_loop(shared_limiter, monkeypatch):
+    limiter = shared_limiter()
+    store = limiter.shared_store
+    threads = []
+    sliding_window = store.sliding_window
+
+    def record_thread(*args):
+        threads.append(threading.current_thread())
+        return sliding_window(*args)
+
+    monkeypatch.setattr(store, "sliding_window", record_thread)
+    await limiter.check("k", 5, 60)
+
+    assert threads and threads[0] is not threading.main_thread()
+
+
+async def test_stats_run_on_the_store_thread(shared_limiter, monkeypatch):
+    limiter = shared_limiter()
+    store = limiter.shared_store
+    threads = []
+    stats, sliding_window = store.stats, store.sliding_window
+
+    def record_thread(method):
+        def wrapper(*args):
+            threads.append(threading.current_thread())
+            return method(*args)
+        return wrapper
+
+    monkeypatch.setattr(store, "sliding_window", record_thread(sliding_window))
+    monkeypatch.setattr(store, "stats", record_thread(stats))
+    await limiter.check("k", 5, 60)
+    data = await limiter.stats()
+
+    assert data["shared"]["keys"] == 1
+    assert threads[1] is threads[0] is not threading.main_thread()
+
+
+async def test_store_errors_fail_closed(shared_limiter, monkeypatch):
+    limiter = shared_limiter()
+
+    def locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(limiter.shared_store, "sliding_window", locked)
+    result = await limiter.check("k", 5, 60)
+
+    assert result.limited
+    assert result.headers()["Retry-After"] == "1"
+    # Nothing was counted in per-worker memory instead
+    assert not limiter.memory_store
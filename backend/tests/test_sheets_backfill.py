@@ -0,0 +1,63 @@
+"""Sheets backfill: rows still queued by the live sync are not appended twice."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.models.newsletter_subscription import NewsletterSubscription
+from app.services.google_sheets import GoogleSheetsService
+from app.services.sheets_backfill import backfill_sheet
+
+pytestmark = pytest.mark.anyio
+
+
+class MemorySheets(GoogleSheetsService):
+    """The real queue and flush, writing to in-memory sheets instead of the API."""
+
+    def __init__(self):
+        super().__init__()
+        self.enabled = True
+        self.sheets: dict[str, list[list[str]]] = {}
+
+    def append_rows(self, sheet_id, headers, rows):
+        self.sheets.setdefault(sheet_id, []).extend(rows)
+
+    def read_columns(self, sheet_id, headers, columns):
+        rows = self.sheets.get(sheet_id, [])
+        return [[row[ord(col) - ord("A")] for row in rows] for col in columns]
+
+
+@pytest.fixture
+def sheets(monkeypatch):
+    monkeypatch.setattr(settings, "GOOGLE_SHEETS_CREDENTIALS_FILE", None)
+    monkeypatch.setattr(settings, "GOOGLE_SHEETS_CONTACT_SHEET_ID", "contacts")
+    monkeypatch.setattr(settings, "GOOGLE_SHEETS_NEWSLETTER_SHEET_ID", "newsletter")
+    return MemorySheets()
+
+
+async def subscribe(db, sheets, email: str, created_at: datetime, queue: bool) -> None:
+    subscriber = NewsletterSubscription(email=email, created_at=created_at)
+    db.add(subscriber)
+    await db.commit()
+    if queue:
+        sheets.add_newsletter_subscriber(email, None, None, None, None, None, created_at, subscriber.id)
+
+
+async def test_backfill_leaves_rows_queued_by_the_live_sync(db, sheets, monkeypatch):
+    # Dropped by the live sync an hour ago, and a fresh signup still waiting for the next flush
+    await subscribe(db, sheets, "old@example.com", datetime.utcnow() - timedelta(hours=1), queue=False)
+    await subscribe(db, sheets, "new@example.com", datetime.utcnow(), queue=True)
+
+    result = await backfill_sheet(db, sheets, "newsletter")
+    assert result.written == 1
+    assert [row[1] for row in sheets.sheets["newsletter"]] == ["old@example.com"]
+
+    assert await sheets.flush() == 1
+
+    # Once the row has settled, the next run finds it in the sheet
+    monkeypatch.setattr(settings, "GOOGLE_SHEETS_BACKFILL_SETTLE_SECONDS", 0)
+    monkeypatch.setattr(settings, "GOOGLE_SHEETS_FLUSH_SECONDS", 0)
+    result = await backfill_sheet(db, sheets, "newsletter")
+    assert result.written == 0
+    assert result.already_present == 1
+    assert [row[1] for row in sheets.sheets["newsletter"]] == ["old@example.com", "new@example.com"]
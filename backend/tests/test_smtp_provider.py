@@ -0,0 +1,116 @@
+"""SMTPProvider against a local aiosmtpd sink: pooling, reconnects and timeouts."""
+import asyncio
+import smtplib
+import socket
+import time
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.services.email import SMTPProvider
+
+pytestmark = pytest.mark.anyio
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Sink:
+    """Records each message and the client connection (peer address) it arrived on."""
+
+    def __init__(self):
+        self.port = _free_port()
+        self.messages: list[str] = []
+        self.peers: set = set()
+        self.delay = 0.0
+        self._controller = None
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.content.decode())
+        self.peers.add(session.peer)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return "250 OK"
+
+    def start(self) -> None:
+        self._controller = Controller(self, hostname="127.0.0.1", port=self.port)
+        self._controller.start()
+
+    def stop(self) -> None:
+        self._controller.stop()
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+
+@pytest.fixture
+def sink():
+    sink = Sink()
+    sink.start()
+    yield sink
+    sink.stop()
+
+
+@pytest.fixture
+async def provider(sink):
+    provider = SMTPProvider(host="127.0.0.1", port=sink.port, use_tls=False, pool_size=2, timeout=1, connect_timeout=1)
+    yield provider
+    await provider.close()
+
+
+async def _send(provider: SMTPProvider, n: int = 0) -> None:
+    await provider.send(subject=f"Message {n}", body="Hello", to="to@example.com", from_addr="from@example.com")
+
+
+async def test_concurrent_sends_share_the_pool(provider, sink):
+    await asyncio.gather(*(_send(provider, n) for n in range(20)))
+
+    assert len(sink.messages) == 20
+    assert provider.sent == 20
+    assert provider.connections_opened <= provider.pool_size
+    assert len(sink.peers) == provider.connections_opened
+
+
+async def test_reconnects_after_the_sink_restarts(provider, sink):
+    await _send(provider, 1)
+    sink.restart()
+
+    await _send(provider, 2)
+
+    assert len(sink.messages) == 2
+    assert provider.reconnects == 1
+    assert provider.failed == 0
+
+
+async def test_connect_timeout():
+    # Accepts TCP connections (kernel backlog) but never sends the SMTP greeting
+    with socket.socket() as silent:
+        silent.bind(("127.0.0.1", 0))
+        silent.listen(8)
+        provider = SMTPProvider(host="127.0.0.1", port=silent.getsockname()[1], use_tls=False, connect_timeout=0.3)
+        started = time.monotonic()
+
+        with pytest.raises(smtplib.SMTPServerDisconnected, match="timed out"):
+            await _send(provider)
+
+    assert time.monotonic() - started < 2
+    assert provider.failed == 1
+
+
+async def test_send_timeout_is_not_retried(provider, sink):
+    await _send(provider, 1)
+    sink.delay = 2
+
+    started = time.monotonic()
+    with pytest.raises(smtplib.SMTPServerDisconnected, match="timed out"):
+        await _send(provider, 2)
+
+    assert time.monotonic() - started < provider.timeout + 0.5
+    # The server may still accept the timed-out message; sending it again could duplicate it
+    assert len(sink.messages) == 2
+    assert provider.reconnects == 0
+    assert provider.failed == 1
@@ -0,0 +1,108 @@
+"""Refresh-token rotation, reuse detection and session revocation on the Redis token store."""
+import fakeredis
+import pytest
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.token_store import token_store
+from app.models.refresh_token import RefreshToken
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(token_store, "redis_client", fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+    token_store._register_scripts()
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_SQL_AUDIT", False)
+    return server
+
+
+def _bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+async def _refresh(client, refresh_token: str):
+    return await client.post("/api/v1/auth/refresh", json={"token": refresh_token})
+
+
+async def test_rotate_replaces_the_token(client, login, user, redis_server):
+    tokens = await login()
+
+    response = await _refresh(client, tokens["refresh_token"])
+
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert rotated["refresh_token"].startswith(f"{user.id}.")
+    assert (await _refresh(client, rotated["refresh_token"])).status_code == 200
+    # Every key of the user carries the same hash tag (one cluster slot)
+    keys = await token_store.redis_client.keys("*")
+    assert keys and all(f"{{{user.id}}}" in key for key in keys)
+
+
+async def test_reuse_within_grace_is_a_conflict(client, login, redis_server):
+    tokens = await login()
+    rotated = (await _refresh(client, tokens["refresh_token"])).json()
+
+    response = await _refresh(client, tokens["refresh_token"])
+
+    assert response.status_code == 409
+    # The parallel request's winner keeps working
+    assert (await _refresh(client, rotated["refresh_token"])).status_code == 200
+
+
+async def test_reuse_after_grace_revokes_the_family(client, login, redis_server, monkeypatch):
+    tokens = await login()
+    rotated = (await _refresh(client, tokens["refresh_token"])).json()
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_REUSE_GRACE_SECONDS", 0)
+
+    response = await _refresh(client, tokens["refresh_token"])
+
+    assert response.status_code == 401
+    assert "reuse" in response.json()["detail"]
+    assert (await _refresh(client, rotated["refresh_token"])).status_code == 401
+    assert (await client.get("/api/v1/users/me", headers=_bearer(rotated))).status_code == 401
+
+
+async def test_logout_all_revokes_every_token_and_session(client, login, user, redis_server):
+    first = await login()
+    second = await login()
+
+    response = await client.post("/api/v1/auth/logout-all", headers=_bearer(first))
+
+    assert response.status_code == 200
+    assert response.json()["revoked"] == 2
+    assert (await _refresh(client, second["refresh_token"])).status_code == 401
+    assert (await client.get("/api/v1/users/me", headers=_bearer(second))).status_code == 401
+    assert not await token_store.redis_client.smembers(f"rt_user:{{{user.id}}}")
+    assert not await token_store.redis_client.smembers(f"sess_user:{{{user.id}}}")
+
+
+async def test_logout_ends_only_that_session(client, login, redis_server):
+    first = await login()
+    second = await login()
+    assert (await client.get("/api/v1/users/me", headers=_bearer(first))).status_code == 200
+
+    response = await client.post(
+        "/api/v1/auth/logout", json={"token": first["refresh_token"]}, headers=_bearer(first)
+    )
+
+    assert response.status_code == 200
+    assert (await client.get("/api/v1/users/me", headers=_bearer(first))).status_code == 401
+    assert (await _refresh(client, first["refresh_token"])).status_code == 401
+    assert (await client.get("/api/v1/users/me", headers=_bearer(second))).status_code == 200
+
+
+async def test_falls_back_to_sql_when_redis_is_unavailable(client, login, db, redis_server):
+    redis_server.connected = False
+
+    tokens = await login()
+    response = await _refresh(client, tokens["refresh_token"])
+
+    assert response.status_code == 200
+    assert (await client.get("/api/v1/users/me", headers=_bearer(response.json()))).status_code == 200
+    # Issued and rotated in SQL: the old row is revoked, the new one active
+    rows = (await db.execute(select(func.count()).select_from(RefreshToken))).scalar_one()
+    assert rows == 2
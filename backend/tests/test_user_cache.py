@@ -0,0 +1,45 @@
+"""Shared user cache: a row loaded before a concurrent change is never cached as current."""
+import fakeredis
+import pytest
+
+from app.core.user_cache import UserCache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def workers():
+    server = fakeredis.FakeServer()
+    caches = [UserCache(), UserCache()]
+    for cache in caches:
+        cache.enabled = True
+        cache.redis_client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    return caches
+
+
+async def test_change_during_the_load_is_not_masked(db, user, workers):
+    worker, other = workers
+    load = db.get
+
+    async def get_then_change(model, ident, **kwargs):
+        row = await load(model, ident, **kwargs)
+        # Another worker commits a change to the user and invalidates it
+        await other.invalidate(ident)
+        return row
+
+    db.get = get_then_change
+    await worker.get_user(db, user.id)
+    db.get = load
+
+    snapshot, _ = await worker._lookup(user.id)
+    assert snapshot is None
+    snapshot, _ = await other._lookup(user.id)
+    assert snapshot is None
+
+
+async def test_unchanged_user_is_served_from_cache(db, user, workers):
+    worker, other = workers
+    await worker.get_user(db, user.id)
+
+    snapshot, _ = await other._lookup(user.id)
+    assert snapshot is not None and snapshot["email"] == user.email
@@ -52,6 +52,8 @@ export default function BlogManagementPage() {
       const params = new URLSearchParams({
         page: page.toString(),
         page_size: pageSize.toString(),
+        // The table never shows post bodies
+        fields: "id,title,slug,excerpt,category,author,published,created_at,updated_at",
       });
 
       if (search) params.append("search", search);
@@ -42,6 +42,7 @@ export default function ProfilePage() {
   const [twoFactorStatus, setTwoFactorStatus] = useState<{
     enabled: boolean;
     backup_codes_remaining: number;
+    backup_codes_legacy?: boolean;
     confirmed_at?: string | null;
     last_verified_at?: string | null;
   } | null>(null);
@@ -348,6 +349,12 @@ export default function ProfilePage() {
                           Backup codes remaining:{" "}
                           {twoFactorStatus.backup_codes_remaining}
                         </p>
+                        {twoFactorStatus.backup_codes_legacy && (
+                          <p className="mt-2 text-sm text-yellow-700">
+                            Your backup codes use an older format. Please
+                            regenerate them.
+                          </p>
+                        )}
                       </div>
 
                       {latestBackupCodes && latestBackupCodes.length > 0 && (